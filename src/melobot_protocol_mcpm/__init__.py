@@ -3,10 +3,14 @@ from melobot.protocols import ProtocolStack
 from .adapter import *  # noqa: F403
 from .const import PROTOCOL_IDENTIFIER, PROTOCOL_NAME, PROTOCOL_SUPPORT_AUTHOR, PROTOCOL_VERSION
 from .handle import (
+    on_chat_flood,
     on_event,
+    on_gc_pause,
+    on_lag,
     on_log,
     on_message,
     on_player_operation,
+    on_proc_sample,
     on_rcon_started,
     on_server_done,
     on_stderr,
@@ -14,10 +18,11 @@ from .handle import (
 )
 from .io import *  # noqa: F403
 from .utils import *  # noqa: F403
+from .world import *  # noqa: F403
 
 
 class MCPMProtocol(ProtocolStack):
-    def __init__(self, *srcs: ServerManager) -> None:
+    def __init__(self, *srcs: ServerManager, startup: StartupOrchestrator | None = None) -> None:
         super().__init__()
         self.adapter = Adapter()
         self.inputs = set()
@@ -32,3 +37,8 @@ class MCPMProtocol(ProtocolStack):
                 self.inputs.add(src)
             if isinstance(src, ServerManager):
                 self.outputs.add(src)
+
+        if startup is not None:
+            for src in srcs:
+                startup.register(src)
+            startup.validate()
@@ -1,5 +1,6 @@
 from .action import (
     Action,
+    BatchCmdAction,
     CmdAction,
     RawCmdStrAction,
     SendBroadcastMsgAction,
@@ -7,14 +8,19 @@ from .action import (
     create_cmd_str,
 )
 from .base import Adapter
-from .echo import CmdEcho, Echo
+from .echo import CmdEcho, DataEcho, Echo, ListEcho, NetworkEcho, ScoreEcho, TimeEcho
 from .event import (
+    ChatFloodEvent,
     Event,
+    GcPauseEvent,
+    LagEvent,
     LogEvent,
     MessageEvent,
     PlayerEvent,
+    ProcSampleEvent,
     RconStartedEvent,
     ServerDoneEvent,
     StderrEvent,
     StdoutEvent,
 )
+from .export import DEFAULT_EXPORT_FIELDS, EXPORT_FIELDS, EventExporter
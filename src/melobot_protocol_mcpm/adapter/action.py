@@ -1,11 +1,11 @@
 from melobot.adapter import Action as RootAction
 from melobot.handle import try_get_event
-from typing_extensions import Any, Sequence
+from typing_extensions import Any, Mapping, Sequence
 
 from ..const import PROTOCOL_IDENTIFIER
 from ..io.model import OutputType
 from ..utils.cmd import CmdFactory
-from ..utils.text import JsonText
+from ..utils.text import JsonText, JsonTextTemplate
 
 
 class Action(RootAction):
@@ -36,20 +36,35 @@ class RawCmdStrAction(CmdAction):
         self.cmd = cmd_str
 
 
+class BatchCmdAction(CmdAction):
+    def __init__(self, cmds: Sequence[str]) -> None:
+        super().__init__("function")
+        self.cmds = tuple(cmds)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(cmds:{len(self.cmds)})"
+
+
 class SendMsgAction(CmdAction):
     def __init__(
-        self, target: str, message: str | JsonText | Sequence[str] | Sequence[JsonText]
+        self,
+        target: str,
+        message: str | JsonText | JsonTextTemplate | Sequence[str] | Sequence[JsonText],
+        fields: Mapping[str, Any] | None = None,
     ) -> None:
         super().__init__("tellraw", target, message)
         self.target = target
         self.message = message
+        self.fields = fields if fields is not None else {}
 
 
 class SendBroadcastMsgAction(SendMsgAction):
     def __init__(
-        self, message: str | JsonText | Sequence[str] | Sequence[JsonText]
+        self,
+        message: str | JsonText | JsonTextTemplate | Sequence[str] | Sequence[JsonText],
+        fields: Mapping[str, Any] | None = None,
     ) -> None:
-        super().__init__("@a", message)
+        super().__init__("@a", message, fields)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(cmd_name={self.cmd_name!r}, target=@a, args: {len(self.cmd_args)})"
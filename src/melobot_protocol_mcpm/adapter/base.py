@@ -1,3 +1,5 @@
+import asyncio
+
 from melobot.adapter import (
     AbstractEchoFactory,
     AbstractEventFactory,
@@ -5,13 +7,14 @@ from melobot.adapter import (
     ActionHandleGroup,
 )
 from melobot.adapter import Adapter as RootAdapter
+from melobot.adapter import filter_out
 from melobot.handle import try_get_event
-from typing_extensions import Sequence, cast
+from typing_extensions import Any, Iterable, Mapping, Sequence, cast
 
 from ..const import PROTOCOL_IDENTIFIER
 from ..io.manager import ServerManager
 from ..io.model import CmdOutputData, EchoPacket, InPacket, OutPacket, OutputType
-from ..utils.text import JsonText
+from ..utils.text import JsonText, JsonTextTemplate
 from . import action as ac
 from . import echo as ec
 from . import event as ev
@@ -19,7 +22,21 @@ from . import event as ev
 
 class EventFactory(AbstractEventFactory[InPacket, ev.Event]):
     async def create(self, packet: InPacket) -> ev.Event:
-        return ev.Event.resolve(packet.server_id, packet.data)
+        event = ev.Event.resolve(packet.server_id, packet.data)
+        src = ServerManager.__instances__.get(packet.server_id)
+        if src is None:
+            return event
+
+        if isinstance(event, ev.PlayerEvent):
+            if event.is_joined():
+                src.presence.join(event.player_name, event.time)
+            else:
+                src.presence.leave(event.player_name, event.time)
+        if src.cmd_cache is not None:
+            src.cmd_cache.on_event(event)
+        if src.exporter is not None:
+            src.exporter.on_event(event)
+        return event
 
 
 class OutputFactory(AbstractOutputFactory[OutPacket, ac.Action]):
@@ -49,7 +66,10 @@ class Adapter(
         return await self.send_msg(None, text)
 
     async def send_msg(
-        self, target: str | None, message: str | JsonText | Sequence[str] | Sequence[JsonText]
+        self,
+        target: str | None,
+        message: str | JsonText | JsonTextTemplate | Sequence[str] | Sequence[JsonText],
+        fields: Mapping[str, Any] | None = None,
     ) -> ActionHandleGroup[ec.CmdEcho]:
         if target is None:
             event = try_get_event()
@@ -57,12 +77,74 @@ class Adapter(
                 target = event.player_name
             else:
                 raise ValueError("当前上下文的事件，没有玩家名称信息，无法自动定位消息发送目标")
-        return await self.call_output(ac.SendMsgAction(target, message))
+        return await self.call_output(ac.SendMsgAction(target, message, fields))
 
     async def send_broadcast_msg(
-        self, message: str | JsonText | Sequence[str] | Sequence[JsonText]
+        self,
+        message: str | JsonText | JsonTextTemplate | Sequence[str] | Sequence[JsonText],
+        fields: Mapping[str, Any] | None = None,
     ) -> ActionHandleGroup[ec.CmdEcho]:
-        return await self.call_output(ac.SendBroadcastMsgAction(message))
+        return await self.call_output(ac.SendBroadcastMsgAction(message, fields))
 
     async def send_cmd(self, cmd: str) -> ActionHandleGroup[ec.CmdEcho]:
         return await self.call_output(ac.RawCmdStrAction(cmd))
+
+    async def send_batch_cmd(self, cmds: Sequence[str]) -> ActionHandleGroup[ec.CmdEcho]:
+        """把命令序列写为数据包函数，以一次 ``function`` 命令执行
+
+        相同的命令序列会复用已生成的函数，只有首次执行时需要重载数据包
+
+        :param cmds: 命令序列
+        :return: 操作句柄组，回应为 ``function`` 命令的回应
+        """
+        return await self.call_output(ac.BatchCmdAction(cmds))
+
+    async def send_network_broadcast_msg(
+        self,
+        message: str | JsonText | JsonTextTemplate | Sequence[str] | Sequence[JsonText],
+        fields: Mapping[str, Any] | None = None,
+        servers: Iterable[str] | None = None,
+    ) -> ec.NetworkEcho:
+        """向多个服务端并发广播消息
+
+        :param message: 消息内容
+        :param fields: 消息为模板时的字段值
+        :param servers: 目标服务端名称，为空时发送到所有服务端
+        :return: 聚合的回应
+        """
+        return await self._call_network(ac.SendBroadcastMsgAction(message, fields), servers)
+
+    async def send_network_cmd(
+        self, cmd: str, servers: Iterable[str] | None = None
+    ) -> ec.NetworkEcho:
+        """向多个服务端并发执行命令
+
+        :param cmd: 命令字符串
+        :param servers: 目标服务端名称，为空时发送到所有服务端
+        :return: 聚合的回应
+        """
+        return await self._call_network(ac.RawCmdStrAction(cmd), servers)
+
+    async def _call_network(
+        self, action: ac.Action, servers: Iterable[str] | None
+    ) -> ec.NetworkEcho:
+        names = set(servers) if servers is not None else None
+        if names is not None and len(unknown := names - {src.name for src in self.out_srcs}):
+            raise ValueError(f"不存在的服务端：{', '.join(sorted(unknown))}")
+
+        # 每个输出源都有独立的操作句柄，命令各自进入对应服务端的发送队列，因此彼此并发执行
+        with filter_out(lambda src: names is None or cast(ServerManager, src).name in names):
+            handles = await self.call_output(action)
+        for h in handles:
+            if h.status == "PENDING":
+                h.execute()
+
+        rets = await asyncio.gather(*handles, return_exceptions=True)
+        result = ec.NetworkEcho()
+        for h, ret in zip(handles, rets):
+            name = cast(ServerManager, h.out_src).name
+            if isinstance(ret, BaseException):
+                result.errors[name] = ret
+            else:
+                result.echoes[name] = cast(ec.CmdEcho | None, ret)
+        return result
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
+
 from melobot.adapter import Echo as RootEcho
-from typing_extensions import Any, Generic, cast
+from typing_extensions import Any, Generic, Iterator, cast
 
 from ..const import PROTOCOL_IDENTIFIER
 from ..io.model import CmdEchoData, EchoDataT, EchoType
 from ..utils.common import truncate
+from ..utils.pattern import RegexPatternGroup
+from ..utils.snbt import extract_snbt, iter_snbt, loads_snbt
 
 
 class Echo(RootEcho, Generic[EchoDataT]):
@@ -27,7 +31,8 @@ class Echo(RootEcho, Generic[EchoDataT]):
     def resolve(cls, data: EchoDataT) -> Echo:
         match data.type:
             case EchoType.CMD_RESP:
-                return CmdEcho(cast(CmdEchoData, data))
+                cmd_data = cast(CmdEchoData, data)
+                return _cmd_echo_cls(cmd_data.cmd)(cmd_data)
             case _:
                 return cls(data)
 
@@ -45,3 +50,146 @@ class CmdEcho(Echo[CmdEchoData]):
         if self.content in (None, ""):
             raise ValueError("回应中的响应内容为空或空字符串")
         return self.content
+
+
+class DataEcho(CmdEcho):
+    """``data get`` 命令的回应，SNBT 内容按需解析
+
+    :ivar str | None target: 查询的目标，命令执行失败时为空
+    :ivar str | None snbt: 回应中的 SNBT 文本，命令执行失败时为空
+    """
+
+    def __init__(self, data: CmdEchoData) -> None:
+        super().__init__(data)
+        self.target: str | None = None
+        self.snbt: str | None = None
+        matched = RegexPatternGroup.data_get.match(self.content or "")
+        if matched is not None:
+            self.target, self.snbt = matched.group("target"), matched.group("snbt")
+
+    def _get_snbt(self) -> str:
+        if self.snbt is None:
+            raise ValueError(f"data get 命令执行失败：{truncate(self.content or '', 100)!r}")
+        return self.snbt
+
+    def data(self) -> Any:
+        """完整解析 SNBT 内容"""
+        return loads_snbt(self._get_snbt())
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """只解析路径指向的值
+
+        :param path: NBT 路径，如 ``Inventory[0].id``
+        :param default: 路径不存在时返回的值
+        :return: 路径指向的值
+        """
+        return extract_snbt(self._get_snbt(), path, default)
+
+    def iter(self, path: str = "") -> Iterator[tuple[str | int, Any]]:
+        """流式遍历路径指向的复合标签或列表
+
+        :param path: NBT 路径，为空字符串时遍历根
+        :return: （键或下标，值）的迭代器
+        """
+        return iter_snbt(self._get_snbt(), path)
+
+
+class ListEcho(CmdEcho):
+    """``list`` 命令的回应
+
+    :ivar int | None count: 在线玩家数，无法识别回应时为空
+    :ivar int | None max: 最大玩家数，无法识别回应时为空
+    :ivar tuple[str, ...] players: 在线玩家（``list uuids`` 时带有 uuid）
+    """
+
+    def __init__(self, data: CmdEchoData) -> None:
+        super().__init__(data)
+        self.count: int | None = None
+        self.max: int | None = None
+        self.players: tuple[str, ...] = ()
+        matched = RegexPatternGroup.player_list.search(self.content or "")
+        if matched is not None:
+            self.count, self.max = int(matched.group("count")), int(matched.group("max"))
+            self.players = tuple(
+                n for n in (n.strip() for n in matched.group("names").split(",")) if n != ""
+            )
+
+
+class ScoreEcho(CmdEcho):
+    """``scoreboard players get`` 命令的回应
+
+    :ivar str | None target: 分数持有者，分数未设置时为空
+    :ivar str | None objective: 记分项，分数未设置时为空
+    :ivar int | None score: 分数，分数未设置时为空
+    """
+
+    def __init__(self, data: CmdEchoData) -> None:
+        super().__init__(data)
+        self.target: str | None = None
+        self.objective: str | None = None
+        self.score: int | None = None
+        matched = RegexPatternGroup.score_get.fullmatch((self.content or "").strip())
+        if matched is not None:
+            self.target, self.objective = matched.group("target"), matched.group("objective")
+            self.score = int(matched.group("score"))
+
+
+class TimeEcho(CmdEcho):
+    """``time query`` 命令的回应
+
+    :ivar int | None value: 查询到的时间（刻或天数），无法识别回应时为空
+    """
+
+    def __init__(self, data: CmdEchoData) -> None:
+        super().__init__(data)
+        matched = RegexPatternGroup.time_query.search(self.content or "")
+        self.value: int | None = int(matched.group("time")) if matched is not None else None
+
+
+_CMD_ECHOES: tuple[tuple[str, type[CmdEcho]], ...] = (
+    ("data get ", DataEcho),
+    ("scoreboard players get ", ScoreEcho),
+    ("time query ", TimeEcho),
+    ("list ", ListEcho),
+)
+
+
+def _cmd_echo_cls(cmd: str) -> type[CmdEcho]:
+    # execute ... run <cmd> 的回应与 <cmd> 相同
+    cmd = cmd.rsplit(" run ", 1)[-1].lstrip("/").strip() + " "
+    for prefix, cls in _CMD_ECHOES:
+        if cmd.startswith(prefix):
+            return cls
+    return CmdEcho
+
+
+@dataclass
+class NetworkEcho:
+    """多个服务端执行同一行为操作后的聚合回应
+
+    :ivar dict[str, CmdEcho | None] echoes: 执行成功的服务端名称与其回应（未启用 RCON 时回应为 None）
+    :ivar dict[str, BaseException] errors: 执行失败的服务端名称与对应的异常
+    """
+
+    echoes: dict[str, CmdEcho | None] = field(default_factory=dict)
+    errors: dict[str, BaseException] = field(default_factory=dict)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(ok={len(self.echoes)}, failed={len(self.errors)})"
+
+    @property
+    def servers(self) -> tuple[str, ...]:
+        return (*self.echoes.keys(), *self.errors.keys())
+
+    def ok(self) -> bool:
+        return len(self.errors) == 0
+
+    def raise_for_errors(self) -> None:
+        if len(self.errors):
+            raise ExceptionGroup(
+                f"{len(self.errors)} 个服务端执行行为操作失败：{', '.join(self.errors)}",
+                [
+                    e if isinstance(e, Exception) else RuntimeError(repr(e))
+                    for e in self.errors.values()
+                ],
+            )
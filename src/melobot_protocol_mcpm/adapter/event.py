@@ -5,15 +5,25 @@ import re
 from melobot.adapter import Event as RootEvent
 from melobot.adapter import TextEvent as RootTextEvent
 from melobot.adapter import content
-from typing_extensions import Generic, Literal, cast
+from typing_extensions import Generic, Hashable, Literal, cast
 
 from ..const import PROTOCOL_IDENTIFIER
 from ..io.manager import ServerManager
-from ..io.model import InputDataT, InputType, LogInputData
+from ..io.model import (
+    ChatFloodInputData,
+    GcPauseInputData,
+    InputDataT,
+    InputType,
+    LagInputData,
+    LogInputData,
+    ProcSampleInputData,
+)
 from ..utils.common import truncate
 from ..utils.pattern import RegexPatternGroup as PatternGroup
 from ..utils.pattern import fullmatch, search
 
+_ROUTE_KEYS: dict[tuple[type, tuple[Hashable, ...]], frozenset[Hashable]] = {}
+
 
 class Event(RootEvent, Generic[InputDataT]):
     def __init__(self, server_id: str, data: InputDataT) -> None:
@@ -28,17 +38,132 @@ class Event(RootEvent, Generic[InputDataT]):
 
     @classmethod
     def resolve(cls, server_id: str, data: InputDataT) -> Event:
-        cls_map: dict[InputType, type[Event]] = {InputType.LOG: LogEvent}
+        cls_map: dict[InputType, type[Event]] = {
+            InputType.LOG: LogEvent,
+            InputType.LAG: LagEvent,
+            InputType.PROC_SAMPLE: ProcSampleEvent,
+            InputType.GC_PAUSE: GcPauseEvent,
+            InputType.CHAT_FLOOD: ChatFloodEvent,
+        }
         if (etype := data.type) in cls_map:
             return cls_map[etype].resolve(server_id, data)
         return cls(server_id, data)
 
+    @property
+    def route_keys(self) -> frozenset[Hashable]:
+        """事件的路由键：事件所属的所有 MCPM 事件类型，以及子类提供的额外键
+
+        同一类型（且额外键相同）的事件共享同一个键集合，只在第一次出现时计算
+        """
+        cls = self.__class__
+        extras = self._route_extras()
+        if (keys := _ROUTE_KEYS.get((cls, extras))) is None:
+            keys = frozenset((*(c for c in cls.__mro__ if issubclass(c, Event)), *extras))
+            _ROUTE_KEYS[(cls, extras)] = keys
+        return keys
+
+    def _route_extras(self) -> tuple[Hashable, ...]:
+        return ()
+
     def is_from_server(self, server_id: str) -> bool:
         return self.server_id == server_id
 
     def is_log(self) -> bool:
         return self.type == InputType.LOG
 
+    def is_lag(self) -> bool:
+        return self.type == InputType.LAG
+
+    def is_proc_sample(self) -> bool:
+        return self.type == InputType.PROC_SAMPLE
+
+    def is_gc_pause(self) -> bool:
+        return self.type == InputType.GC_PAUSE
+
+    def is_chat_flood(self) -> bool:
+        return self.type == InputType.CHAT_FLOOD
+
+
+class LagEvent(Event[LagInputData]):
+    """服务端卡顿报告，来自刻耗时采样或 “Can't keep up!” 日志
+
+    刻耗时采样只在进入卡顿状态时产生一次此事件，每条 “Can't keep up!” 日志产生一次。
+    服务端从卡顿中恢复时也会产生一次此事件，此时 :attr:`lagging` 为 :obj:`False`
+    """
+
+    def __init__(self, server_id: str, data: LagInputData) -> None:
+        super().__init__(server_id, data)
+        self.source = data.source
+        self.lagging = data.lagging
+        self.mspt = data.mspt
+        self.behind_ms = data.behind_ms
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(source={self.source!r}, lagging={self.lagging}, mspt={self.mspt}, server={self.server_id!r})"
+
+    @classmethod
+    def resolve(cls, server_id: str, data: LagInputData) -> LagEvent:
+        return cls(server_id, data)
+
+    def is_recovered(self) -> bool:
+        return not self.lagging
+
+
+class ProcSampleEvent(Event[ProcSampleInputData]):
+    """服务端进程的一次资源采样"""
+
+    def __init__(self, server_id: str, data: ProcSampleInputData) -> None:
+        super().__init__(server_id, data)
+        self.sample = data.content
+        self.pid = self.sample.pid
+        self.cpu_percent = self.sample.cpu_percent
+        self.rss = self.sample.rss
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(pid={self.pid}, cpu={self.cpu_percent}, rss={self.rss}, server={self.server_id!r})"
+
+    @classmethod
+    def resolve(cls, server_id: str, data: ProcSampleInputData) -> ProcSampleEvent:
+        return cls(server_id, data)
+
+
+class GcPauseEvent(Event[GcPauseInputData]):
+    """服务端 JVM 的一次 GC 停顿，来自 GC 日志文件"""
+
+    def __init__(self, server_id: str, data: GcPauseInputData) -> None:
+        super().__init__(server_id, data)
+        self.pause = data.content
+        self.kind = self.pause.kind
+        self.pause_ms = self.pause.pause_ms
+        self.heap_after = self.pause.heap_after
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(kind={self.kind!r}, pause_ms={self.pause_ms}, server={self.server_id!r})"
+
+    @classmethod
+    def resolve(cls, server_id: str, data: GcPauseInputData) -> GcPauseEvent:
+        return cls(server_id, data)
+
+
+class ChatFloodEvent(Event[ChatFloodInputData]):
+    """玩家发言超出限流后被拦截的消息汇总，由 :class:`.ChatRateLimit` 的汇总模式产生"""
+
+    def __init__(self, server_id: str, data: ChatFloodInputData) -> None:
+        super().__init__(server_id, data)
+        self.flood = data.content
+        self.player_name = self.flood.player
+        self.role = self.flood.role
+        self.dropped = self.flood.dropped
+        self.last_message = self.flood.last_message
+        self.scope = (self.server_id, self.player_name)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(player={self.player_name!r}, dropped={self.dropped}, server={self.server_id!r})"
+
+    @classmethod
+    def resolve(cls, server_id: str, data: ChatFloodInputData) -> ChatFloodEvent:
+        return cls(server_id, data)
+
 
 class LogEvent(RootTextEvent, Event[LogInputData]):
     def __init__(self, server_id: str, data: LogInputData) -> None:
@@ -210,6 +335,9 @@ class PlayerEvent(StdoutEvent):
     def is_from_player(self, player_name: str) -> bool:
         return self.player_name == player_name
 
+    def _route_extras(self) -> tuple[Hashable, ...]:
+        return ((PlayerEvent, self.operation_type),)
+
     def is_joined(self) -> bool:
         return self.operation_type == "joined"
 
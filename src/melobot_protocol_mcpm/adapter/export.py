@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from melobot.log import logger
+from typing_extensions import Any, BinaryIO, Callable, Hashable, Literal, Mapping, Sequence
+
+from . import event as ev
+
+
+def _log_time(e: ev.Event) -> str | None:
+    if not isinstance(e, ev.LogEvent) or e.log_matched is None:
+        return None
+    return f"{e.hour:02d}:{e.min:02d}:{e.sec:02d}"
+
+
+EXPORT_FIELDS: dict[str, Callable[[ev.Event], Any]] = {
+    "ts": lambda e: e.time,
+    "id": lambda e: e.id,
+    "server": lambda e: e.server_id,
+    "type": lambda e: e.__class__.__name__,
+    "log_time": _log_time,
+    "level": lambda e: e.log_level if isinstance(e, ev.LogEvent) else None,
+    "player": lambda e: getattr(e, "player_name", None),
+    "operation": lambda e: e.operation_type if isinstance(e, ev.PlayerEvent) else None,
+    "message": lambda e: e.message if isinstance(e, ev.MessageEvent) else None,
+    "text": lambda e: e.log_content if isinstance(e, ev.LogEvent) else None,
+    "mspt": lambda e: e.mspt if isinstance(e, ev.LagEvent) else None,
+    "pause_ms": lambda e: e.pause_ms if isinstance(e, ev.GcPauseEvent) else None,
+    "dropped": lambda e: e.dropped if isinstance(e, ev.ChatFloodEvent) else None,
+}
+DEFAULT_EXPORT_FIELDS = ("ts", "server", "type", "player", "message")
+
+
+def _complete_size(path: Path, compressed: bool) -> int:
+    # 每个批次是一个完整的 gzip 成员（或以换行结尾的若干行），只保留完整写入的批次
+    if not compressed:
+        data = path.read_bytes()
+        return data.rfind(b"\n") + 1
+
+    good = offset = 0
+    dec = zlib.decompressobj(wbits=31)
+    with open(path, "rb") as fp:
+        while chunk := fp.read(1 << 20):
+            while chunk:
+                try:
+                    dec.decompress(chunk)
+                except zlib.error:
+                    return good
+                if not dec.eof:
+                    offset += len(chunk)
+                    break
+                offset += len(chunk) - len(dec.unused_data)
+                good = offset
+                chunk = dec.unused_data
+                dec = zlib.decompressobj(wbits=31)
+    return good
+
+
+class EventExporter:
+    """把适配器产生的事件按投影批量导出到文件，供离线分析使用
+
+    事件在事件循环中只做投影并加入当前批次，序列化、压缩和写入在单独的线程中按批进行。文件按大小
+    或时间轮转，写入中的文件带有 ``.tmp`` 后缀，轮转或关闭时才重命名为最终文件名。压缩时每个批次是
+    一个独立的 gzip 成员，异常退出后留下的文件在下次初始化时截断到最后一个完整的批次。
+
+    使用此导出器的服务端管理器在开始运行时登记，全部关闭后导出器自动写入剩余事件并关闭文件。
+
+    ``jsonl`` 格式每行一个事件；``columns`` 格式每行一个批次，以列名到该列所有值的映射存储，
+    相同字段的值相邻存放，压缩率更高
+    """
+
+    def __init__(
+        self,
+        export_dir: str | Path,
+        format: Literal["jsonl", "columns"] = "jsonl",
+        fields: Sequence[str] | Mapping[str, Callable[[ev.Event], Any]] = DEFAULT_EXPORT_FIELDS,
+        include: Sequence[type[ev.Event]] | None = None,
+        compress: bool = True,
+        batch_size: int = 1000,
+        flush_interval: float = 5,
+        rotate_bytes: int = 64 << 20,
+        rotate_secs: float | None = 3600,
+        prefix: str = "events",
+    ) -> None:
+        """初始化一个事件导出器
+
+        :param export_dir: 导出目录
+        :param format: 文件格式
+        :param fields: 导出的字段，可以是 :data:`EXPORT_FIELDS` 中的字段名，也可以是字段名到取值函数的映射
+        :param include: 只导出这些类型（及其子类）的事件，为空时导出全部事件
+        :param compress: 是否用 gzip 压缩文件
+        :param batch_size: 攒满多少个事件写入一次
+        :param flush_interval: 事件不足一批时，最长等待多久写入（秒）
+        :param rotate_bytes: 文件（压缩后）超过此大小时轮转
+        :param rotate_secs: 文件打开超过此时长时轮转，为空时只按大小轮转
+        :param prefix: 文件名前缀
+        """
+        if format not in ("jsonl", "columns"):
+            raise ValueError(f"不支持的导出格式：{format}")
+        if batch_size < 1:
+            raise ValueError("批次大小至少为 1")
+        if isinstance(fields, Mapping):
+            self.fields = dict(fields)
+        else:
+            unknown = [f for f in fields if f not in EXPORT_FIELDS]
+            if len(unknown):
+                raise ValueError(f"未知的导出字段：{', '.join(unknown)}")
+            self.fields = {f: EXPORT_FIELDS[f] for f in fields}
+
+        self.export_dir = Path(export_dir).resolve()
+        self.format = format
+        self.include = tuple(include) if include is not None else None
+        self.compress = compress
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_secs = rotate_secs
+        self.prefix = prefix
+        self.exported = 0
+        self.dropped = 0
+
+        self._getters = tuple(self.fields.values())
+        self._batch: list[tuple[Any, ...]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._pending: set[Future[None]] = set()
+        self._pool: ThreadPoolExecutor | None = None
+        self._owners: set[Hashable] = set()
+        self._rotate_task: asyncio.Task[None] | None = None
+        self._fp: BinaryIO | None = None
+        self._path: Path | None = None
+        self._opened_ts = 0.0
+        self._file_seq = 0
+
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        # 上次异常退出时未完成的文件，保留完整写入的批次
+        for tmp in self.export_dir.glob(f"{self.prefix}-*.tmp"):
+            self._recover(tmp)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(dir={str(self.export_dir)!r}, format={self.format!r})"
+
+    def _recover(self, tmp: Path) -> None:
+        try:
+            size = _complete_size(tmp, tmp.name.endswith(".gz.tmp"))
+        except OSError as e:
+            logger.warning(f"事件导出文件 {tmp.name} 读取失败，已跳过：{e}")
+            return
+        if size == 0:
+            tmp.unlink()
+            return
+        with open(tmp, "r+b") as fp:
+            fp.truncate(size)
+        os.replace(tmp, tmp.with_suffix(""))
+
+    def acquire(self, owner: Hashable) -> None:
+        """登记一个使用此导出器的对象，由服务端管理器在开始运行时调用"""
+        self._owners.add(owner)
+        if self.rotate_secs is not None and (self._rotate_task is None or self._rotate_task.done()):
+            self._rotate_task = asyncio.create_task(self._rotate_worker(self.rotate_secs))
+
+    async def release(self, owner: Hashable) -> None:
+        """注销一个使用此导出器的对象，最后一个对象注销后关闭导出器"""
+        if owner not in self._owners:
+            return
+        self._owners.discard(owner)
+        if not len(self._owners):
+            await self.close()
+
+    async def _rotate_worker(self, interval: float) -> None:
+        # 没有新事件时也要按时轮转，让已经写入的事件尽快出现在最终文件中
+        while True:
+            await asyncio.sleep(min(interval, 60))
+            if self._fp is not None:
+                await asyncio.wrap_future(self._submit(self._rotate_if_due))
+
+    def _submit(self, func: Callable[..., None], *args: Any) -> Future[None]:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(1, thread_name_prefix="mcpm-export")
+        return self._pool.submit(func, *args)
+
+    def on_event(self, event: ev.Event) -> None:
+        """记录一个事件，由事件工厂在事件创建后调用"""
+        if self.include is not None and not isinstance(event, self.include):
+            return
+        try:
+            row = tuple(get(event) for get in self._getters)
+        except Exception as e:
+            self.dropped += 1
+            logger.warning(f"事件 {event} 的导出字段计算失败：{e}")
+            return
+
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._flush
+            )
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not len(self._batch):
+            return
+        batch, self._batch = self._batch, []
+        fut = self._submit(self._write, batch)
+        self._pending.add(fut)
+        fut.add_done_callback(self._on_written)
+
+    def _on_written(self, fut: Future[None]) -> None:
+        self._pending.discard(fut)
+        if (e := fut.exception()) is not None:
+            logger.error(f"事件导出写入失败：{e}")
+
+    async def flush(self) -> None:
+        """立即写入当前批次，并等待所有批次写入完成"""
+        self._flush()
+        if len(self._pending):
+            await asyncio.wait([asyncio.wrap_future(f) for f in tuple(self._pending)])
+
+    async def close(self) -> None:
+        """写入剩余的事件并关闭当前文件，之后仍有事件时会写入新的文件"""
+        if self._rotate_task is not None:
+            self._rotate_task.cancel()
+            self._rotate_task = None
+        await self.flush()
+        if self._pool is not None:
+            await asyncio.wrap_future(self._pool.submit(self._close_file))
+            self._pool.shutdown()
+            self._pool = None
+
+    def _encode(self, batch: list[tuple[Any, ...]]) -> bytes:
+        names = tuple(self.fields)
+        if self.format == "jsonl":
+            lines = (
+                json.dumps(dict(zip(names, row)), ensure_ascii=False, default=str) for row in batch
+            )
+            return ("\n".join(lines) + "\n").encode("utf-8")
+        columns = {name: list(col) for name, col in zip(names, zip(*batch))}
+        return (json.dumps(columns, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+    def _write(self, batch: list[tuple[Any, ...]]) -> None:
+        data = self._encode(batch)
+        if self.compress:
+            data = gzip.compress(data)
+        self._rotate_if_due()
+        if self._fp is None:
+            self._open_file()
+        assert self._fp is not None
+        self._fp.write(data)
+        self._fp.flush()
+        self.exported += len(batch)
+
+    def _rotate_if_due(self) -> None:
+        if self._fp is None:
+            return
+        if self._fp.tell() >= self.rotate_bytes or (
+            self.rotate_secs is not None and time.time() - self._opened_ts >= self.rotate_secs
+        ):
+            self._close_file()
+
+    def _open_file(self) -> None:
+        self._opened_ts = time.time()
+        self._file_seq += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._opened_ts))
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        name = f"{self.prefix}-{stamp}-{os.getpid()}-{self._file_seq}{suffix}"
+        self._path = self.export_dir / name
+        self._fp = open(self._path.with_name(f"{name}.tmp"), "wb")
+
+    def _close_file(self) -> None:
+        if self._fp is None or self._path is None:
+            return
+        self._fp.close()
+        os.replace(self._path.with_name(f"{self._path.name}.tmp"), self._path)
+        self._fp = self._path = None
@@ -1,21 +1,72 @@
-from melobot.handle import FlowDecorator
+from functools import wraps
+
+from melobot.adapter import Event as RootEvent
+from melobot.handle import FlowDecorator, get_event
 from melobot.session import DefaultRule, Rule
 from melobot.typ import SyncOrAsyncCallable
 from melobot.utils.check import Checker, checker_join
 from melobot.utils.match import Matcher
 from melobot.utils.parse import Parser
-from typing_extensions import Callable, Literal, Sequence
+from typing_extensions import Any, Callable, Hashable, Literal, Sequence
 
 from .adapter.event import (
+    ChatFloodEvent,
     Event,
+    GcPauseEvent,
+    LagEvent,
     LogEvent,
     MessageEvent,
     PlayerEvent,
+    ProcSampleEvent,
     RconStartedEvent,
     ServerDoneEvent,
     StderrEvent,
     StdoutEvent,
 )
+from .io.manager import ServerManager
+
+
+class _RouteChecker(Checker[RootEvent]):
+    """事件路由键检查器，只用一次集合查找判断事件是否属于某个路由"""
+
+    def __init__(self, route: Hashable) -> None:
+        super().__init__()
+        self.route = route
+
+    async def check(self, event: RootEvent) -> bool:
+        return isinstance(event, Event) and self.route in event.route_keys
+
+
+class _RoutedFlowDecorator(FlowDecorator):
+    """按事件路由键分发的处理流装饰器
+
+    路由键检查排在检查器的最前面，路由键不匹配的事件不会进入用户的检查器、匹配器和解析器。melobot 的分发器
+    仍会为每个处理流创建一次守卫调用，这里只保证这次调用足够廉价。事件来源的服务端管理器设置了调度策略时，
+    没有会话规则的处理流在通过检查、匹配和解析后按策略排队执行，被拒绝的处理流不占用调度位置
+    """
+
+    def __init__(self, route: Hashable, **kwargs: Any) -> None:
+        kwargs["checker"] = checker_join(_RouteChecker(route), kwargs.get("checker"))
+        if kwargs.get("rule") is None:
+            kwargs["decos"] = [_scheduled, *(kwargs.get("decos") or ())]
+        super().__init__(**kwargs)
+        self.route = route
+
+
+def _scheduled(func: Callable[..., Any]) -> Callable[..., Any]:
+    """在事件来源的服务端管理器的调度器中排队执行处理函数"""
+
+    @wraps(func)
+    async def _scheduled_wrapped(*args: Any, **kwargs: Any) -> Any:
+        event = get_event()
+        if isinstance(event, Event):
+            src = ServerManager.__instances__.get(event.server_id)
+            if src is not None and src.scheduler is not None:
+                async with src.scheduler.slot(event):
+                    return await func(*args, **kwargs)
+        return await func(*args, **kwargs)
+
+    return _scheduled_wrapped
 
 
 def on_event(
@@ -26,8 +77,9 @@ def on_event(
     decos: Sequence[Callable[[Callable], Callable]] | None = None,
     rule: Rule[Event] | None = None,
 ) -> FlowDecorator:
-    return FlowDecorator(
-        checker=checker_join(lambda e: isinstance(e, Event), checker),  # type: ignore[arg-type]
+    return _RoutedFlowDecorator(
+        Event,
+        checker=checker,  # type: ignore[arg-type]
         priority=priority,
         block=block,
         temp=temp,
@@ -46,8 +98,9 @@ def on_log(
     decos: Sequence[Callable[[Callable], Callable]] | None = None,
     rule: Rule[Event] | None = None,
 ) -> FlowDecorator:
-    return FlowDecorator(
-        checker=checker_join(lambda e: isinstance(e, LogEvent), checker),  # type: ignore[arg-type]
+    return _RoutedFlowDecorator(
+        LogEvent,
+        checker=checker,  # type: ignore[arg-type]
         matcher=matcher,
         parser=parser,
         priority=priority,
@@ -68,8 +121,9 @@ def on_stdout(
     decos: Sequence[Callable[[Callable], Callable]] | None = None,
     rule: Rule[Event] | None = None,
 ) -> FlowDecorator:
-    return FlowDecorator(
-        checker=checker_join(lambda e: isinstance(e, StdoutEvent), checker),  # type: ignore[arg-type]
+    return _RoutedFlowDecorator(
+        StdoutEvent,
+        checker=checker,  # type: ignore[arg-type]
         matcher=matcher,
         parser=parser,
         priority=priority,
@@ -90,8 +144,9 @@ def on_stderr(
     decos: Sequence[Callable[[Callable], Callable]] | None = None,
     rule: Rule[Event] | None = None,
 ) -> FlowDecorator:
-    return FlowDecorator(
-        checker=checker_join(lambda e: isinstance(e, StderrEvent), checker),  # type: ignore[arg-type]
+    return _RoutedFlowDecorator(
+        StderrEvent,
+        checker=checker,  # type: ignore[arg-type]
         matcher=matcher,
         parser=parser,
         priority=priority,
@@ -112,8 +167,9 @@ def on_message(
     decos: Sequence[Callable[[Callable], Callable]] | None = None,
     legacy_session: bool = False,
 ) -> FlowDecorator:
-    return FlowDecorator(
-        checker=checker_join(lambda e: isinstance(e, MessageEvent), checker),  # type: ignore[arg-type]
+    return _RoutedFlowDecorator(
+        MessageEvent,
+        checker=checker,  # type: ignore[arg-type]
         matcher=matcher,
         parser=parser,
         priority=priority,
@@ -133,8 +189,85 @@ def on_player_operation(
     decos: Sequence[Callable[[Callable], Callable]] | None = None,
     rule: Rule[Event] | None = None,
 ) -> FlowDecorator:
-    return FlowDecorator(
-        checker=checker_join(lambda e: isinstance(e, PlayerEvent) and (type == "all" or e.operation_type == type), checker),  # type: ignore[arg-type]
+    return _RoutedFlowDecorator(
+        PlayerEvent if type == "all" else (PlayerEvent, type),
+        checker=checker,  # type: ignore[arg-type]
+        priority=priority,
+        block=block,
+        temp=temp,
+        decos=decos,
+        rule=rule,  # type: ignore[arg-type]
+    )
+
+
+def on_gc_pause(
+    checker: Checker | None | SyncOrAsyncCallable[[GcPauseEvent], bool] = None,
+    priority: int = 0,
+    block: bool = False,
+    temp: bool = False,
+    decos: Sequence[Callable[[Callable], Callable]] | None = None,
+    rule: Rule[Event] | None = None,
+) -> FlowDecorator:
+    return _RoutedFlowDecorator(
+        GcPauseEvent,
+        checker=checker,  # type: ignore[arg-type]
+        priority=priority,
+        block=block,
+        temp=temp,
+        decos=decos,
+        rule=rule,  # type: ignore[arg-type]
+    )
+
+
+def on_chat_flood(
+    checker: Checker | None | SyncOrAsyncCallable[[ChatFloodEvent], bool] = None,
+    priority: int = 0,
+    block: bool = False,
+    temp: bool = False,
+    decos: Sequence[Callable[[Callable], Callable]] | None = None,
+    rule: Rule[Event] | None = None,
+) -> FlowDecorator:
+    return _RoutedFlowDecorator(
+        ChatFloodEvent,
+        checker=checker,  # type: ignore[arg-type]
+        priority=priority,
+        block=block,
+        temp=temp,
+        decos=decos,
+        rule=rule,  # type: ignore[arg-type]
+    )
+
+
+def on_lag(
+    checker: Checker | None | SyncOrAsyncCallable[[LagEvent], bool] = None,
+    priority: int = 0,
+    block: bool = False,
+    temp: bool = False,
+    decos: Sequence[Callable[[Callable], Callable]] | None = None,
+    rule: Rule[Event] | None = None,
+) -> FlowDecorator:
+    return _RoutedFlowDecorator(
+        LagEvent,
+        checker=checker,  # type: ignore[arg-type]
+        priority=priority,
+        block=block,
+        temp=temp,
+        decos=decos,
+        rule=rule,  # type: ignore[arg-type]
+    )
+
+
+def on_proc_sample(
+    checker: Checker | None | SyncOrAsyncCallable[[ProcSampleEvent], bool] = None,
+    priority: int = 0,
+    block: bool = False,
+    temp: bool = False,
+    decos: Sequence[Callable[[Callable], Callable]] | None = None,
+    rule: Rule[Event] | None = None,
+) -> FlowDecorator:
+    return _RoutedFlowDecorator(
+        ProcSampleEvent,
+        checker=checker,  # type: ignore[arg-type]
         priority=priority,
         block=block,
         temp=temp,
@@ -151,8 +284,9 @@ def on_server_done(
     decos: Sequence[Callable[[Callable], Callable]] | None = None,
     rule: Rule[Event] | None = None,
 ) -> FlowDecorator:
-    return FlowDecorator(
-        checker=checker_join(lambda e: isinstance(e, ServerDoneEvent), checker),  # type: ignore[arg-type]
+    return _RoutedFlowDecorator(
+        ServerDoneEvent,
+        checker=checker,  # type: ignore[arg-type]
         priority=priority,
         block=block,
         temp=temp,
@@ -169,8 +303,9 @@ def on_rcon_started(
     decos: Sequence[Callable[[Callable], Callable]] | None = None,
     rule: Rule[Event] | None = None,
 ) -> FlowDecorator:
-    return FlowDecorator(
-        checker=checker_join(lambda e: isinstance(e, RconStartedEvent), checker),  # type: ignore[arg-type]
+    return _RoutedFlowDecorator(
+        RconStartedEvent,
+        checker=checker,  # type: ignore[arg-type]
         priority=priority,
         block=block,
         temp=temp,
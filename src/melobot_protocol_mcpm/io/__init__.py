@@ -1 +1,12 @@
+from .batch import FunctionBatcher
+from .cache import CmdResponseCache
+from .gclog import GcLogParser, GcPause, gc_log_flag
+from .isolation import CgroupUsage, ResourceIsolation
+from .jvm import HostResources, JvmLaunchProfile, detect_java_version
+from .lifecycle import LifecycleStats, SupervisePolicy
 from .manager import ServerManager
+from .procstat import ProcSample, ProcSampler
+from .ratelimit import DEFAULT_CHAT_RATES, ChatFlood, ChatLimiter, ChatRateLimit
+from .sched import DispatchPolicy, HandleScheduler
+from .startup import BootRecord, StartupOrchestrator
+from .tick import TickHealth, TickPolicy
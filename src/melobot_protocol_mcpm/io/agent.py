@@ -0,0 +1,741 @@
+"""服务端进程的远程代理
+
+代理进程运行在服务端所在的主机上，持有服务端进程的标准输入输出，并在该主机上通过 RCON 执行命令。
+管理器通过 TCP 或 Unix 套接字连接代理，因此一个机器人可以管理分布在多台主机上的服务端。
+此模块只依赖标准库，可以单独复制到服务端主机上以脚本运行::
+
+    python agent.py --listen tcp://0.0.0.0:25590 --token <token> --cwd <dir> [--backlog <n>] -- <cmd> ...
+
+服务端的启动命令只在代理一侧配置，管理器只能请求启动、写入标准输入或结束它。令牌以明文传输，
+跨主机时应当在可信网络中使用，或者通过 SSH 隧道等方式转发。
+
+通信以帧为单位：1 字节类型 + 4 字节大端长度 + 载荷。类型的最高位表示载荷经过 zlib 压缩，
+较大的帧（如回放的输出、批量的输出行）会被压缩：
+
+- ``HELLO``：连接后客户端首先发送 json ``{"token", "session", "resume", "start", "rcon"}``，代理回复
+  ``{"session", "pid", "spawned", "seq"}`` 或 ``{"error"}``。``start`` 为真且服务端未在运行时先启动服务端，
+  会话一致时从 ``resume`` 之后的序号开始回放缓存的输出，否则回放全部缓存，``seq`` 为回放的最后一行的序号
+- ``LINES``：代理批量发送的输出行。载荷为首行序号（8 字节）、行数（2 字节），之后每行依次为
+  来源（1 字节，0 为 stdout，1 为 stderr）、长度（4 字节）和原始字节
+- ``CMD``：客户端发送的命令，载荷为请求 id（4 字节）和命令。客户端无需等待回应即可继续发送
+- ``RESP``：代理按请求 id 回复命令结果，载荷为请求 id（4 字节）、是否成功（1 字节）和回应或错误信息
+- ``STDIN``：客户端写入服务端标准输入的原始字节
+- ``TERMINATE``：客户端请求结束服务端进程
+- ``EXIT``：代理通知服务端进程已退出，载荷为返回码（4 字节）
+- ``KILL``：客户端请求强制杀死服务端进程
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import signal
+import struct
+import time
+import uuid
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Literal, Mapping, Sequence
+
+HELLO, LINES, CMD, RESP, STDIN, TERMINATE, EXIT, KILL = range(1, 9)
+_COMPRESSED = 0x80
+_COMPRESS_MIN = 1024
+_MAX_FRAME = 64 << 20
+# 客户端消费过慢时，积压超过此值就断开它，客户端重连后可以从断点回放
+_MAX_CLIENT_BUFFER = 16 << 20
+_HEADER = struct.Struct(">BI")
+_LINES_HEAD = struct.Struct(">QH")
+_LINE_HEAD = struct.Struct(">BI")
+_REQ = struct.Struct(">I")
+_RESP_HEAD = struct.Struct(">IB")
+_EXIT = struct.Struct(">i")
+_MAX_BATCH = 0xFFFF
+# 原版服务端把超过 4096 字节的 RCON 回应拆成多个包
+_RCON_CHUNK = 4096
+# 客户端保存已处理位置的最小间隔（秒）
+_SAVE_INTERVAL = 1.0
+_MAX_RECONNECT_DELAY = 30.0
+
+
+def encode_frame(ftype: int, payload: bytes = b"") -> bytes:
+    if len(payload) >= _COMPRESS_MIN:
+        packed = zlib.compress(payload, 1)
+        if len(packed) < len(payload):
+            ftype, payload = ftype | _COMPRESSED, packed
+    return _HEADER.pack(ftype, len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    ftype, size = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if size > _MAX_FRAME:
+        raise ValueError(f"帧长度 {size} 超过上限")
+    payload = await reader.readexactly(size)
+    if ftype & _COMPRESSED:
+        return ftype & ~_COMPRESSED, zlib.decompress(payload)
+    return ftype, payload
+
+
+def parse_address(address: str) -> tuple[str, str, int]:
+    """解析代理地址
+
+    :param address: ``tcp://<host>:<port>`` 或 ``unix://<path>``
+    :return: 类型、主机或套接字路径、端口（Unix 套接字为 0）
+    """
+    scheme, sep, rest = address.partition("://")
+    if sep and scheme == "unix" and rest:
+        return "unix", rest, 0
+    if sep and scheme == "tcp":
+        host, _, port = rest.rpartition(":")
+        if host and port.isdigit():
+            return "tcp", host.strip("[]"), int(port)
+    raise ValueError(f"无效的代理地址：{address!r}，应为 tcp://<host>:<port> 或 unix://<path>")
+
+
+def _encode_lines(items: Sequence[tuple[int, int, bytes]]) -> bytes:
+    parts = [_LINES_HEAD.pack(items[0][0], len(items))]
+    for _, from_, data in items:
+        parts.append(_LINE_HEAD.pack(from_, len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+class _Rcon:
+    """代理一侧的 RCON 客户端，连接在首次执行命令时建立，断开后自动重连"""
+
+    def __init__(self, host: str, port: int, password: str, timeout: float) -> None:
+        self.config = (host, port, password, timeout)
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._next_id = 0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _packet(req_id: int, ptype: int, body: str) -> bytes:
+        data = struct.pack("<ii", req_id, ptype) + body.encode("utf-8") + b"\x00\x00"
+        return struct.pack("<i", len(data)) + data
+
+    @staticmethod
+    async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+        (size,) = struct.unpack("<i", await reader.readexactly(4))
+        data = await reader.readexactly(size)
+        (req_id,) = struct.unpack_from("<i", data)
+        return req_id, data[8:-2]
+
+    async def _connect(self) -> None:
+        host, port, password, timeout = self.config
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.write(self._packet(0, 3, password))
+        await writer.drain()
+        req_id, _ = await asyncio.wait_for(self._read_packet(reader), timeout)
+        if req_id == -1:
+            writer.close()
+            raise PermissionError("RCON 密码错误")
+        self._reader, self._writer = reader, writer
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def call(self, cmd: str) -> str:
+        # 本机的 RCON 往返很快，逐条执行即可保证回应与命令对应
+        async with self._lock:
+            if self._writer is None or self._writer.is_closing():
+                await self._connect()
+            try:
+                return await asyncio.wait_for(self._exchange(cmd), self.config[3])
+            except BaseException:
+                # 回应流已经错位，只能重新连接
+                self.close()
+                raise
+
+    async def _exchange(self, cmd: str) -> str:
+        reader, writer = self._reader, self._writer
+        assert reader is not None and writer is not None
+        self._next_id = self._next_id % 0x7FFFFFFF + 1
+        writer.write(self._packet(self._next_id, 2, cmd))
+        await writer.drain()
+        parts: list[bytes] = []
+        while True:
+            read = self._read_packet(reader)
+            try:
+                # 回应恰好是 4096 字节的整数倍时没有更短的结尾包，只能等待片刻
+                req_id, body = await (asyncio.wait_for(read, 0.1) if len(parts) else read)
+            except asyncio.TimeoutError:
+                break
+            if req_id != self._next_id:
+                continue
+            parts.append(body)
+            if len(body) < _RCON_CHUNK:
+                break
+        return b"".join(parts).decode("utf-8", errors="replace")
+
+
+class Agent:
+    def __init__(
+        self,
+        listen: str,
+        token: str,
+        cmd: list[str],
+        cwd: str,
+        backlog: int = 10000,
+        batch_lines: int = 256,
+        batch_delay: float = 0.02,
+        stop_timeout: float = 60,
+    ) -> None:
+        self.listen = listen
+        self.token = token.encode()
+        self.cmd = cmd
+        self.cwd = cwd
+        self.batch_lines = min(batch_lines, _MAX_BATCH)
+        self.batch_delay = batch_delay
+        self.stop_timeout = stop_timeout
+        self.session = uuid.uuid4().hex
+        self.seq = 0
+        self.backlog: deque[tuple[int, int, bytes]] = deque(maxlen=backlog)
+        self.clients: set[asyncio.StreamWriter] = set()
+        self.proc: asyncio.subprocess.Process | None = None
+        self.rcon: _Rcon | None = None
+
+        self._batch: list[tuple[int, int, bytes]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._watch_task: asyncio.Task[None] | None = None
+
+    def running(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    def _broadcast(self, frame: bytes) -> None:
+        for w in tuple(self.clients):
+            if w.is_closing():
+                self.clients.discard(w)
+            elif w.transport.get_write_buffer_size() > _MAX_CLIENT_BUFFER:
+                self.clients.discard(w)
+                w.close()
+            else:
+                w.write(frame)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if len(self._batch):
+            frame = encode_frame(LINES, _encode_lines(self._batch))
+            self._batch = []
+            self._broadcast(frame)
+
+    async def _pump(self, reader: asyncio.StreamReader, from_: int) -> None:
+        loop = asyncio.get_running_loop()
+        while line_b := await reader.readline():
+            self.seq += 1
+            item = (self.seq, from_, line_b.rstrip(b"\r\n"))
+            self.backlog.append(item)
+            self._batch.append(item)
+            # 输出密集时攒满一批立即发送，稀疏时最多延迟 batch_delay
+            if len(self._batch) >= self.batch_lines:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.batch_delay, self._flush)
+
+    async def _spawn(self) -> None:
+        # 新的服务端进程使用新的会话，之前的输出不再回放
+        self.session = uuid.uuid4().hex
+        self.backlog.clear()
+        self.proc = await asyncio.create_subprocess_exec(
+            *self.cmd,
+            cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._watch_task = asyncio.create_task(self._watch(self.proc))
+
+    async def _watch(self, proc: asyncio.subprocess.Process) -> None:
+        pumps = (
+            asyncio.create_task(self._pump(proc.stdout, 0)),  # type: ignore[arg-type]
+            asyncio.create_task(self._pump(proc.stderr, 1)),  # type: ignore[arg-type]
+        )
+        ret = await proc.wait()
+        await asyncio.wait(pumps)
+        self._flush()
+        self._broadcast(encode_frame(EXIT, _EXIT.pack(ret)))
+        if self.rcon is not None:
+            self.rcon.close()
+
+    async def _run_cmd(self, writer: asyncio.StreamWriter, req_id: int, cmd: str) -> None:
+        try:
+            if self.rcon is not None:
+                ret = await self.rcon.call(cmd)
+            elif self.proc is not None and self.running():
+                stdin = self.proc.stdin
+                assert stdin is not None
+                stdin.write(f"{cmd}\n".encode())
+                await stdin.drain()
+                ret = ""
+            else:
+                raise RuntimeError("服务端未在运行")
+            ok = True
+        except Exception as e:
+            ok, ret = False, f"{e.__class__.__name__}: {e}"
+        if not writer.is_closing():
+            writer.write(encode_frame(RESP, _RESP_HEAD.pack(req_id, ok) + ret.encode()))
+
+    def _set_rcon(self, conf: Mapping[str, Any] | None) -> None:
+        if conf is None:
+            return
+        config = (conf["host"], int(conf["port"]), conf["password"], float(conf["timeout"]))
+        if self.rcon is None or self.rcon.config != config:
+            if self.rcon is not None:
+                self.rcon.close()
+            self.rcon = _Rcon(*config)
+
+    async def _serve_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            ftype, payload = await asyncio.wait_for(read_frame(reader), 10)
+            hello = json.loads(payload) if ftype == HELLO else {}
+            if not hmac.compare_digest(str(hello.get("token", "")).encode(), self.token):
+                writer.write(encode_frame(HELLO, json.dumps({"error": "令牌无效"}).encode()))
+                await writer.drain()
+                return
+
+            self._set_rcon(hello.get("rcon"))
+            spawned = False
+            if hello.get("start") and not self.running():
+                await self._spawn()
+                spawned = True
+            resume = hello.get("resume", 0) if hello.get("session") == self.session else 0
+            pid = self.proc.pid if self.proc is not None and self.running() else None
+            writer.write(
+                encode_frame(
+                    HELLO,
+                    json.dumps(
+                        {"session": self.session, "pid": pid, "spawned": spawned, "seq": self.seq}
+                    ).encode(),
+                )
+            )
+            # 先发出未满的批次，回放的内容与之后广播的内容不会重叠
+            self._flush()
+            replay = [item for item in self.backlog if item[0] > resume]
+            for i in range(0, len(replay), self.batch_lines):
+                writer.write(encode_frame(LINES, _encode_lines(replay[i : i + self.batch_lines])))
+            if self.proc is not None and not self.running() and not spawned:
+                writer.write(encode_frame(EXIT, _EXIT.pack(self.proc.returncode or 0)))
+            self.clients.add(writer)
+            await writer.drain()
+
+            while True:
+                ftype, payload = await read_frame(reader)
+                if ftype == CMD:
+                    (req_id,) = _REQ.unpack_from(payload)
+                    cmd = payload[_REQ.size :].decode("utf-8", errors="replace")
+                    asyncio.create_task(self._run_cmd(writer, req_id, cmd))
+                elif ftype == STDIN and self.proc is not None and self.running():
+                    stdin = self.proc.stdin
+                    assert stdin is not None
+                    stdin.write(payload)
+                    await stdin.drain()
+                elif ftype == TERMINATE and self.proc is not None and self.running():
+                    self.proc.terminate()
+                elif ftype == KILL and self.proc is not None and self.running():
+                    self.proc.kill()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        except (ValueError, KeyError, zlib.error, struct.error):
+            # 无法解析的帧，断开客户端
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def _stop_server(self) -> None:
+        if self.proc is None or not self.running():
+            return
+        stdin = self.proc.stdin
+        try:
+            assert stdin is not None
+            stdin.write(b"stop\n")
+            await stdin.drain()
+            await asyncio.wait_for(self.proc.wait(), self.stop_timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            if self.running():
+                self.proc.terminate()
+        if self._watch_task is not None:
+            await self._watch_task
+
+    async def run(self, start: bool = False) -> None:
+        kind, host, port = parse_address(self.listen)
+        if kind == "unix":
+            Path(host).unlink(missing_ok=True)
+            server = await asyncio.start_unix_server(self._serve_client, path=host)
+        else:
+            server = await asyncio.start_server(self._serve_client, host, port)
+        if start:
+            await self._spawn()
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            # 代理被停止时正常关闭服务端
+            await self._stop_server()
+            for w in tuple(self.clients):
+                w.close()
+            if kind == "unix":
+                Path(host).unlink(missing_ok=True)
+
+
+class _AgentStdin:
+    def __init__(self, proc: AgentProcess) -> None:
+        self._proc = proc
+
+    def write(self, data: bytes) -> None:
+        writer = self._proc._writer
+        if writer.is_closing():
+            raise ConnectionError(f"与代理 {self._proc.address} 的连接已断开")
+        writer.write(encode_frame(STDIN, data))
+
+    async def drain(self) -> None:
+        await self._proc._writer.drain()
+
+
+async def _handshake(
+    address: str, hello: Mapping[str, Any], timeout: float
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, dict[str, Any]]:
+    kind, host, port = parse_address(address)
+    if kind == "unix":
+        conn = asyncio.open_unix_connection(host)
+    else:
+        conn = asyncio.open_connection(host, port)
+    reader, writer = await asyncio.wait_for(conn, timeout)
+    try:
+        writer.write(encode_frame(HELLO, json.dumps(hello).encode()))
+        await writer.drain()
+        ftype, payload = await asyncio.wait_for(read_frame(reader), timeout)
+        reply = json.loads(payload)
+    except BaseException:
+        writer.close()
+        raise
+    if ftype != HELLO or "error" in reply:
+        writer.close()
+        raise PermissionError(f"代理 {address} 拒绝连接：{reply.get('error')}")
+    return reader, writer, reply
+
+
+class AgentProcess:
+    """通过远程代理附加的服务端进程
+
+    提供与 :class:`asyncio.subprocess.Process` 相同的常用接口（标准输入输出流、返回码、等待和结束），
+    另外可以通过 :meth:`call` 流水线式地执行命令
+
+    与代理的连接意外断开（包括代理因消费过慢主动断开）时不视为服务端退出，而是以相同的会话重新连接，
+    从已接收的位置继续回放输出。只有收到代理的退出通知，或者原来的会话已不存在时，服务端才视为已退出
+    """
+
+    def __init__(
+        self,
+        address: str,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        session: str,
+        spawned: bool,
+        pid: int | None = None,
+        state_path: Path | None = None,
+        token: str = "",
+        rcon: Mapping[str, Any] | None = None,
+        timeout: float = 10,
+        on_connection: Callable[[bool], None] | None = None,
+    ) -> None:
+        self.address = address
+        self.session = session
+        self.pid = pid
+        self.spawned = spawned
+        self.state_path = state_path
+        self.last_seq = 0
+        # 附加或重新连接时回放的最后一行的序号，不超过此序号的输出是之前的输出
+        self.replay_seq = 0
+        self.reconnects = 0
+        self.returncode: int | None = None
+        self.stdout = asyncio.StreamReader()
+        self.stderr = asyncio.StreamReader()
+        self.stdin = _AgentStdin(self)
+
+        self._reader = reader
+        self._writer = writer
+        self._hello = {"token": token, "rcon": rcon}
+        self._timeout = timeout
+        self._on_connection = on_connection
+        self._calls: dict[int, asyncio.Future[str]] = {}
+        self._next_id = 0
+        # 每个输出流已写入但未被读取、已读取但未被处理的行序号，两者都清空时才能确定处理到的位置
+        self._unread: tuple[deque[int], deque[int]] = (deque(), deque())
+        self._undelivered: tuple[deque[int], deque[int]] = (deque(), deque())
+        self._saved_ts = 0.0
+        self._detached = False
+        self._aborted = asyncio.Event()
+        self._exited = asyncio.Event()
+        self._demux_task = asyncio.create_task(self._demux())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(address={self.address!r}, seq={self.last_seq})"
+
+    @classmethod
+    async def attach(
+        cls,
+        address: str,
+        token: str = "",
+        rcon: Mapping[str, Any] | None = None,
+        state_path: Path | None = None,
+        timeout: float = 10,
+        on_connection: Callable[[bool], None] | None = None,
+    ) -> AgentProcess:
+        """连接到代理，服务端未在运行时请求代理启动它
+
+        :param address: 代理地址，``tcp://<host>:<port>`` 或 ``unix://<path>``
+        :param token: 代理的访问令牌
+        :param rcon: 代理执行命令所用的 RCON 配置（``host``、``port``、``password``、``timeout``），
+            地址是从代理所在主机看到的地址，为空时命令写入服务端标准输入
+        :param state_path: 保存会话和已处理位置的文件，重新附加时从断点回放输出
+        :param timeout: 连接和握手的超时时间
+        :param on_connection: 与代理的连接断开（参数为假）和重新连接成功（参数为真）时的回调
+        :return: 附加的服务端进程
+        """
+        session, resume = "", 0
+        if state_path is not None and state_path.is_file():
+            try:
+                saved = json.loads(state_path.read_text(encoding="utf-8"))
+                session, resume = saved["session"], saved["seq"]
+            except (ValueError, KeyError):
+                pass
+        hello = {"token": token, "session": session, "resume": resume, "start": True, "rcon": rcon}
+        reader, writer, reply = await _handshake(address, hello, timeout)
+
+        proc = cls(
+            address,
+            reader,
+            writer,
+            reply["session"],
+            reply["spawned"],
+            reply["pid"],
+            state_path,
+            token=token,
+            rcon=rcon,
+            timeout=timeout,
+            on_connection=on_connection,
+        )
+        proc.replay_seq = reply.get("seq", 0)
+        if reply["session"] == session:
+            proc.last_seq = resume
+        return proc
+
+    @property
+    def delivered_seq(self) -> int:
+        """已处理完的最后一行的序号，之前的输出都已被处理，重新附加时从此处之后回放"""
+        heads = [q[0] for q in (*self._unread, *self._undelivered) if len(q)]
+        return min(heads) - 1 if len(heads) else self.last_seq
+
+    def take(self, from_: Literal["stdout", "stderr"]) -> int:
+        """标记从输出流中读取了一行
+
+        :param from_: 输出流
+        :return: 此行的序号
+        """
+        i = 0 if from_ == "stdout" else 1
+        seq = self._unread[i].popleft()
+        self._undelivered[i].append(seq)
+        return seq
+
+    def commit(self, from_: Literal["stdout", "stderr"]) -> None:
+        """标记输出流中最早读取的一行已被处理，处理到的位置会定期保存
+
+        :param from_: 输出流
+        """
+        self._undelivered[0 if from_ == "stdout" else 1].popleft()
+        if time.monotonic() - self._saved_ts >= _SAVE_INTERVAL:
+            self._save_state()
+
+    def _save_state(self) -> None:
+        self._saved_ts = time.monotonic()
+        if self.state_path is not None:
+            self.state_path.write_text(
+                json.dumps({"session": self.session, "seq": self.delivered_seq}), encoding="utf-8"
+            )
+
+    async def _demux(self) -> None:
+        try:
+            while True:
+                try:
+                    await self._read_frames()
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError, zlib.error):
+                    pass
+                if self.returncode is not None or not await self._reconnect():
+                    break
+        finally:
+            if self.returncode is None and not self._detached:
+                # 无法重新连接到原来的会话，无法得知服务端的真实返回码
+                self.returncode = -1
+            self._writer.close()
+            self.stdout.feed_eof()
+            self.stderr.feed_eof()
+            self._fail_calls()
+            self._save_state()
+            self._exited.set()
+
+    async def _read_frames(self) -> None:
+        while True:
+            ftype, payload = await read_frame(self._reader)
+            if ftype == LINES:
+                first, count = _LINES_HEAD.unpack_from(payload)
+                pos = _LINES_HEAD.size
+                for seq in range(first, first + count):
+                    from_, size = _LINE_HEAD.unpack_from(payload, pos)
+                    pos += _LINE_HEAD.size
+                    stream = self.stdout if from_ == 0 else self.stderr
+                    stream.feed_data(payload[pos : pos + size] + b"\n")
+                    self._unread[from_].append(seq)
+                    pos += size
+                self.last_seq = first + count - 1
+            elif ftype == RESP:
+                req_id, ok = _RESP_HEAD.unpack_from(payload)
+                fut = self._calls.pop(req_id, None)
+                if fut is None or fut.done():
+                    continue
+                text = payload[_RESP_HEAD.size :].decode("utf-8", errors="replace")
+                if ok:
+                    fut.set_result(text)
+                else:
+                    fut.set_exception(RuntimeError(f"代理执行命令失败：{text}"))
+            elif ftype == EXIT:
+                (self.returncode,) = _EXIT.unpack(payload)
+                return
+
+    async def _reconnect(self) -> bool:
+        self._writer.close()
+        self._fail_calls()
+        if self._on_connection is not None:
+            self._on_connection(False)
+
+        delay = 1.0
+        while not self._aborted.is_set():
+            # 已经收到的输出仍在输出流中等待读取，从已接收的位置而不是已处理的位置继续回放
+            hello = {
+                **self._hello,
+                "session": self.session,
+                "resume": self.last_seq,
+                "start": False,
+            }
+            try:
+                reader, writer, reply = await _handshake(self.address, hello, self._timeout)
+            except PermissionError:
+                return False
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                try:
+                    await asyncio.wait_for(self._aborted.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+                continue
+
+            if reply["session"] != self.session or self._aborted.is_set():
+                # 代理已重启或重新启动了服务端，原来的服务端进程已不存在
+                writer.close()
+                return False
+            self._reader, self._writer = reader, writer
+            self.replay_seq = reply.get("seq", 0)
+            self.reconnects += 1
+            if self._on_connection is not None:
+                self._on_connection(True)
+            return True
+        return False
+
+    def _fail_calls(self) -> None:
+        for fut in self._calls.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError(f"与代理 {self.address} 的连接已断开"))
+        self._calls.clear()
+
+    def call(self, cmd: str) -> asyncio.Future[str]:
+        """发送一条命令，不等待之前命令的回应
+
+        :param cmd: 命令字符串
+        :return: 命令回应的 future，代理未配置 RCON 时回应为空字符串
+        """
+        fut: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        if self._exited.is_set() or self._writer.is_closing():
+            fut.set_exception(ConnectionError(f"与代理 {self.address} 的连接已断开"))
+            return fut
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        self._calls[self._next_id] = fut
+        self._writer.write(encode_frame(CMD, _REQ.pack(self._next_id) + cmd.encode("utf-8")))
+        return fut
+
+    async def wait(self) -> int:
+        await self._exited.wait()
+        return self.returncode if self.returncode is not None else -1
+
+    def terminate(self) -> None:
+        if not self._writer.is_closing():
+            self._writer.write(encode_frame(TERMINATE))
+        else:
+            # 连接断开时无法结束远程的服务端进程，停止重连，服务端视为已退出
+            self._aborted.set()
+
+    def kill(self) -> None:
+        if not self._writer.is_closing():
+            self._writer.write(encode_frame(KILL))
+        else:
+            self._aborted.set()
+
+    async def detach(self) -> None:
+        """断开与代理的连接并记录已处理的位置，服务端进程继续运行"""
+        self._detached = True
+        self._aborted.set()
+        self._save_state()
+        self._writer.close()
+        self._demux_task.cancel()
+        try:
+            await self._demux_task
+        except asyncio.CancelledError:
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Minecraft 服务端的远程代理")
+    parser.add_argument("--listen", required=True, help="tcp://<host>:<port> 或 unix://<path>")
+    parser.add_argument("--token", default=os.environ.get("MCPM_AGENT_TOKEN", ""))
+    parser.add_argument("--cwd", default=os.getcwd())
+    parser.add_argument("--backlog", type=int, default=10000)
+    parser.add_argument("--batch-lines", type=int, default=256)
+    parser.add_argument("--batch-delay", type=float, default=0.02)
+    parser.add_argument("--stop-timeout", type=float, default=60)
+    parser.add_argument("--start", action="store_true", help="代理启动后立即启动服务端")
+    parser.add_argument("cmd", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not len(cmd):
+        parser.error("需要在 -- 之后给出服务端的启动命令")
+    if not args.token and args.listen.startswith("tcp://"):
+        parser.error("监听 TCP 地址时必须设置访问令牌（--token 或环境变量 MCPM_AGENT_TOKEN）")
+    agent = Agent(
+        args.listen,
+        args.token,
+        cmd,
+        args.cwd,
+        backlog=args.backlog,
+        batch_lines=args.batch_lines,
+        batch_delay=args.batch_delay,
+        stop_timeout=args.stop_timeout,
+    )
+    asyncio.run(agent.run(start=args.start))
+
+
+if __name__ == "__main__":
+    main()
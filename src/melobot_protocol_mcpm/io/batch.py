@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+from typing_extensions import Sequence
+
+
+class FunctionBatcher:
+    """把命令序列写为托管数据包中的函数文件
+
+    函数以内容哈希命名，相同的命令序列复用同一个函数，只有新写入函数时才需要重载数据包。
+    写入新函数时会顺带清理最久未使用或过旧的函数文件，它们随这次重载一起从服务端移除
+    """
+
+    def __init__(
+        self,
+        pack_dir: Path,
+        namespace: str = "mcpm",
+        pack_format: int = 48,
+        max_functions: int | None = 512,
+        max_age: float | None = 7 * 86400,
+    ) -> None:
+        """初始化一个函数批处理器
+
+        :param pack_dir: 托管数据包的目录（位于存档的 datapacks 目录下）
+        :param namespace: 函数的命名空间
+        :param pack_format: 数据包格式版本，>= 45（1.21）时函数目录为 ``function``，否则为 ``functions``
+        :param max_functions: 保留的函数文件数量上限，为空时不限制
+        :param max_age: 函数文件最近一次使用后保留的时间（秒），为空时不限制
+        """
+        if max_functions is not None and max_functions < 1:
+            raise ValueError("保留的函数文件数量上限至少为 1")
+        self.pack_dir = pack_dir
+        self.namespace = namespace
+        self.pack_format = pack_format
+        self.max_functions = max_functions
+        self.max_age = max_age
+        self.func_dir = (
+            pack_dir / "data" / namespace / ("function" if pack_format >= 45 else "functions")
+        )
+        # 函数名到最近一次使用的时间，按使用顺序排列。之前写入的函数以文件修改时间作为使用时间
+        self.used: dict[str, float] = {}
+        if self.func_dir.is_dir():
+            files = sorted((p.stat().st_mtime, p.stem) for p in self.func_dir.glob("*.mcfunction"))
+            self.used = {name: mtime for mtime, name in files}
+        # 服务端启动时会加载已存在的函数，因此视为已加载
+        self.loaded: set[str] = set(self.used)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(pack={str(self.pack_dir)!r}, loaded={len(self.loaded)})"
+
+    def _ensure_pack(self) -> None:
+        self.func_dir.mkdir(parents=True, exist_ok=True)
+        meta = self.pack_dir / "pack.mcmeta"
+        if not meta.is_file():
+            meta.write_text(
+                json.dumps(
+                    {
+                        "pack": {
+                            "pack_format": self.pack_format,
+                            "description": "Managed by melobot-protocol-mcpm",
+                        }
+                    }
+                ),
+                encoding="utf-8",
+            )
+
+    def prepare(self, cmds: Sequence[str]) -> tuple[str, bool]:
+        """写入命令序列对应的函数文件（会阻塞，应在线程中调用）
+
+        :param cmds: 命令序列
+        :return: 函数的资源位置，以及是否需要重载数据包后才能调用
+        """
+        lines = []
+        for cmd in cmds:
+            cmd = cmd.strip().removeprefix("/")
+            if "\n" in cmd or "\r" in cmd:
+                raise ValueError(f"批处理的命令不能包含换行：{cmd!r}")
+            if cmd:
+                lines.append(cmd)
+        if not len(lines):
+            raise ValueError("批处理的命令序列不能为空")
+
+        content = "\n".join(lines) + "\n"
+        name = f"b_{hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]}"
+        func = f"{self.namespace}:{name}"
+        with self._lock:
+            self.used.pop(name, None)
+            self.used[name] = time.time()
+            if name in self.loaded:
+                return func, False
+
+            self._ensure_pack()
+            path = self.func_dir / f"{name}.mcfunction"
+            if not path.is_file():
+                path.write_text(content, encoding="utf-8")
+            self._prune()
+        return func, True
+
+    def _prune(self) -> None:
+        expired = []
+        if self.max_age is not None:
+            deadline = time.time() - self.max_age
+            expired = [name for name, ts in self.used.items() if ts < deadline]
+        if self.max_functions is not None and len(self.used) - len(expired) > self.max_functions:
+            oldest = iter(self.used)
+            while len(self.used) - len(expired) > self.max_functions:
+                if (name := next(oldest)) not in expired:
+                    expired.append(name)
+
+        for name in expired:
+            del self.used[name]
+            self.loaded.discard(name)
+            (self.func_dir / f"{name}.mcfunction").unlink(missing_ok=True)
+
+    def is_loaded(self, func: str) -> bool:
+        return func.split(":", 1)[1] in self.loaded
+
+    def mark_loaded(self, func: str) -> None:
+        with self._lock:
+            self.loaded.add(func.split(":", 1)[1])
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from typing_extensions import TYPE_CHECKING, Awaitable, Callable, Hashable, Iterable, Mapping
+
+if TYPE_CHECKING:
+    from ..adapter.event import Event
+
+
+DEFAULT_TTLS: dict[str, float] = {
+    "list": 5,
+    "time query": 1,
+    "scoreboard players get": 2,
+    "whitelist list": 30,
+}
+
+DEFAULT_CMD_INVALIDATIONS: dict[str, tuple[str, ...]] = {
+    "whitelist add": ("whitelist list",),
+    "whitelist remove": ("whitelist list",),
+    "whitelist reload": ("whitelist list",),
+    "time set": ("time query",),
+    "time add": ("time query",),
+    "scoreboard players set": ("scoreboard players get",),
+    "scoreboard players add": ("scoreboard players get",),
+    "scoreboard players remove": ("scoreboard players get",),
+    "scoreboard players reset": ("scoreboard players get",),
+    "scoreboard players operation": ("scoreboard players get",),
+    "kick": ("list",),
+}
+
+
+def normalize_cmd(cmd: str) -> str:
+    return " ".join(cmd.split())
+
+
+class _PrefixTable:
+    def __init__(self, mapping: Mapping[str, object]) -> None:
+        self.keys = {normalize_cmd(k): v for k, v in mapping.items()}
+        self.max_words = max((len(k.split(" ")) for k in self.keys), default=0)
+
+    def match(self, cmd: str) -> object | None:
+        words = cmd.split(" ", self.max_words)
+        for i in range(min(len(words), self.max_words), 0, -1):
+            if (val := self.keys.get(" ".join(words[:i]))) is not None:
+                return val
+        return None
+
+
+class CmdResponseCache:
+    """只读命令的回应缓存
+
+    以规范化后的命令字符串为键，按命令前缀设置缓存有效期。并发的相同命令只会真正执行一次，
+    缓存会被相关的事件或写入类命令主动失效
+    """
+
+    def __init__(
+        self,
+        ttls: Mapping[str, float] | None = None,
+        invalidate_on: Mapping[Hashable, Iterable[str]] | None = None,
+        cmd_invalidations: Mapping[str, Iterable[str]] | None = None,
+        max_size: int = 1024,
+    ) -> None:
+        """初始化一个命令回应缓存
+
+        :param ttls: 命令前缀与对应的缓存有效期（秒），不匹配任何前缀的命令不缓存
+        :param invalidate_on: 事件路由键与需要失效的命令前缀，为空时 :class:`.PlayerEvent` 使 ``list`` 失效
+        :param cmd_invalidations: 写入类命令前缀与执行后需要失效的命令前缀
+        :param max_size: 最大缓存条目数
+        """
+        if invalidate_on is None:
+            from ..adapter.event import PlayerEvent
+
+            invalidate_on = {PlayerEvent: ("list",)}
+
+        self._ttls = _PrefixTable(ttls if ttls is not None else DEFAULT_TTLS)
+        self._event_rules = {k: tuple(map(normalize_cmd, v)) for k, v in invalidate_on.items()}
+        self._cmd_rules = _PrefixTable(
+            {
+                k: tuple(map(normalize_cmd, v))
+                for k, v in (
+                    cmd_invalidations
+                    if cmd_invalidations is not None
+                    else DEFAULT_CMD_INVALIDATIONS
+                ).items()
+            }
+        )
+        self.max_size = max_size
+
+        self._entries: dict[str, tuple[float, str]] = {}
+        self._inflight: dict[str, asyncio.Task[str]] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(size={len(self._entries)}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+    def get_ttl(self, cmd: str) -> float | None:
+        ttl = self._ttls.match(normalize_cmd(cmd))
+        return ttl if isinstance(ttl, (int, float)) else None
+
+    def invalidate(self, *prefixes: str) -> None:
+        """使以给定前缀开头的缓存失效，不提供前缀时清空所有缓存"""
+        self._epoch += 1
+        if not len(prefixes):
+            self._entries.clear()
+            return
+        for prefix in map(normalize_cmd, prefixes):
+            for key in tuple(self._entries):
+                if key == prefix or key.startswith(f"{prefix} "):
+                    del self._entries[key]
+
+    def on_event(self, event: "Event") -> None:
+        for key in event.route_keys & self._event_rules.keys():
+            self.invalidate(*self._event_rules[key])
+
+    async def fetch(self, cmd: str, send: Callable[[str], Awaitable[str]]) -> str:
+        """获取命令的回应，可缓存时优先使用缓存
+
+        :param cmd: 命令字符串
+        :param send: 实际执行命令的函数
+        :return: 命令的回应
+        """
+        key = normalize_cmd(cmd)
+        ttl = self._ttls.match(key)
+        if not isinstance(ttl, (int, float)):
+            if isinstance(prefixes := self._cmd_rules.match(key), tuple):
+                self.invalidate(*prefixes)
+            return await send(cmd)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        if (task := self._inflight.get(key)) is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            # 命令由缓存持有的任务执行，任何一个等待者被取消都不会影响其他等待者
+            task = self._inflight[key] = asyncio.create_task(self._load(key, cmd, send, ttl))
+            task.add_done_callback(_retrieve_exception)
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, key: str, cmd: str, send: Callable[[str], Awaitable[str]], ttl: float
+    ) -> str:
+        epoch = self._epoch
+        try:
+            ret = await send(cmd)
+        finally:
+            del self._inflight[key]
+        # 执行期间发生过失效，回应可能已经过时，不写入缓存
+        if epoch == self._epoch:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + ttl, ret)
+            if len(self._entries) > self.max_size:
+                del self._entries[next(iter(self._entries))]
+        return ret
+
+
+def _retrieve_exception(task: asyncio.Task[str]) -> None:
+    # 所有等待者都已取消时，避免未获取异常的警告
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import re
+from collections import deque
+from dataclasses import dataclass
+
+_UNITS = {"B": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+_UPTIME = re.compile(r"\[(?P<uptime>\d+\.\d+)s\]")
+_PAUSE = re.compile(
+    r"\[(?P<tags>gc(?:,phases)?)\s*\]\s*GC\((?P<id>\d+)\) (?:[YO]: )?(?P<kind>Pause .+?)"
+    r"(?: (?P<before>\d+)(?P<bu>[BKMG])->(?P<after>\d+)(?P<au>[BKMG])"
+    r"\((?P<total>\d+)(?P<tu>[BKMG])\))? (?P<ms>\d+(?:\.\d+)?)ms\s*$"
+)
+
+
+def gc_log_flag(path: str, filecount: int = 5, filesize: str = "20m") -> str:
+    """生成把 GC 日志写入文件的 JVM 参数（需要 Java 9 及以上）
+
+    :param path: GC 日志文件路径
+    :param filecount: 轮转保留的文件数
+    :param filesize: 单个文件的大小上限
+    :return: ``-Xlog`` 参数
+    """
+    return f"-Xlog:gc*:file={path}:uptime,level,tags:filecount={filecount},filesize={filesize}"
+
+
+@dataclass(frozen=True)
+class GcPause:
+    """一次 GC 停顿
+
+    :ivar int gc_id: GC 编号
+    :ivar str kind: 停顿类型，如 ``Pause Young (Normal) (G1 Evacuation Pause)``
+    :ivar float pause_ms: 停顿时长（毫秒）
+    :ivar float | None uptime: 停顿发生时 JVM 的运行时间（秒），日志没有 uptime 修饰时为空
+    :ivar int | None heap_before: 停顿前的堆用量（字节）
+    :ivar int | None heap_after: 停顿后的堆用量（字节）
+    :ivar int | None heap_total: 堆的大小（字节）
+    """
+
+    gc_id: int
+    kind: str
+    pause_ms: float
+    uptime: float | None = None
+    heap_before: int | None = None
+    heap_after: int | None = None
+    heap_total: int | None = None
+
+
+class GcLogParser:
+    """统一日志格式（``-Xlog:gc*``）的 GC 日志流式解析器
+
+    逐行输入日志，解析出停顿记录，并在最近的若干次停顿上计算统计信息
+    """
+
+    def __init__(self, window: int = 1000) -> None:
+        """初始化一个 GC 日志解析器
+
+        :param window: 用于计算统计信息的最近停顿数
+        """
+        self.pauses: deque[GcPause] = deque(maxlen=window)
+        self.count = 0
+        self.total_pause_ms = 0.0
+        self.alloc_rate: float | None = None
+        self._last_heap: GcPause | None = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(count={self.count}, total_ms={self.total_pause_ms:.1f})"
+
+    def feed(self, line: str) -> GcPause | None:
+        """输入一行日志
+
+        :param line: 日志行
+        :return: 该行是停顿记录时返回解析结果，否则返回空值
+        """
+        if "Pause" not in line or (matched := _PAUSE.search(line)) is None:
+            return None
+
+        uptime_matched = _UPTIME.search(line)
+        heap: tuple[int | None, ...] = (None, None, None)
+        if matched.group("before") is not None:
+            heap = tuple(
+                int(matched.group(k)) * _UNITS[matched.group(u)]
+                for k, u in (("before", "bu"), ("after", "au"), ("total", "tu"))
+            )
+        pause = GcPause(
+            gc_id=int(matched.group("id")),
+            kind=matched.group("kind"),
+            pause_ms=float(matched.group("ms")),
+            uptime=float(uptime_matched.group("uptime")) if uptime_matched is not None else None,
+            heap_before=heap[0],
+            heap_after=heap[1],
+            heap_total=heap[2],
+        )
+
+        self.count += 1
+        self.total_pause_ms += pause.pause_ms
+        self.pauses.append(pause)
+        if pause.heap_before is not None and pause.uptime is not None:
+            # 分配速率：两次停顿之间堆用量的增长（上次停顿后 -> 本次停顿前）
+            last = self._last_heap
+            if last is not None and last.uptime is not None and pause.uptime > last.uptime:
+                grown = pause.heap_before - (last.heap_after or 0)
+                if grown >= 0:
+                    self.alloc_rate = grown / (pause.uptime - last.uptime)
+            self._last_heap = pause
+        return pause
+
+    def reset(self) -> None:
+        """JVM 重启后调用，之前的堆用量不再用于计算分配速率"""
+        self._last_heap = None
+
+    def stats(self) -> dict[str, float]:
+        """最近停顿的统计信息
+
+        :return: 指标名到值的映射，没有停顿记录时只有累计值
+        """
+        ret: dict[str, float] = {"count": self.count, "total_pause_ms": self.total_pause_ms}
+        if not len(self.pauses):
+            return ret
+
+        durations = sorted(p.pause_ms for p in self.pauses)
+        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            ret[f"pause_{name}_ms"] = durations[min(int(q * len(durations)), len(durations) - 1)]
+        ret["pause_max_ms"] = durations[-1]
+        ret["pause_avg_ms"] = sum(durations) / len(durations)
+        if self.alloc_rate is not None:
+            ret["alloc_bytes_per_sec"] = self.alloc_rate
+        if self._last_heap is not None:
+            ret["heap_after_bytes"] = float(self._last_heap.heap_after or 0)
+            ret["heap_total_bytes"] = float(self._last_heap.heap_total or 0)
+        return ret
@@ -0,0 +1,364 @@
+"""服务端进程的本地托管进程
+
+托管进程持有服务端进程的标准输入输出，并通过 Unix 套接字提供给管理器，
+因此管理器（机器人）重启时服务端进程可以继续运行。此模块只依赖标准库，可直接以脚本运行::
+
+    python holder.py --socket <path> --cwd <dir> [--backlog <n>] [--encoding <enc>] -- <cmd> ...
+
+套接字上的每一行都是一个 json 对象：
+
+- 连接后客户端首先发送 ``{"session": ..., "resume": ...}``，托管进程回复
+  ``{"session": ..., "pid": ..., "seq": ...}``，会话一致时从 ``resume`` 之后的序号开始回放缓存的输出，
+  否则回放全部缓存，``seq`` 为回放的最后一行的序号
+- 托管进程发送 ``{"seq": ..., "from": "stdout" | "stderr", "line": ...}`` 和
+  ``{"exit": <返回码>}``
+- 客户端发送 ``{"stdin": ...}`` 写入服务端标准输入，``{"terminate": true}`` 结束服务端进程，
+  ``{"kill": true}`` 强制杀死服务端进程
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Callable, Literal, Mapping
+
+# 客户端保存已处理位置的最小间隔（秒）
+_SAVE_INTERVAL = 1.0
+
+
+class Holder:
+    def __init__(
+        self, sock_path: Path, cmd: list[str], cwd: str, backlog: int, encoding: str
+    ) -> None:
+        self.sock_path = sock_path
+        self.cmd = cmd
+        self.cwd = cwd
+        self.encoding = encoding
+        self.session = uuid.uuid4().hex
+        self.seq = 0
+        self.backlog: deque[tuple[int, bytes]] = deque(maxlen=backlog)
+        self.clients: set[asyncio.StreamWriter] = set()
+        self.proc: asyncio.subprocess.Process
+
+    def _broadcast(self, msg: bytes) -> None:
+        for w in tuple(self.clients):
+            if w.is_closing():
+                self.clients.discard(w)
+            else:
+                w.write(msg)
+
+    async def _pump(self, reader: asyncio.StreamReader, from_: str) -> None:
+        while line_b := await reader.readline():
+            self.seq += 1
+            line = line_b.decode(self.encoding, errors="replace").rstrip("\r\n")
+            msg = (
+                json.dumps({"seq": self.seq, "from": from_, "line": line}, ensure_ascii=False)
+                + "\n"
+            ).encode()
+            self.backlog.append((self.seq, msg))
+            self._broadcast(msg)
+
+    async def _serve_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+            resume = hello.get("resume", 0) if hello.get("session") == self.session else 0
+            writer.write(
+                (
+                    json.dumps({"session": self.session, "pid": self.proc.pid, "seq": self.seq})
+                    + "\n"
+                ).encode()
+            )
+            for seq, msg in self.backlog:
+                if seq > resume:
+                    writer.write(msg)
+            self.clients.add(writer)
+            await writer.drain()
+
+            while line_b := await reader.readline():
+                req = json.loads(line_b)
+                stdin = self.proc.stdin
+                if "stdin" in req and stdin is not None:
+                    stdin.write(f"{req['stdin']}\n".encode(self.encoding))
+                    await stdin.drain()
+                elif req.get("terminate") and self.proc.returncode is None:
+                    self.proc.terminate()
+                elif req.get("kill") and self.proc.returncode is None:
+                    self.proc.kill()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def run(self) -> int:
+        self.proc = await asyncio.create_subprocess_exec(
+            *self.cmd,
+            cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        pumps = (
+            asyncio.create_task(self._pump(self.proc.stdout, "stdout")),  # type: ignore[arg-type]
+            asyncio.create_task(self._pump(self.proc.stderr, "stderr")),  # type: ignore[arg-type]
+        )
+        self.sock_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._serve_client, path=str(self.sock_path))
+        try:
+            ret = await self.proc.wait()
+            await asyncio.wait(pumps)
+            self._broadcast((json.dumps({"exit": ret}) + "\n").encode())
+            for w in tuple(self.clients):
+                try:
+                    await w.drain()
+                except ConnectionError:
+                    pass
+            return ret
+        finally:
+            server.close()
+            self.sock_path.unlink(missing_ok=True)
+
+
+class _HolderStdin:
+    def __init__(self, writer: asyncio.StreamWriter, encoding: str) -> None:
+        self._writer = writer
+        self._encoding = encoding
+
+    def write(self, data: bytes) -> None:
+        for line in data.decode(self._encoding).splitlines():
+            self._writer.write((json.dumps({"stdin": line}, ensure_ascii=False) + "\n").encode())
+
+    async def drain(self) -> None:
+        await self._writer.drain()
+
+
+class HolderProcess:
+    """通过托管进程附加的服务端进程
+
+    提供与 :class:`asyncio.subprocess.Process` 相同的常用接口（标准输入输出流、返回码、等待和结束）
+    """
+
+    def __init__(
+        self,
+        sock_path: Path,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        session: str,
+        spawned: bool,
+        encoding: str,
+        pid: int | None = None,
+    ) -> None:
+        self.sock_path = sock_path
+        self.session = session
+        self.pid = pid
+        self.spawned = spawned
+        self.last_seq = 0
+        # 附加时回放的最后一行的序号，不超过此序号的输出是服务端之前的输出
+        self.replay_seq = 0
+        self.returncode: int | None = None
+        self.stdout = asyncio.StreamReader()
+        self.stderr = asyncio.StreamReader()
+        self.stdin = _HolderStdin(writer, encoding)
+
+        self._reader = reader
+        self._writer = writer
+        self._encoding = encoding
+        # 每个输出流已写入但未被读取、已读取但未被处理的行序号，两者都清空时才能确定处理到的位置
+        self._unread: tuple[deque[int], deque[int]] = (deque(), deque())
+        self._undelivered: tuple[deque[int], deque[int]] = (deque(), deque())
+        self._saved_ts = 0.0
+        self._exited = asyncio.Event()
+        self._demux_task = asyncio.create_task(self._demux())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(socket={str(self.sock_path)!r}, seq={self.last_seq})"
+
+    @staticmethod
+    def _seq_path(sock_path: Path) -> Path:
+        return sock_path.with_name(f"{sock_path.name}.seq")
+
+    @classmethod
+    async def attach(
+        cls,
+        sock_path: Path,
+        cmd: list[str],
+        cwd: str,
+        env: Mapping[str, str] | None = None,
+        backlog: int = 10000,
+        encoding: str = "utf-8",
+        timeout: float = 10,
+        wrap_cmd: Callable[[list[str]], list[str]] | None = None,
+    ) -> HolderProcess:
+        """连接到托管进程，托管进程不存在时先启动它
+
+        :param sock_path: 托管进程的套接字路径
+        :param cmd: 托管进程不存在时，用于启动服务端的命令
+        :param cwd: 服务端的工作目录
+        :param env: 服务端的环境变量
+        :param backlog: 托管进程缓存的输出行数
+        :param encoding: 服务端输入输出的编码
+        :param timeout: 等待托管进程就绪的超时时间
+        :param wrap_cmd: 包装托管进程启动命令的函数，如 :meth:`.ResourceIsolation.wrap`，服务端进程会继承其效果
+        :return: 附加的服务端进程
+        """
+        spawned = False
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(sock_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            spawned = True
+            holder_cmd = [
+                sys.executable,
+                __file__,
+                "--socket",
+                str(sock_path),
+                "--cwd",
+                cwd,
+                "--backlog",
+                str(backlog),
+                "--encoding",
+                encoding,
+                "--",
+                *cmd,
+            ]
+            popen = subprocess.Popen(
+                wrap_cmd(holder_cmd) if wrap_cmd is not None else holder_cmd,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            deadline = time.monotonic() + timeout
+            while True:
+                await asyncio.sleep(0.05)
+                try:
+                    reader, writer = await asyncio.open_unix_connection(str(sock_path))
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    if popen.poll() is not None:
+                        raise RuntimeError(f"托管进程启动失败，返回码：{popen.returncode}")
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"等待托管进程 {sock_path} 就绪超时") from None
+
+        seq_path = cls._seq_path(sock_path)
+        session, resume = "", 0
+        if seq_path.is_file():
+            try:
+                saved = json.loads(seq_path.read_text(encoding="utf-8"))
+                session, resume = saved["session"], saved["seq"]
+            except (ValueError, KeyError):
+                pass
+        writer.write((json.dumps({"session": session, "resume": resume}) + "\n").encode())
+        await writer.drain()
+        hello = json.loads(await reader.readline())
+        proc = cls(sock_path, reader, writer, hello["session"], spawned, encoding, hello.get("pid"))
+        proc.replay_seq = hello.get("seq", 0)
+        if hello["session"] == session:
+            proc.last_seq = resume
+        return proc
+
+    @property
+    def delivered_seq(self) -> int:
+        """已处理完的最后一行的序号，之前的输出都已被处理，重新附加时从此处之后回放"""
+        heads = [q[0] for q in (*self._unread, *self._undelivered) if len(q)]
+        return min(heads) - 1 if len(heads) else self.last_seq
+
+    def take(self, from_: Literal["stdout", "stderr"]) -> int:
+        """标记从输出流中读取了一行
+
+        :param from_: 输出流
+        :return: 此行的序号
+        """
+        i = 0 if from_ == "stdout" else 1
+        seq = self._unread[i].popleft()
+        self._undelivered[i].append(seq)
+        return seq
+
+    def commit(self, from_: Literal["stdout", "stderr"]) -> None:
+        """标记输出流中最早读取的一行已被处理，处理到的位置会定期保存
+
+        :param from_: 输出流
+        """
+        self._undelivered[0 if from_ == "stdout" else 1].popleft()
+        if time.monotonic() - self._saved_ts >= _SAVE_INTERVAL:
+            self._save_seq()
+
+    def _save_seq(self) -> None:
+        self._saved_ts = time.monotonic()
+        self._seq_path(self.sock_path).write_text(
+            json.dumps({"session": self.session, "seq": self.delivered_seq}), encoding="utf-8"
+        )
+
+    async def _demux(self) -> None:
+        try:
+            while line_b := await self._reader.readline():
+                msg = json.loads(line_b)
+                if "exit" in msg:
+                    self.returncode = msg["exit"]
+                    break
+                self.last_seq = msg["seq"]
+                if msg["from"] == "stdout":
+                    self.stdout.feed_data(f"{msg['line']}\n".encode(self._encoding))
+                    self._unread[0].append(msg["seq"])
+                else:
+                    self.stderr.feed_data(f"{msg['line']}\n".encode(self._encoding))
+                    self._unread[1].append(msg["seq"])
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if self.returncode is None and not self._writer.is_closing():
+                # 托管进程意外断开，无法得知服务端的真实返回码
+                self.returncode = -1
+            self.stdout.feed_eof()
+            self.stderr.feed_eof()
+            self._save_seq()
+            self._exited.set()
+
+    async def wait(self) -> int:
+        await self._exited.wait()
+        return self.returncode if self.returncode is not None else -1
+
+    def terminate(self) -> None:
+        if not self._writer.is_closing():
+            self._writer.write(b'{"terminate": true}\n')
+
+    def kill(self) -> None:
+        if not self._writer.is_closing():
+            self._writer.write(b'{"kill": true}\n')
+
+    async def detach(self) -> None:
+        """断开与托管进程的连接并记录已处理的位置，服务端进程继续运行"""
+        self._save_seq()
+        self._writer.close()
+        self._demux_task.cancel()
+        try:
+            await self._demux_task
+        except asyncio.CancelledError:
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket", required=True)
+    parser.add_argument("--cwd", default=os.getcwd())
+    parser.add_argument("--backlog", type=int, default=10000)
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("cmd", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    holder = Holder(Path(args.socket), cmd, args.cwd, args.backlog, args.encoding)
+    raise SystemExit(asyncio.run(holder.run()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""服务端进程的资源隔离
+
+此模块也可以作为脚本运行，在新的单线程进程中应用隔离设置后 ``exec`` 给定的命令::
+
+    python isolation.py --config <json> -- <cmd> ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import json
+import os
+import platform
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from typing_extensions import Collection, Literal
+
+_IOPRIO_SET_NR = {"x86_64": 251, "aarch64": 30, "i386": 289, "i686": 289, "armv7l": 314}
+_IOPRIO_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_WHO_PROCESS = 1
+_CPU_PERIOD = 100000
+
+
+@dataclass(frozen=True)
+class CgroupUsage:
+    """cgroup 的资源使用量
+
+    :ivar int cpu_usec: 累计 CPU 时间（微秒）
+    :ivar int memory_current: 当前内存用量（字节）
+    :ivar int | None memory_peak: 内存用量峰值（字节），内核不支持时为空
+    :ivar int io_read_bytes: 累计读取的字节数
+    :ivar int io_write_bytes: 累计写入的字节数
+    """
+
+    cpu_usec: int
+    memory_current: int
+    memory_peak: int | None
+    io_read_bytes: int
+    io_write_bytes: int
+
+
+@dataclass(kw_only=True)
+class ResourceIsolation:
+    """服务端进程的资源隔离设置（仅 Linux）
+
+    启动服务端时，命令经 :meth:`wrap` 包装：先启动一个单线程的 Python 进程应用设置，再 ``exec`` 服务端，
+    服务端的所有线程（以及托管进程模式下的托管进程）都会继承。机器人进程是多线程的，不能在 ``fork`` 之后、
+    ``exec`` 之前的子进程中应用设置。在机器人进程中直接调用 :meth:`apply`，可以把机器人自身隔离到其他 CPU 上
+
+    :ivar Collection[int] | None cpus: 绑定的 CPU 编号
+    :ivar int | None nice: 进程优先级（-20 ~ 19）
+    :ivar str | None io_class: I/O 调度类型
+    :ivar int io_level: I/O 优先级（0 ~ 7，越小越优先），``idle`` 类型时忽略
+    :ivar str | None cgroup: cgroup v2 路径（相对于 :attr:`cgroup_root`），如 ``mcpm.slice/survival``
+    :ivar int | None memory_max: cgroup 的内存上限（字节）
+    :ivar int | None memory_high: cgroup 的内存节流阈值（字节）
+    :ivar float | None cpu_max: cgroup 的 CPU 上限（核数）
+    :ivar str cgroup_root: cgroup v2 的挂载点
+    """
+
+    cpus: Collection[int] | None = None
+    nice: int | None = None
+    io_class: Literal["realtime", "best-effort", "idle"] | None = None
+    io_level: int = 4
+    cgroup: str | None = None
+    memory_max: int | None = None
+    memory_high: int | None = None
+    cpu_max: float | None = None
+    cgroup_root: str = "/sys/fs/cgroup"
+
+    @property
+    def cgroup_path(self) -> Path | None:
+        if self.cgroup is None:
+            return None
+        return Path(self.cgroup_root, self.cgroup.strip("/"))
+
+    def prepare(self) -> None:
+        """创建 cgroup 并写入资源限制，在启动服务端进程前调用（会阻塞）"""
+        path = self.cgroup_path
+        if path is None:
+            return
+        try:
+            self._make_cgroup(path)
+            limits = {
+                "memory.max": self.memory_max,
+                "memory.high": self.memory_high,
+                "cpu.max": (
+                    f"{int(self.cpu_max * _CPU_PERIOD)} {_CPU_PERIOD}"
+                    if self.cpu_max is not None
+                    else None
+                ),
+            }
+            for name, val in limits.items():
+                if val is not None:
+                    (path / name).write_text(str(val), encoding="utf-8")
+        except OSError as e:
+            raise RuntimeError(f"配置 cgroup {path} 失败（需要对应子树的写权限）：{e}") from e
+
+    def _make_cgroup(self, path: Path) -> None:
+        root = Path(self.cgroup_root)
+        if not (root / "cgroup.controllers").is_file():
+            raise RuntimeError(f"{root} 不是 cgroup v2 的挂载点")
+        # 逐级创建，并在父级启用子级需要的控制器
+        needed = {"cpu", "memory", "io"}
+        cur = root
+        for part in path.relative_to(root).parts:
+            enabled = set((cur / "cgroup.subtree_control").read_text(encoding="utf-8").split())
+            available = set((cur / "cgroup.controllers").read_text(encoding="utf-8").split())
+            if missing := (needed & available) - enabled:
+                (cur / "cgroup.subtree_control").write_text(
+                    " ".join(f"+{c}" for c in sorted(missing)), encoding="utf-8"
+                )
+            cur = cur / part
+            cur.mkdir(exist_ok=True)
+
+    def wrap(self, cmd: list[str]) -> list[str]:
+        """包装启动命令，使命令在应用隔离设置后的进程中执行
+
+        :param cmd: 原始命令
+        :return: 包装后的命令，进程 id 与原始命令的进程相同
+        """
+        conf = asdict(self)
+        if self.cpus is not None:
+            conf["cpus"] = sorted(self.cpus)
+        return [sys.executable, __file__, "--config", json.dumps(conf), "--", *cmd]
+
+    def apply(self, pid: int = 0) -> None:
+        """对进程应用隔离设置，默认为当前进程
+
+        Linux 上 CPU 亲和性、优先级和 I/O 优先级都是按线程设置的，以进程 id 设置时只作用于主线程。
+        因此逐个设置进程当前的所有线程，之后由这些线程创建的线程和子进程会继承设置。
+        与此同时创建的线程可能被遗漏，启动服务端时应使用 :meth:`wrap`
+
+        :param pid: 进程 id，为 0 时为当前进程
+        """
+        pid = pid or os.getpid()
+        if (path := self.cgroup_path) is not None:
+            # 写入 cgroup.procs 会移动进程的所有线程
+            (path / "cgroup.procs").write_text(str(pid), encoding="utf-8")
+        if self.cpus is None and self.nice is None and self.io_class is None:
+            return
+        for tid in _thread_ids(pid):
+            try:
+                if self.cpus is not None:
+                    os.sched_setaffinity(tid, self.cpus)
+                if self.nice is not None:
+                    os.setpriority(os.PRIO_PROCESS, tid, self.nice)
+                if self.io_class is not None:
+                    self._set_ioprio(tid)
+            except ProcessLookupError:
+                # 线程已经退出
+                pass
+
+    def _set_ioprio(self, pid: int) -> None:
+        nr = _IOPRIO_SET_NR.get(platform.machine())
+        if nr is None:
+            raise RuntimeError(f"不支持在 {platform.machine()} 平台设置 I/O 优先级")
+        level = 0 if self.io_class == "idle" else self.io_level
+        prio = (_IOPRIO_CLASSES[self.io_class] << _IOPRIO_CLASS_SHIFT) | level  # type: ignore[index]
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.syscall(nr, _IOPRIO_WHO_PROCESS, pid, prio) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def usage(self) -> CgroupUsage | None:
+        """读取 cgroup 的资源使用量，未使用 cgroup 时返回空值"""
+        path = self.cgroup_path
+        if path is None or not path.is_dir():
+            return None
+
+        cpu_usec = 0
+        for line in (path / "cpu.stat").read_text(encoding="utf-8").splitlines():
+            key, _, val = line.partition(" ")
+            if key == "usage_usec":
+                cpu_usec = int(val)
+                break
+
+        rbytes = wbytes = 0
+        io_stat = path / "io.stat"
+        if io_stat.is_file():
+            for line in io_stat.read_text(encoding="utf-8").splitlines():
+                for item in line.split()[1:]:
+                    key, _, val = item.partition("=")
+                    if key == "rbytes":
+                        rbytes += int(val)
+                    elif key == "wbytes":
+                        wbytes += int(val)
+
+        peak = path / "memory.peak"
+        return CgroupUsage(
+            cpu_usec=cpu_usec,
+            memory_current=int((path / "memory.current").read_text(encoding="utf-8")),
+            memory_peak=int(peak.read_text(encoding="utf-8")) if peak.is_file() else None,
+            io_read_bytes=rbytes,
+            io_write_bytes=wbytes,
+        )
+
+
+def _thread_ids(pid: int) -> list[int]:
+    try:
+        return [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        return [pid]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", required=True)
+    parser.add_argument("cmd", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not len(cmd):
+        parser.error("需要在 -- 之后给出要执行的命令")
+    try:
+        ResourceIsolation(**json.loads(args.config)).apply()
+    except (OSError, RuntimeError) as e:
+        raise SystemExit(f"应用资源隔离设置失败：{e}") from e
+    os.execvp(cmd[0], cmd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from typing_extensions import Literal, Sequence
+
+_MIB = 1024 * 1024
+_JAVA_VERSION = re.compile(r'version "(?P<major>\d+)(?:\.(?P<minor>\d+))?[^"]*"')
+_XX_FLAG = re.compile(r"-XX:[+-]?(?P<name>\w+)")
+# 各 GC 选择参数可用的 Java 版本范围（含两端），上限为空表示仍受支持
+_COLLECTORS: dict[str, tuple[int, int | None]] = {
+    "UseSerialGC": (8, None),
+    "UseParallelGC": (8, None),
+    "UseG1GC": (8, None),
+    "UseShenandoahGC": (12, None),
+    "UseZGC": (11, None),
+    "UseEpsilonGC": (11, None),
+}
+# 与 Java 版本相关的其他 GC 参数
+_GC_FLAGS: dict[str, tuple[int, int | None]] = {
+    "ZGenerational": (21, 23),
+    "UseTransparentHugePages": (8, None),
+}
+
+
+@dataclass(frozen=True)
+class HostResources:
+    """主机资源
+
+    :ivar int cpu_count: 当前进程可用的 CPU 数量
+    :ivar int mem_total: 物理内存总量（字节），无法读取时为 0
+    :ivar int mem_available: 可用内存（字节），无法读取时为 0
+    :ivar int hugepages: 预留的大页数量
+    :ivar int hugepage_size: 大页的大小（字节）
+    :ivar bool thp: 透明大页是否可用（``always`` 或 ``madvise``）
+    """
+
+    cpu_count: int
+    mem_total: int
+    mem_available: int
+    hugepages: int = 0
+    hugepage_size: int = 2 * _MIB
+    thp: bool = False
+
+    @classmethod
+    def probe(cls, proc: str | Path = "/proc") -> HostResources:
+        """从 ``/proc`` 读取主机资源
+
+        非 Linux 平台或读取不到 ``meminfo`` 时只获取 CPU 数量，内存信息为 0，此时需要在
+        :class:`JvmLaunchProfile` 中指定堆内存大小
+
+        :param proc: procfs 的挂载点
+        :return: 主机资源
+        """
+        if hasattr(os, "sched_getaffinity"):
+            cpu_count = len(os.sched_getaffinity(0))
+        else:
+            cpu_count = os.cpu_count() or 1
+
+        meminfo: dict[str, int] = {}
+        meminfo_path = Path(proc, "meminfo")
+        if sys.platform.startswith("linux") and meminfo_path.is_file():
+            for line in meminfo_path.read_text(encoding="utf-8").splitlines():
+                key, _, val = line.partition(":")
+                parts = val.split()
+                if len(parts):
+                    meminfo[key] = int(parts[0]) * (1024 if parts[1:] == ["kB"] else 1)
+
+        thp = False
+        thp_path = Path("/sys/kernel/mm/transparent_hugepage/enabled")
+        if sys.platform.startswith("linux") and thp_path.is_file():
+            thp_mode = thp_path.read_text(encoding="utf-8")
+            thp = "[always]" in thp_mode or "[madvise]" in thp_mode
+
+        return cls(
+            cpu_count=cpu_count,
+            mem_total=meminfo.get("MemTotal", 0),
+            mem_available=meminfo.get("MemAvailable", meminfo.get("MemFree", 0)),
+            hugepages=meminfo.get("HugePages_Total", 0),
+            hugepage_size=meminfo.get("Hugepagesize", 2 * _MIB),
+            thp=thp,
+        )
+
+    def gc_threads(self) -> tuple[int, int]:
+        """按 JVM 自身的规则，由 CPU 数量计算并行和并发 GC 线程数"""
+        cpus = max(self.cpu_count, 1)
+        parallel = cpus if cpus <= 8 else 8 + (cpus - 8) * 5 // 8
+        return parallel, max(1, (parallel + 2) // 4)
+
+
+def detect_java_version(java_exec: str | Path) -> int:
+    """运行 ``java -version`` 获取 Java 的主版本号（Java 8 及以前的 ``1.x`` 返回 ``x``）
+
+    :param java_exec: java 可执行文件路径
+    :return: 主版本号
+    """
+    out = subprocess.run(
+        [str(java_exec), "-version"], capture_output=True, text=True, timeout=30
+    ).stderr
+    matched = _JAVA_VERSION.search(out)
+    if matched is None:
+        raise RuntimeError(f"无法识别的 Java 版本输出：{out.strip()!r}")
+    major = int(matched.group("major"))
+    if major == 1 and matched.group("minor") is not None:
+        return int(matched.group("minor"))
+    return major
+
+
+@dataclass(kw_only=True)
+class JvmLaunchProfile:
+    """由主机资源计算 JVM 启动参数的配置
+
+    - ``g1``：按 Aikar 推荐参数调优的 G1，适合 Paper 等常规服务端
+    - ``zgc``：低停顿的 ZGC，适合大堆内存（需要 Java 11 及以上）
+    - ``small``：小堆内存，CPU 不多于 2 个时使用串行 GC，否则使用较保守的 G1
+
+    :ivar str kind: 配置类型
+    :ivar int | None heap_mb: 堆内存大小（MiB），为空时按 :attr:`mem_fraction` 和 :attr:`servers` 由
+        可用内存计算。无法读取主机内存信息（如非 Linux 平台）时必须指定
+    :ivar float mem_fraction: 未指定堆大小时，所有服务端的堆内存合计占可用内存的比例
+    :ivar int servers: 本机上按此配置计算堆大小的服务端数量，未指定堆大小时可用内存由它们平分
+    :ivar bool | None large_pages: 是否启用大页，为空时根据主机是否预留大页或启用透明大页自动决定
+    :ivar Sequence[str] extra: 追加在计算结果之后的参数
+    """
+
+    kind: Literal["g1", "zgc", "small"] = "g1"
+    heap_mb: int | None = None
+    mem_fraction: float = 0.5
+    servers: int = 1
+    large_pages: bool | None = None
+    extra: Sequence[str] = field(default_factory=tuple)
+
+    def __post_init__(self) -> None:
+        if self.servers < 1:
+            raise ValueError("共享主机内存的服务端数量至少为 1")
+        if not 0 < self.mem_fraction <= 1:
+            raise ValueError(f"堆内存占可用内存的比例应在 (0, 1] 内，当前为 {self.mem_fraction}")
+
+    def heap_size(self, host: HostResources) -> int:
+        """计算堆内存大小（MiB）"""
+        total_mb = host.mem_total // _MIB
+        if self.heap_mb is not None:
+            heap = self.heap_mb
+            if total_mb and heap > total_mb:
+                raise ValueError(f"堆内存 {heap}MiB 超过了主机物理内存 {total_mb}MiB")
+            return heap
+
+        avail_mb = host.mem_available // _MIB
+        if not avail_mb:
+            raise ValueError("无法读取主机内存信息，请为 JVM 启动配置指定堆内存大小 heap_mb")
+        # 按 256 MiB 取整，避免出现零碎的堆大小
+        heap = int(avail_mb * self.mem_fraction) // self.servers // 256 * 256
+        if heap < 512:
+            raise ValueError(
+                f"可用内存 {avail_mb}MiB 按比例 {self.mem_fraction} 由 {self.servers} 个服务端平分后"
+                "不足 512MiB，请减少服务端数量或指定堆内存大小"
+            )
+        if self.kind == "small":
+            heap = min(heap, 2048)
+        return heap
+
+    def args(self, java_version: int, host: HostResources | None = None) -> list[str]:
+        """生成 JVM 参数列表
+
+        :param java_version: 目标 Java 的主版本号
+        :param host: 主机资源，为空时从 ``/proc`` 读取
+        :return: JVM 参数列表
+        """
+        if host is None:
+            host = HostResources.probe()
+        heap = self.heap_size(host)
+        parallel, concurrent = host.gc_threads()
+        ret = [f"-Xms{heap}M", f"-Xmx{heap}M"]
+
+        match self.kind:
+            case "g1":
+                ret.extend(self._g1_args(heap))
+            case "zgc":
+                ret.extend(self._zgc_args(java_version))
+            case "small":
+                if host.cpu_count <= 2:
+                    ret.append("-XX:+UseSerialGC")
+                else:
+                    ret.extend(("-XX:+UseG1GC", "-XX:MaxGCPauseMillis=200"))
+            case _:
+                raise ValueError(f"不支持的 JVM 启动配置：{self.kind}")
+
+        if self.kind != "small" or host.cpu_count > 2:
+            ret.extend((f"-XX:ParallelGCThreads={parallel}", f"-XX:ConcGCThreads={concurrent}"))
+
+        reserved = host.hugepages * host.hugepage_size >= heap * _MIB
+        if self.large_pages if self.large_pages is not None else reserved or host.thp:
+            # 预留的大页不足以容纳整个堆时，改用透明大页，避免 JVM 申请大页失败
+            if reserved or not host.thp:
+                ret.append("-XX:+UseLargePages")
+            else:
+                ret.append("-XX:+UseTransparentHugePages")
+
+        ret.extend(("-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem"))
+        ret.extend(self.extra)
+        self._check_flags(ret, java_version)
+        return ret
+
+    @staticmethod
+    def _check_flags(args: Sequence[str], java_version: int) -> None:
+        if java_version < 8:
+            raise ValueError(f"JVM 启动配置需要 Java 8 及以上，当前为 Java {java_version}")
+        collectors: list[str] = []
+        for arg in args:
+            matched = _XX_FLAG.match(arg)
+            if matched is None:
+                continue
+            name = matched.group("name")
+            if name in _COLLECTORS and not arg.startswith("-XX:-"):
+                collectors.append(name)
+            lo, hi = _COLLECTORS.get(name) or _GC_FLAGS.get(name) or (0, None)
+            if java_version < lo or (hi is not None and java_version > hi):
+                ver = f"Java {lo} 及以上" if hi is None else f"Java {lo} 至 {hi}"
+                raise ValueError(f"JVM 参数 {arg} 需要 {ver}，当前为 Java {java_version}")
+        if len(set(collectors)) > 1:
+            raise ValueError(f"JVM 参数中同时选择了多个 GC：{', '.join(dict.fromkeys(collectors))}")
+
+    def _g1_args(self, heap: int) -> list[str]:
+        big = heap > 12 * 1024
+        return [
+            "-XX:+UseG1GC",
+            "-XX:+ParallelRefProcEnabled",
+            "-XX:MaxGCPauseMillis=200",
+            "-XX:+UnlockExperimentalVMOptions",
+            "-XX:+AlwaysPreTouch",
+            f"-XX:G1NewSizePercent={40 if big else 30}",
+            f"-XX:G1MaxNewSizePercent={50 if big else 40}",
+            f"-XX:G1HeapRegionSize={16 if big else 8}M",
+            f"-XX:G1ReservePercent={15 if big else 20}",
+            "-XX:G1HeapWastePercent=5",
+            "-XX:G1MixedGCCountTarget=4",
+            f"-XX:InitiatingHeapOccupancyPercent={20 if big else 15}",
+            "-XX:G1MixedGCLiveThresholdPercent=90",
+            "-XX:G1RSetUpdatingPauseTimePercent=5",
+            "-XX:SurvivorRatio=32",
+            "-XX:MaxTenuringThreshold=1",
+        ]
+
+    def _zgc_args(self, java_version: int) -> list[str]:
+        if java_version < 11:
+            raise ValueError(f"ZGC 需要 Java 11 及以上，当前为 Java {java_version}")
+        ret = []
+        if java_version < 15:
+            # 15 之前 ZGC 仍是实验特性
+            ret.append("-XX:+UnlockExperimentalVMOptions")
+        ret.extend(("-XX:+UseZGC", "-XX:+AlwaysPreTouch"))
+        if java_version in (21, 22):
+            # 23 起分代 ZGC 已是默认行为，该参数被废弃
+            ret.append("-XX:+ZGenerational")
+        return ret
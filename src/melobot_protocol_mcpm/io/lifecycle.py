@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from typing_extensions import Sequence
+
+
+@dataclass(kw_only=True)
+class SupervisePolicy:
+    """服务端进程的守护策略
+
+    :ivar bool auto_restart: 进程非预期退出后是否自动重启
+    :ivar float backoff_base: 连续崩溃时的退避基数（秒），第一次崩溃立即重启，之后按指数增长
+    :ivar float backoff_max: 退避时间上限（秒）
+    :ivar float stable_after: 进程持续运行超过此时间（秒）后，连续崩溃计数清零
+    :ivar int | None max_crash_restarts: 连续崩溃后最多自动重启的次数，为空时不限制
+    :ivar float | None restart_interval: 定时重启的间隔（秒），为空时不定时重启。计划重启时启动失败的，
+        与崩溃一样按退避时间重试
+    :ivar Sequence[float] restart_warnings: 计划重启前的预警时间点（距离重启的秒数）
+    :ivar str restart_message: 预警广播的消息模板，``{seconds}`` 为距离重启的秒数
+    """
+
+    auto_restart: bool = True
+    backoff_base: float = 5
+    backoff_max: float = 300
+    stable_after: float = 600
+    max_crash_restarts: int | None = None
+    restart_interval: float | None = None
+    restart_warnings: Sequence[float] = (300, 60, 10)
+    restart_message: str = "服务器将在 {seconds} 秒后重启"
+
+    def backoff(self, consecutive_crashes: int) -> float:
+        if consecutive_crashes <= 1:
+            return 0
+        return min(self.backoff_base * 2.0 ** (consecutive_crashes - 2), self.backoff_max)
+
+
+@dataclass(kw_only=True)
+class LifecycleStats:
+    """服务端进程的生命周期统计
+
+    :ivar int starts: 启动次数
+    :ivar int crashes: 非预期退出的次数
+    :ivar int consecutive_crashes: 当前连续崩溃的次数
+    :ivar int restarts: 计划内重启的次数
+    :ivar int | None last_exit_code: 最近一次退出的返回码
+    :ivar float | None last_boot_secs: 最近一次从启动进程到服务端就绪的耗时（秒）
+    :ivar float | None last_downtime_secs: 最近一次从进程退出到服务端重新就绪的耗时（秒）
+    :ivar float last_backoff_secs: 最近一次崩溃重启前的退避时间（秒）
+    """
+
+    starts: int = 0
+    crashes: int = 0
+    consecutive_crashes: int = 0
+    restarts: int = 0
+    last_exit_code: int | None = None
+    last_boot_secs: float | None = None
+    last_downtime_secs: float | None = None
+    last_backoff_secs: float = 0
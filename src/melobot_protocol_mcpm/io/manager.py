@@ -4,6 +4,7 @@ import asyncio
 import asyncio.subprocess
 import subprocess
 import sys
+import time
 from pathlib import Path
 from weakref import WeakValueDictionary
 
@@ -11,13 +12,48 @@ from aiomcrcon import Client as RconClient
 from melobot import get_bot
 from melobot.io import AbstractIOSource
 from melobot.log import LogLevel, logger
-from typing_extensions import Any, ClassVar, Literal, Mapping, Sequence, cast
+from typing_extensions import TYPE_CHECKING, Any, ClassVar, Literal, Mapping, Sequence, cast
 
 from ..const import PROTOCOL_IDENTIFIER
 from ..utils.cmd import CmdFactory
 from ..utils.common import truncate
-from ..utils.pattern import RegexPatternGroup
-from .model import CmdEchoData, CmdOutputData, EchoPacket, InPacket, LogInputData, OutPacket
+from ..utils.pattern import RegexPatternGroup, detect_pattern_group, fullmatch, search
+from ..utils.presence import PlayerPresence
+from ..utils.text import Color, JsonText, JsonTextTemplate
+from .agent import AgentProcess
+from .batch import FunctionBatcher
+from .cache import CmdResponseCache
+from .gclog import GcLogParser, gc_log_flag
+from .holder import HolderProcess
+from .isolation import CgroupUsage, ResourceIsolation
+from .jvm import JvmLaunchProfile, detect_java_version
+from .lifecycle import LifecycleStats, SupervisePolicy
+from .model import (
+    ChatFloodInputData,
+    CmdEchoData,
+    CmdOutputData,
+    EchoPacket,
+    GcPauseInputData,
+    InPacket,
+    InputData,
+    LagInputData,
+    LogInputData,
+    OutPacket,
+    ProcSampleInputData,
+)
+from .procstat import ProcSampler
+from .ratelimit import ChatFlood, ChatLimiter, ChatRateLimit
+from .sched import DispatchPolicy, HandleScheduler
+from .tail import LogTailer
+from .tick import TickHealth, TickPolicy
+
+if TYPE_CHECKING:
+    from ..adapter.action import BatchCmdAction
+    from ..adapter.export import EventExporter
+    from .startup import StartupOrchestrator
+
+# 结束服务端进程后等待其退出的时间，超时后强制杀死
+_KILL_TIMEOUT = 10
 
 
 class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
@@ -32,6 +68,7 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
         java_exec: str | Path | None = None,
         jar_path: str | Path | None = None,
         jvm_flags: str | Sequence[str] = "",
+        jvm_profile: JvmLaunchProfile | None = None,
         postfix_args: str | Sequence[str] = "",
         run_cmd: str | None = None,
         work_path: str | Path | None = None,
@@ -45,9 +82,30 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
         rcon_password: str = "",
         rcon_init_timeout: int = 10,
         rcon_cmd_timeout: int = 5,
+        cmd_cache: CmdResponseCache | None = None,
+        exporter: EventExporter | None = None,
+        tick_policy: TickPolicy | None = None,
+        dispatch: DispatchPolicy | None = None,
+        chat_limit: ChatRateLimit | None = None,
         encoding: str = "utf-8",
         decoding: str = "utf-8",
         to_console: bool = False,
+        supervise: SupervisePolicy | None = None,
+        stop_timeout: float = 60,
+        holder_socket: str | Path | None = None,
+        holder_backlog: int = 10000,
+        agent: str | None = None,
+        agent_token: str = "",
+        isolation: ResourceIsolation | None = None,
+        proc_sample_interval: float | None = None,
+        proc_sample_capacity: int = 720,
+        gc_log: str | Path | None = None,
+        log_source: Literal["pipe", "file"] = "pipe",
+        log_checkpoint: str | Path | None = None,
+        own_process: bool = True,
+        datapack_format: int = 48,
+        batch_reload_timeout: float = 10,
+        batch_max_functions: int | None = 512,
     ) -> None:
         super().__init__()
         self.protocol = PROTOCOL_IDENTIFIER
@@ -56,16 +114,43 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
             raise ValueError(f"已有同名的服务端管理器: {self}")
         self.__instances__[self.name] = self
 
-        if run_cmd is None:
+        if work_path is not None:
+            self.work_path = Path(work_path).resolve(strict=True)
+        else:
+            self.work_path = Path.cwd().resolve()
+        if root_dir is not None:
+            self.root_dir = Path(root_dir).resolve(strict=True)
+        else:
+            self.root_dir = self.work_path
+
+        self.gc_log_path = self.work_path / gc_log if gc_log is not None else None
+        self.java_version: int | None = None
+        # 远程代理模式下，服务端的启动命令在代理一侧配置
+        if agent is None and run_cmd is None and (own_process or java_exec is not None):
             java_exec = Path(cast(str | Path, java_exec)).resolve(strict=True)
             jar_path = Path(cast(str | Path, jar_path)).resolve(strict=True)
             jvm_flags = self._normalize_args(jvm_flags)
+            if jvm_profile is not None:
+                # 手动指定的参数放在最后，可以覆盖配置计算出的参数
+                self.java_version = detect_java_version(java_exec)
+                profile_args = " ".join(jvm_profile.args(self.java_version))
+                jvm_flags = f"{profile_args} {jvm_flags}"
+            if self.gc_log_path is not None:
+                if self.java_version is not None and self.java_version < 9:
+                    raise ValueError(
+                        f"GC 日志输出需要 Java 9 及以上，当前为 Java {self.java_version}"
+                    )
+                jvm_flags = f"{gc_log_flag(str(self.gc_log_path))} {jvm_flags}"
             postfix_args = self._normalize_args(postfix_args)
             self.exec_cmd = f"{java_exec} {jvm_flags} -jar {jar_path} {postfix_args}"
         else:
-            self.exec_cmd = run_cmd
+            self.exec_cmd = run_cmd if run_cmd is not None else ""
 
+        # 未指定正则表达式组时，根据启动日志自动识别服务端类型
         self.pattern_group = pattern_group if pattern_group is not None else RegexPatternGroup()
+        self.detect_pattern = pattern_group is None
+        self.server_version: str | None = None
+        self.server_address: tuple[str, int] | None = None
         self.cmd_factory = cmd_factory if cmd_factory is not None else CmdFactory()
 
         self.rcon_host = rcon_host
@@ -74,30 +159,117 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
         self.rcon_init_timeout = rcon_init_timeout
         self.rcon_cmd_timeout = rcon_cmd_timeout
         self.rcon_client: RconClient
+        self.cmd_cache = cmd_cache
+        self.exporter = exporter
+        self.tick_policy = tick_policy
+        self.tick_health = TickHealth()
+        self.scheduler = HandleScheduler(dispatch) if dispatch is not None else None
+        self.chat_limiter = (
+            ChatLimiter(chat_limit, self._report_chat_flood) if chat_limit is not None else None
+        )
         self.encoding = encoding
         self.decoding = decoding
         self.to_console = to_console
 
-        if work_path is not None:
-            self.work_path = Path(work_path).resolve(strict=True)
-        else:
-            self.work_path = Path.cwd().resolve()
-        if root_dir is not None:
-            self.root_dir = Path(root_dir).resolve(strict=True)
-        else:
-            self.root_dir = self.work_path
         self.env = env
         self.extra_exec_args = extra_exec_args if extra_exec_args is not None else {}
+        if holder_socket is not None and sys.platform == "win32":
+            raise ValueError("Windows 平台不支持托管进程附加模式")
+        self.holder_socket = Path(holder_socket).resolve() if holder_socket is not None else None
+        self.holder_backlog = holder_backlog
+        if agent is not None and (
+            holder_socket is not None
+            or isolation is not None
+            or proc_sample_interval is not None
+            or gc_log is not None
+            or log_source == "file"
+            or not own_process
+        ):
+            raise ValueError(
+                "远程代理模式下服务端不在本机运行，不能同时使用托管进程、资源隔离、进程采样、"
+                "GC 日志或日志文件读取"
+            )
+        self.agent = agent
+        self.agent_token = agent_token
+        if isolation is not None and sys.platform != "linux":
+            raise ValueError("资源隔离设置只支持 Linux 平台")
+        self.isolation = isolation
+        self.gc_parser = GcLogParser()
+        self.gc_tailer = (
+            LogTailer(self.gc_log_path.parent, None, filename=self.gc_log_path.name)
+            if self.gc_log_path is not None
+            else None
+        )
+        self.proc_sample_interval = proc_sample_interval
+        self.proc_sampler = (
+            ProcSampler(proc_sample_capacity) if proc_sample_interval is not None else None
+        )
 
-        self.proc: asyncio.subprocess.Process
+        if not own_process and log_source == "pipe":
+            raise ValueError("不持有服务端进程时，只能从日志文件读取服务端输出")
+        self.own_process = own_process
+        self.log_source = log_source
+        self.log_tailer: LogTailer | None = None
+        if log_source == "file":
+            self.log_tailer = LogTailer(
+                self.work_path / "logs",
+                (
+                    Path(log_checkpoint)
+                    if log_checkpoint is not None
+                    else self.work_path / "logs" / f".mcpm-{self.name}.offset"
+                ),
+                encoding=self.decoding,
+            )
+
+        self.batcher = FunctionBatcher(
+            self.world_dir / "datapacks" / "mcpm",
+            pack_format=datapack_format,
+            max_functions=batch_max_functions,
+        )
+        self.batch_reload_timeout = batch_reload_timeout
+
+        self.proc: asyncio.subprocess.Process | HolderProcess | AgentProcess
         self.proc_ret: int | None = None
+        self.presence = PlayerPresence()
+        self.supervise = supervise
+        self.stop_timeout = stop_timeout
+        self.lifecycle = LifecycleStats()
+        self.startup: StartupOrchestrator | None = None
 
         self._lock = asyncio.Lock()
+        # 串行化 open()，避免并发启动时重复取得启动名额
+        self._open_lock = asyncio.Lock()
+        self._batch_lock = asyncio.Lock()
         self._opened = asyncio.Event()
         self._tasks: set[asyncio.Task[None]] = set()
-        self._in_buf: asyncio.Queue[tuple[str, Literal["stdout", "stderr"]]] = asyncio.Queue()
+        # 行内容为空表示被限流拦截的行，只用于按顺序标记已处理
+        self._in_buf: asyncio.Queue[tuple[str | None, Literal["stdout", "stderr"]] | InputData] = (
+            asyncio.Queue()
+        )
         self._out_buf: asyncio.Queue[tuple[str, asyncio.Future[str]]] = asyncio.Queue()
+        self._bulk_buf: asyncio.Queue[tuple[str, asyncio.Future[str]]] = asyncio.Queue()
         self._server_done = asyncio.Event()
+        self._monitor_task: asyncio.Task[None] | None = None
+        self._restart_task: asyncio.Task[None] | None = None
+        self._expect_exit = False
+        self._detach = False
+        self._startup_scan = False
+        self._open_ts = 0.0
+        self._exit_ts: float | None = None
+
+    @property
+    def world_dir(self) -> Path:
+        """存档目录（``server.properties`` 中的 ``level-name``，默认为 ``world``）"""
+        return self.root_dir / self._read_level_name()
+
+    def _read_level_name(self) -> str:
+        props = self.root_dir / "server.properties"
+        if props.is_file():
+            for line in props.read_text(encoding="utf-8", errors="replace").splitlines():
+                key, sep, val = line.partition("=")
+                if sep and key.strip() == "level-name" and val.strip():
+                    return val.strip()
+        return "world"
 
     def _normalize_args(self, args: str | Sequence[str]) -> str:
         if isinstance(args, str):
@@ -105,6 +277,26 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
         return " ".join(args)
 
     async def open(self) -> None:
+        if self._opened.is_set():
+            return
+        async with self._open_lock:
+            if self._opened.is_set():
+                return
+            if self.startup is None:
+                await self._open()
+                return
+
+            await self.startup._acquire(self)
+            try:
+                await self._open()
+            except BaseException:
+                self.startup._settle(self, False)
+                raise
+            if not self._startup_scan:
+                # 附加到已在运行的服务端，或者启动日志已经读完
+                self.startup._settle(self, True)
+
+    async def _open(self) -> None:
         if self._opened.is_set():
             return
 
@@ -113,55 +305,233 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
                 return
 
             self._server_done.clear()
+            self._expect_exit = False
+            # 不持有服务端进程时，服务端应当已经启动完成
+            self._startup_scan = self.own_process
+            self._open_ts = time.monotonic()
 
+            if self.exporter is not None:
+                self.exporter.acquire(self.name)
             if self.rcon_host is None:
                 logger.warning("RCON 功能未启用，mcpm 协议的所有操作都将产生空回应")
             self.rcon_client = RconClient(self.rcon_host, self.rcon_port, self.rcon_password)
-            self._tasks.add(asyncio.create_task(self._proc_stdout_worker()))
-            self._tasks.add(asyncio.create_task(self._proc_stderr_worker()))
+            if self.own_process:
+                self._tasks.add(asyncio.create_task(self._proc_stdout_worker()))
+                self._tasks.add(asyncio.create_task(self._proc_stderr_worker()))
+            if self.log_tailer is not None:
+                self._tasks.add(asyncio.create_task(self._log_file_worker()))
             self._tasks.add(asyncio.create_task(self._proc_input_worker()))
+            if self.tick_policy is not None:
+                self._tasks.add(asyncio.create_task(self._bulk_worker()))
+            if self.own_process and self.proc_sampler is not None:
+                self._tasks.add(asyncio.create_task(self._proc_sample_worker()))
+            if self.gc_tailer is not None:
+                self.gc_parser.reset()
+                self._tasks.add(asyncio.create_task(self._gc_log_worker()))
 
             self.proc_ret = None
-            try:
-                if sys.platform != "win32":
-                    self.proc = await asyncio.create_subprocess_exec(
-                        *self.exec_cmd.split(),
-                        cwd=str(self.work_path),
-                        env=self.env,
-                        stdin=asyncio.subprocess.PIPE,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                        start_new_session=True,
-                        **self.extra_exec_args,
-                    )
-                else:
-                    self.proc = await asyncio.create_subprocess_exec(
-                        *self.exec_cmd.split(),
-                        cwd=str(self.work_path),
-                        env=self.env,
-                        stdin=asyncio.subprocess.PIPE,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                        creationflags=subprocess.DETACHED_PROCESS
-                        | subprocess.CREATE_NEW_PROCESS_GROUP,
-                        **self.extra_exec_args,
-                    )
-                if not all((self.proc.stdin, self.proc.stdout, self.proc.stderr)):
-                    raise RuntimeError(f"创建服务端 {self.name} 进程失败（{self.proc}）")
-            except Exception as e:
-                logger.error(f"Minecraft 服务端 {self.name} 启动失败: {e}")
-                raise
+            if self.own_process:
+                try:
+                    await self._spawn_proc()
+                except BaseException:
+                    # 读写例程都在等待管理器开始运行，启动失败时结束它们，下次启动会重新创建
+                    for task in self._tasks:
+                        task.cancel()
+                    self._tasks = set()
+                    raise
             else:
-                logger.info(f"Minecraft 服务端 {self.name} 已启动")
-                self._tasks.add(asyncio.create_task(self._proc_monitor()))
+                # 不持有服务端进程时，服务端应当已经在运行
+                self._server_done.set()
+
+            if self.supervise is not None and self.supervise.restart_interval is not None:
+                t = self._restart_task
+                if t is None or t.done() or t is asyncio.current_task():
+                    self._restart_task = asyncio.create_task(
+                        self._scheduled_restart(self.supervise.restart_interval)
+                    )
 
             self._opened.set()
             logger.info(f"Minecraft 服务端 {self.name} 的管理器已开始运行")
 
+    async def _spawn_proc(self) -> None:
+        try:
+            wrap_cmd = None
+            if self.isolation is not None:
+                await asyncio.to_thread(self.isolation.prepare)
+                # 机器人进程是多线程的，不能用 preexec_fn 在 fork 后的子进程中应用设置
+                wrap_cmd = self.isolation.wrap
+
+            if self.agent is not None:
+                self.proc = await AgentProcess.attach(
+                    self.agent,
+                    self.agent_token,
+                    rcon=(
+                        {
+                            "host": self.rcon_host,
+                            "port": self.rcon_port,
+                            "password": self.rcon_password,
+                            "timeout": self.rcon_cmd_timeout,
+                        }
+                        if self.rcon_host is not None
+                        else None
+                    ),
+                    state_path=self.work_path / f".mcpm-{self.name}.agent",
+                    timeout=self.rcon_init_timeout,
+                    on_connection=self._report_agent_connection,
+                )
+                if not self.proc.spawned:
+                    self._server_done.set()
+                    self._startup_scan = False
+                    logger.info(
+                        f"已附加到代理上正在运行的 Minecraft 服务端 {self.name}：{self.proc}"
+                    )
+            elif self.holder_socket is not None:
+                self.proc = await HolderProcess.attach(
+                    self.holder_socket,
+                    self.exec_cmd.split(),
+                    str(self.work_path),
+                    env=self.env,
+                    backlog=self.holder_backlog,
+                    encoding=self.decoding,
+                    wrap_cmd=wrap_cmd,
+                )
+                if not self.proc.spawned:
+                    # 附加到已在运行的服务端，不会再有启动完成的日志
+                    self._server_done.set()
+                    self._startup_scan = False
+                    logger.info(f"已附加到正在运行的 Minecraft 服务端 {self.name}：{self.proc}")
+            elif sys.platform != "win32":
+                cmd = self.exec_cmd.split()
+                self.proc = await asyncio.create_subprocess_exec(
+                    *(wrap_cmd(cmd) if wrap_cmd is not None else cmd),
+                    cwd=str(self.work_path),
+                    env=self.env,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                    **self.extra_exec_args,
+                )
+            else:
+                self.proc = await asyncio.create_subprocess_exec(
+                    *self.exec_cmd.split(),
+                    cwd=str(self.work_path),
+                    env=self.env,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    creationflags=subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP,
+                    **self.extra_exec_args,
+                )
+            if not all((self.proc.stdin, self.proc.stdout, self.proc.stderr)):
+                raise RuntimeError(f"创建服务端 {self.name} 进程失败（{self.proc}）")
+        except Exception as e:
+            logger.error(f"Minecraft 服务端 {self.name} 启动失败: {e}")
+            raise
+        else:
+            logger.info(f"Minecraft 服务端 {self.name} 已启动")
+            self.lifecycle.starts += 1
+            self._monitor_task = asyncio.create_task(self._proc_monitor())
+
     def opened(self) -> bool:
         return self._opened.is_set()
 
     async def close(self) -> None:
+        await self._close(detach=self.holder_socket is not None or self.agent is not None)
+
+    async def stop(self) -> None:
+        """停止服务端进程并关闭管理器
+
+        与 :meth:`close` 不同，附加模式下也会停止服务端进程，而不是仅断开与托管进程的连接
+        """
+        await self._close(detach=False)
+
+    async def _close(self, detach: bool) -> None:
+        # 守护例程可能正在崩溃退避中等待重启，此时管理器已经停止运行，也要取消重启
+        self._expect_exit = True
+        current = asyncio.current_task()
+        if self._restart_task is not None and self._restart_task is not current:
+            self._restart_task.cancel()
+            self._restart_task = None
+        if self._monitor_task is not None and self._monitor_task is not current:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        if self._opened.is_set():
+            self._detach = detach
+            await self._shutdown()
+        if self.exporter is not None:
+            await self.exporter.release(self.name)
+
+    async def restart(self) -> None:
+        """平滑重启服务端（先正常停止，再重新启动）"""
+        self._expect_exit = True
+        self._exit_ts = time.monotonic()
+        await self._shutdown()
+        self.lifecycle.restarts += 1
+        await self.open()
+
+    def schedule_restart(
+        self, delay: float, warnings: Sequence[float] | None = None
+    ) -> asyncio.Task[None]:
+        """安排一次计划重启，重启前会向所有玩家广播预警
+
+        :param delay: 距离重启的时间（秒）
+        :param warnings: 预警时间点（距离重启的秒数），为空时使用守护策略中的配置
+        :return: 计划重启的任务，取消此任务即可取消重启
+        """
+        if self._restart_task is not None and not self._restart_task.done():
+            self._restart_task.cancel()
+        self._restart_task = asyncio.create_task(self._scheduled_restart(delay, warnings))
+        return self._restart_task
+
+    async def _scheduled_restart(
+        self, delay: float, warnings: Sequence[float] | None = None
+    ) -> None:
+        policy = self.supervise if self.supervise is not None else SupervisePolicy()
+        if warnings is None:
+            warnings = policy.restart_warnings
+        tpl = JsonTextTemplate(JsonText(policy.restart_message, color=Color.yellow))
+
+        deadline = time.monotonic() + delay
+        for secs in sorted((w for w in warnings if 0 < w <= delay), reverse=True):
+            await asyncio.sleep(max(deadline - secs - time.monotonic(), 0))
+            if self.opened():
+                self._send_cmd_str_nowait(f"tellraw @a {tpl.format(seconds=int(secs))}")
+        await asyncio.sleep(max(deadline - time.monotonic(), 0))
+        logger.info(f"Minecraft 服务端 {self.name} 开始计划重启")
+        try:
+            await self.restart()
+        except Exception as e:
+            logger.error(f"Minecraft 服务端 {self.name} 计划重启失败：{e}")
+            # 关闭管理器时会取消此任务，能走到这里说明服务端仍应运行
+            self._expect_exit = False
+            await self._reopen_with_backoff(policy, "计划重启失败")
+
+    async def _stop_proc(self) -> None:
+        if self.stop_timeout > 0:
+            writer = cast(asyncio.StreamWriter, self.proc.stdin)
+            try:
+                writer.write("stop\n".encode(self.encoding))
+                await writer.drain()
+                await asyncio.wait_for(self.proc.wait(), self.stop_timeout)
+                return
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Minecraft 服务端 {self.name} 在 {self.stop_timeout}s 内未能正常停止，将强制结束"
+                )
+            except (ConnectionError, RuntimeError) as e:
+                logger.warning(f"向 Minecraft 服务端 {self.name} 发送停止命令失败：{e}")
+        if self.proc.returncode is None:
+            self.proc.terminate()
+            try:
+                await asyncio.wait_for(self.proc.wait(), _KILL_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Minecraft 服务端 {self.name} 在 {_KILL_TIMEOUT}s 内未能结束，将强制杀死"
+                )
+                self.proc.kill()
+
+    async def _shutdown(self) -> None:
         if not self._opened.is_set():
             return
 
@@ -170,47 +540,176 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
                 return
 
             self._opened.clear()
-            self.proc.terminate()
-            for t in self._tasks:
-                t.cancel()
-            self.proc_ret = await self.proc.wait()
-            await asyncio.wait(self._tasks)
-            del self.proc
-            logger.info(f"Minecraft 服务端 {self.name} 进程已退出，返回码：{self.proc_ret}")
+            if self.startup is not None:
+                # 启动完成前退出
+                self.startup._settle(self, False)
+            if self._monitor_task is not None and self._monitor_task is not asyncio.current_task():
+                self._monitor_task.cancel()
+                self._monitor_task = None
+            if not self.own_process:
+                for t in self._tasks:
+                    t.cancel()
+                await asyncio.wait(self._tasks)
+            elif self._detach and isinstance(self.proc, (HolderProcess, AgentProcess)):
+                for t in self._tasks:
+                    t.cancel()
+                await self.proc.detach()
+                await asyncio.wait(self._tasks)
+                logger.info(f"已断开与 Minecraft 服务端 {self.name} 的连接，服务端进程继续运行")
+            else:
+                if self.proc.returncode is None:
+                    await self._stop_proc()
+                for t in self._tasks:
+                    t.cancel()
+                self.proc_ret = await self.proc.wait()
+                self.lifecycle.last_exit_code = self.proc_ret
+                await asyncio.wait(self._tasks)
+                logger.info(f"Minecraft 服务端 {self.name} 进程已退出，返回码：{self.proc_ret}")
+            self._detach = False
+            self._tasks = set()
+            if self.own_process:
+                del self.proc
+            if self.log_tailer is not None:
+                self.log_tailer.save()
+                self.log_tailer.reset_pending()
 
             self._in_buf = asyncio.Queue()
             self._out_buf = asyncio.Queue()
+            self._bulk_buf = asyncio.Queue()
+            self.tick_health.overloaded = False
+            self.tick_health.lag_until = 0
+            self.presence.clear()
+            if self.chat_limiter is not None:
+                self.chat_limiter.clear()
             logger.info(f"Minecraft 服务端 {self.name} 的 IO 缓存已清空")
             logger.info(f"Minecraft 服务端 {self.name} 的管理器已停止运行")
 
     async def input(self) -> InPacket:
         await self._opened.wait()
-        in_str, from_ = await self._in_buf.get()
-        if self.to_console:
-            logger.generic_lazy(
-                "%s",
-                lambda: f"服务端 {self.name} 输出: {truncate(in_str)}",
-                level=LogLevel.DEBUG,
+        while True:
+            item = await self._in_buf.get()
+            if isinstance(item, InputData):
+                return InPacket(data=item, server_id=self.name)
+
+            in_str, from_ = item
+            if from_ == "stdout" and self.log_tailer is not None:
+                self.log_tailer.commit()
+            else:
+                self._commit_line(from_)
+            if in_str is None:
+                continue
+            if from_ == "stdout":
+                if self.tick_policy is not None and "Can't keep up!" in in_str:
+                    self._report_lag_line(in_str)
+            if self.to_console:
+                logger.generic_lazy(
+                    "%s",
+                    lambda: f"服务端 {self.name} 输出: {truncate(in_str)}",
+                    level=LogLevel.DEBUG,
+                )
+            return InPacket(
+                data=LogInputData(
+                    content=in_str,
+                    pattern_group=self.pattern_group,
+                    cmd_factory=self.cmd_factory,
+                    from_=from_,
+                ),
+                server_id=self.name,
+            )
+
+    def _take_line(self, from_: Literal["stdout", "stderr"]) -> int | None:
+        if isinstance(self.proc, (HolderProcess, AgentProcess)):
+            return self.proc.take(from_)
+        return None
+
+    def _is_replayed(self, seq: int | None) -> bool:
+        return (
+            seq is not None
+            and isinstance(self.proc, (HolderProcess, AgentProcess))
+            and seq <= self.proc.replay_seq
+        )
+
+    def _commit_line(self, from_: Literal["stdout", "stderr"]) -> None:
+        # 附加模式下记录已处理到的输出位置，重新附加时只回放之后的输出
+        if self.own_process and isinstance(self.proc, (HolderProcess, AgentProcess)):
+            self.proc.commit(from_)
+
+    def _report_agent_connection(self, connected: bool) -> None:
+        if connected:
+            logger.info(f"已重新连接到 Minecraft 服务端 {self.name} 的代理 {self.agent}")
+        else:
+            logger.warning(
+                f"与 Minecraft 服务端 {self.name} 的代理 {self.agent} 的连接已断开，正在重新连接"
             )
-        return InPacket(
-            data=LogInputData(
-                content=in_str,
-                pattern_group=self.pattern_group,
-                cmd_factory=self.cmd_factory,
-                from_=from_,
-            ),
-            server_id=self.name,
+
+    def _allow_chat(self, line: str) -> bool:
+        # 与 MessageEvent 的识别方式一致，匹配结果由 fullmatch 缓存，之后创建事件时不会重复匹配
+        group = self.pattern_group
+        if (line_matched := search(group.line, line)) is None:
+            return True
+        log_content = line_matched.group("content").strip()
+        for pattern in group.msg:
+            if (matched := fullmatch(pattern, log_content)) is not None:
+                name = matched.group("name")
+                if fullmatch(group.player_name, name) is not None:
+                    return cast(ChatLimiter, self.chat_limiter).allow(
+                        name, matched.group("message")
+                    )
+        return True
+
+    def _report_chat_flood(self, flood: ChatFlood) -> None:
+        logger.warning(
+            f"服务端 {self.name} 的玩家 {flood.player} 发言过快，"
+            f"{flood.window_secs:.1f}s 内有 {flood.dropped} 条消息被拦截"
         )
+        self._in_buf.put_nowait(ChatFloodInputData(content=flood))
+
+    def _scan_startup_line(self, line: str) -> None:
+        if self.detect_pattern and (group := detect_pattern_group(line)) is not None:
+            if not isinstance(self.pattern_group, group):
+                self.pattern_group = group()
+                logger.info(
+                    f"Minecraft 服务端 {self.name} 识别为 {group.profile} 服务端，已切换正则表达式组"
+                )
+            self.detect_pattern = False
+
+        if (matched := self.pattern_group.server_version.search(line)) is not None:
+            self.server_version = matched.group("version").strip()
+        elif (matched := self.pattern_group.server_address.search(line)) is not None:
+            self.server_address = (matched.group("ip"), int(matched.group("port")))
+        elif "Done (" in line and self.pattern_group.server_startup_done.search(line) is not None:
+            # 启动完成后不再检查启动日志
+            self._startup_scan = False
+            if self.startup is not None:
+                self.startup._settle(self, True)
+
+    def _put_stdout(self, line: str, seq: int | None = None) -> None:
+        # 在读取时检查启动日志，而不是在适配器的输入循环中：启动编排期间，
+        # 适配器要等所有服务端的 open() 返回后才开始读取输入
+        if self._startup_scan:
+            self._scan_startup_line(line)
+        # 同样在读取时限流：输入循环积压时，一次取出的多行会被当作同一时刻的发言。
+        # 附加时回放的是之前的输出，不参与限流
+        if (
+            self.chat_limiter is not None
+            and not self._is_replayed(seq)
+            and not self._allow_chat(line)
+        ):
+            # 被拦截的行不产生事件，但仍要按顺序经过输入队列，出队时才标记为已处理，
+            # 否则会越过之前还在队列中的行，重启或重新附加后丢失这些行
+            self._in_buf.put_nowait((None, "stdout"))
+            return
+        self._in_buf.put_nowait((line, "stdout"))
 
     async def output(self, packet: OutPacket) -> EchoPacket:
-        from ..adapter.action import create_cmd_str
+        from ..adapter.action import BatchCmdAction, create_cmd_str
 
         await self._opened.wait()
         out_data = packet.data
         out_data = cast(CmdOutputData, out_data)
-        fut: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        if isinstance(out_data.content, BatchCmdAction):
+            return await self._output_batch(packet, out_data.content)
         cmd = await create_cmd_str(out_data.content, self.cmd_factory)
-        self._out_buf.put_nowait((cmd, fut))
         logger.generic_lazy(
             "%s",
             lambda: f"服务端 {self.name} 命令（{packet.id}）: {truncate(cmd)}",
@@ -218,7 +717,10 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
         )
 
         if self.rcon_host is not None:
-            ret = await fut
+            if self.cmd_cache is not None:
+                ret = await self.cmd_cache.fetch(cmd, self._send_cmd_str)
+            else:
+                ret = await self._send_cmd_str(cmd)
             logger.generic_lazy(
                 "%s",
                 lambda: f"服务端 {self.name} 回应（{packet.id}）: {truncate(ret)}",
@@ -226,11 +728,268 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
             )
             return EchoPacket(data=CmdEchoData(content=ret, cmd=cmd))
         else:
+            self._send_cmd_str_nowait(cmd)
             return EchoPacket(data=CmdEchoData(content="", cmd=cmd), noecho=True)
 
+    async def _output_batch(self, packet: OutPacket, action: BatchCmdAction) -> EchoPacket:
+        func, need_reload = await asyncio.to_thread(self.batcher.prepare, action.cmds)
+        cmd = f"function {func}"
+        logger.generic_lazy(
+            "%s",
+            lambda: f"服务端 {self.name} 批量命令（{packet.id}）: {cmd}，共 {len(action.cmds)} 条",
+            level=LogLevel.DEBUG,
+        )
+        async with self._batch_lock:
+            # 等待锁期间，其他批量命令可能已经重载过数据包
+            if need_reload and not self.batcher.is_loaded(func):
+                ret = await self._reload_and_call(cmd)
+                # 没有命令回应时无法确认，重载等待结束后视为已加载
+                if "Unknown function" not in ret:
+                    self.batcher.mark_loaded(func)
+            else:
+                ret = await self._send_cmd_str(cmd)
+        if self.cmd_cache is not None:
+            # 批量命令可能改变任意状态，所有缓存都不再可信
+            self.cmd_cache.invalidate()
+
+        if self.rcon_host is None:
+            return EchoPacket(data=CmdEchoData(content="", cmd=cmd), noecho=True)
+        logger.generic_lazy(
+            "%s",
+            lambda: f"服务端 {self.name} 回应（{packet.id}）: {truncate(ret)}",
+            level=LogLevel.DEBUG,
+        )
+        return EchoPacket(data=CmdEchoData(content=ret, cmd=cmd))
+
+    async def _reload_and_call(self, cmd: str) -> str:
+        await self._send_cmd_str("reload")
+        if self.rcon_host is None:
+            # 没有命令回应，无法得知重载何时完成，只能等待
+            await asyncio.sleep(self.batch_reload_timeout)
+            return await self._send_cmd_str(cmd)
+
+        # 重载在之后的若干刻内完成，完成前调用函数会得到“未知函数”的回应
+        deadline = time.monotonic() + self.batch_reload_timeout
+        interval = 0.05
+        while True:
+            ret = await self._send_cmd_str(cmd)
+            if "Unknown function" not in ret:
+                return ret
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"服务端 {self.name} 在 {self.batch_reload_timeout}s 内未能完成数据包重载，"
+                    f"无法调用函数 {cmd.removeprefix('function ')}"
+                )
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 1)
+
+    def _send_cmd_str_nowait(self, cmd: str) -> asyncio.Future[str]:
+        fut: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        if self.tick_policy is not None and not self.tick_policy.is_priority(cmd):
+            self._bulk_buf.put_nowait((cmd, fut))
+        else:
+            self._out_buf.put_nowait((cmd, fut))
+        return fut
+
+    async def _send_cmd_str(self, cmd: str) -> str:
+        await self._opened.wait()
+        return await self._send_cmd_str_nowait(cmd)
+
+    async def send_cmd(self, cmd: str) -> str:
+        """不经过适配器，直接向服务端发送命令
+
+        :param cmd: 命令字符串
+        :return: 命令的回应，未启用 RCON 时为空字符串
+        """
+        return await self._send_cmd_str(cmd)
+
+    async def resource_usage(self) -> CgroupUsage | None:
+        """读取服务端所在 cgroup 的资源使用量，未配置 cgroup 时返回空值"""
+        if self.isolation is None:
+            return None
+        return await asyncio.to_thread(self.isolation.usage)
+
+    async def sync_presence(self) -> bool:
+        """通过 ``list`` 命令校准在线玩家索引（需要启用 RCON）
+
+        :return: 是否校准成功
+        """
+        if self.rcon_host is None:
+            return False
+        resp = await self._send_cmd_str("list")
+        ok = self.presence.reconcile_list(self.pattern_group.player_list, resp)
+        if not ok:
+            logger.warning(f"服务端 {self.name} 的 list 命令回应无法解析：{truncate(resp)}")
+        return ok
+
+    async def _presence_init(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                # 回应无法解析时重试也不会成功，sync_presence 已经记录了警告。
+                # 限制等待时间，命令迟迟没有回应时也能重试
+                await asyncio.wait_for(
+                    self.sync_presence(), self.rcon_init_timeout + self.rcon_cmd_timeout
+                )
+                return
+            except Exception as e:
+                logger.warning(
+                    f"服务端 {self.name} 的在线玩家索引初始化失败：{e}，将在 {delay:.0f}s 后重试"
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    def _report_lag_line(self, line: str) -> None:
+        matched = self.pattern_group.cant_keep_up.search(line)
+        if matched is None:
+            return
+        behind_ms = int(matched.group("ms"))
+        self.tick_health.report_lag(behind_ms, cast(TickPolicy, self.tick_policy))
+        # 卡顿报告排在对应的日志行之后产生事件
+        self._in_buf.put_nowait(
+            LagInputData(
+                content=f"服务端 {self.name} 落后 {behind_ms}ms（{matched.group('ticks')} 刻）",
+                source="log",
+                lagging=True,
+                mspt=self.tick_health.mspt,
+                behind_ms=behind_ms,
+            )
+        )
+
+    async def _tick_sampler(self) -> None:
+        policy = cast(TickPolicy, self.tick_policy)
+        lagging = self.tick_health.is_lagging()
+        while True:
+            await asyncio.sleep(policy.sample_interval)
+            try:
+                lagging = await self._tick_sample(policy, lagging)
+            except Exception as e:
+                # 单次采样失败不停止采样，之后的采样仍能报告卡顿和恢复
+                logger.warning(f"服务端 {self.name} 的刻耗时采样失败：{e}")
+
+    async def _tick_sample(self, policy: TickPolicy, lagging: bool) -> bool:
+        health = self.tick_health
+        if self.rcon_host is not None:
+            resp = await self._send_cmd_str_nowait(policy.sample_cmd)
+            matched = self.pattern_group.tick_mspt.search(resp)
+            if matched is None:
+                logger.debug(f"服务端 {self.name} 的刻耗时采样回应无法解析：{truncate(resp)}")
+            else:
+                was_overloaded = health.overloaded
+                health.update_sample(float(matched.group("mspt")), policy)
+                # 只在进入卡顿状态时报告一次，卡顿期间的刻耗时可以从 tick_health 读取
+                if health.overloaded and not was_overloaded:
+                    self._in_buf.put_nowait(
+                        LagInputData(
+                            content=f"服务端 {self.name} 平均刻耗时 {health.mspt}ms",
+                            source="sample",
+                            lagging=True,
+                            mspt=health.mspt,
+                        )
+                    )
+
+        # 没有 RCON 时只能依据日志判断卡顿，超过保持时间即视为恢复
+        now_lagging = health.is_lagging()
+        if lagging and not now_lagging:
+            self._in_buf.put_nowait(
+                LagInputData(
+                    content=f"服务端 {self.name} 已从卡顿中恢复",
+                    source="sample" if self.rcon_host is not None else "log",
+                    lagging=False,
+                    mspt=health.mspt,
+                )
+            )
+        return now_lagging
+
+    async def _bulk_worker(self) -> None:
+        policy = cast(TickPolicy, self.tick_policy)
+        while True:
+            cmd, fut = await self._bulk_buf.get()
+            if self.tick_health.is_lagging():
+                self.tick_health.throttled += 1
+            self._out_buf.put_nowait((cmd, fut))
+            # 等待命令执行完才放行下一条，卡顿开始时发送队列中不会积压已放行的命令
+            await asyncio.wait((fut,))
+            if (rate := policy.rate(self.tick_health)) is not None:
+                await asyncio.sleep(1 / rate)
+
+    async def _proc_sample_worker(self) -> None:
+        await self._opened.wait()
+        sampler = cast(ProcSampler, self.proc_sampler)
+        pid = self.proc.pid
+        if pid is None:
+            logger.warning(f"无法获得服务端 {self.name} 的进程 id，不进行进程资源采样")
+            return
+        while True:
+            try:
+                # procfs 的读取不涉及磁盘，直接在事件循环中进行
+                sample = sampler.sample(pid)
+            except ProcessLookupError:
+                break
+            self._in_buf.put_nowait(ProcSampleInputData(content=sample))
+            await asyncio.sleep(cast(float, self.proc_sample_interval))
+
+    async def _gc_log_worker(self) -> None:
+        tailer = cast(LogTailer, self.gc_tailer)
+        try:
+            async for line in tailer.lines():
+                tailer.commit()
+                if (pause := self.gc_parser.feed(line)) is not None:
+                    self._in_buf.put_nowait(GcPauseInputData(content=pause))
+        finally:
+            tailer.reset_pending()
+
     async def _proc_monitor(self) -> None:
         await self.proc.wait()
-        await self.close()
+        if self._expect_exit:
+            return
+
+        self._exit_ts = time.monotonic()
+        ran_secs = self._exit_ts - self._open_ts
+        await self._shutdown()
+        policy = self.supervise
+        if policy is None or not policy.auto_restart:
+            # melobot 只会关闭正在运行的源，不会再调用 close()，在这里写入剩余的导出事件
+            if self.exporter is not None:
+                await self.exporter.release(self.name)
+            return
+
+        stats = self.lifecycle
+        stats.crashes += 1
+        if ran_secs >= policy.stable_after:
+            stats.consecutive_crashes = 0
+        await self._reopen_with_backoff(policy, f"非预期退出（返回码：{self.proc_ret}）")
+
+    async def _reopen_with_backoff(self, policy: SupervisePolicy, reason: str) -> None:
+        stats = self.lifecycle
+        while True:
+            stats.consecutive_crashes += 1
+            if (
+                policy.max_crash_restarts is not None
+                and stats.consecutive_crashes > policy.max_crash_restarts
+            ):
+                logger.error(
+                    f"Minecraft 服务端 {self.name} 已连续崩溃 {stats.consecutive_crashes} 次，"
+                    "放弃自动重启"
+                )
+                if self.exporter is not None:
+                    await self.exporter.release(self.name)
+                return
+
+            stats.last_backoff_secs = policy.backoff(stats.consecutive_crashes)
+            logger.warning(
+                f"Minecraft 服务端 {self.name} {reason}，将在 {stats.last_backoff_secs}s 后自动重启"
+            )
+            await asyncio.sleep(stats.last_backoff_secs)
+            if self._expect_exit:
+                return
+            try:
+                await self.open()
+                return
+            except Exception as e:
+                # 重启失败同样计为一次连续崩溃，按下一次的退避时间重试
+                logger.error(f"Minecraft 服务端 {self.name} 自动重启失败：{e}")
+                reason = "自动重启失败"
 
     async def _proc_stdout_worker(self) -> None:
         await self._opened.wait()
@@ -238,17 +997,36 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
             reader = cast(asyncio.StreamReader, self.proc.stdout)
             while True:
                 line_b = await reader.readline()
+                if not line_b:
+                    break
+                seq = self._take_line("stdout")
+                if self.log_tailer is not None:
+                    # 服务端输出改为从日志文件读取，这里只需要排空管道
+                    self._commit_line("stdout")
+                    continue
                 line = line_b.decode(self.decoding).strip("\n")
-                self._in_buf.put_nowait((line, "stdout"))
+                self._put_stdout(line, seq)
         finally:
             logger.info("服务端 stdout 控制例程已停止")
 
+    async def _log_file_worker(self) -> None:
+        await self._opened.wait()
+        tailer = cast(LogTailer, self.log_tailer)
+        try:
+            async for line in tailer.lines():
+                self._put_stdout(line)
+        finally:
+            logger.info("服务端日志文件读取例程已停止")
+
     async def _proc_stderr_worker(self) -> None:
         await self._opened.wait()
         try:
             reader = cast(asyncio.StreamReader, self.proc.stderr)
             while True:
                 line_b = await reader.readline()
+                if not line_b:
+                    break
+                self._take_line("stderr")
                 line = line_b.decode(self.decoding).strip("\n")
                 self._in_buf.put_nowait((line, "stderr"))
         finally:
@@ -256,47 +1034,97 @@ class ServerManager(AbstractIOSource[InPacket, OutPacket, EchoPacket]):
 
     async def _proc_input_worker(self) -> None:
         await self._opened.wait()
-        writer = cast(asyncio.StreamWriter, self.proc.stdin)
+        writer = cast(asyncio.StreamWriter, self.proc.stdin) if self.own_process else None
 
         from ..handle import on_rcon_started
 
-        get_bot()._dispatcher.add(on_rcon_started(temp=True)(self._server_done.set))
+        get_bot()._dispatcher.add(
+            on_rcon_started(lambda e: e.server_id == self.name, temp=True)(self._server_done.set)
+        )
         await self._server_done.wait()
+        now = time.monotonic()
+        self.lifecycle.last_boot_secs = now - self._open_ts
+        if self._exit_ts is not None:
+            self.lifecycle.last_downtime_secs = now - self._exit_ts
+            self._exit_ts = None
         logger.info("服务端已经启动完成")
         try:
-            if self.rcon_host is not None:
+            if self.rcon_host is not None and self.agent is None:
                 await self.rcon_client.connect(timeout=self.rcon_init_timeout)
                 logger.info(
                     f"RCON 客户端已连接到 {self.rcon_host}:{self.rcon_port}，对应服务端 {self.name}"
                 )
+            if self.rcon_host is not None:
+                # 服务端可能在管理器接管前就已有玩家在线，或者错过了部分进出日志
+                self._tasks.add(asyncio.create_task(self._presence_init()))
+            if self.tick_policy is not None:
+                self._tasks.add(asyncio.create_task(self._tick_sampler()))
 
             while True:
                 cmd, fut = await self._out_buf.get()
-                if self.proc.returncode is not None:
+                if self.own_process and self.proc.returncode is not None:
                     err = f"服务端 {self.name} 进程非正常结束，返回码：{self.proc.returncode}"
                     logger.warning(err)
                     logger.warning(f"命令: {cmd} 已经无法完成，放弃执行")
-                    fut.set_exception(RuntimeError(err))
+                    if not fut.done():
+                        fut.set_exception(RuntimeError(err))
                     break
 
-                if self.rcon_host is not None:
-                    ret_tup = await self.rcon_client.send_cmd(cmd, timeout=self.rcon_cmd_timeout)
-                    res = ret_tup[0]
-                    fut.set_result(res)
+                if isinstance(self.proc, AgentProcess):
+                    # 不等待回应即发送下一条命令，代理按请求 id 回复
+                    _chain_future(self.proc.call(cmd), fut)
+                elif self.rcon_host is not None:
+                    try:
+                        # 之前的命令失败后连接已关闭，在这里重新连接
+                        await self.rcon_client.connect(timeout=self.rcon_init_timeout)
+                        ret_tup = await self.rcon_client.send_cmd(
+                            cmd, timeout=self.rcon_cmd_timeout
+                        )
+                    except Exception as e:
+                        logger.warning(f"服务端 {self.name} 通过 RCON 执行命令 {cmd} 失败：{e}")
+                        # 超时的命令的回应可能之后才到达，会被当作下一条命令的回应，因此关闭连接
+                        await self.rcon_client.close()
+                        if not fut.done():
+                            fut.set_exception(e)
+                        continue
+                    if not fut.done():
+                        fut.set_result(ret_tup[0])
+                elif writer is None:
+                    if not fut.done():
+                        fut.set_exception(
+                            RuntimeError(
+                                f"服务端 {self.name} 未启用 RCON 且不持有服务端进程，无法执行命令"
+                            )
+                        )
                 else:
                     line_b = f"{cmd}\n".encode(self.encoding)
                     writer.write(line_b)
                     await writer.drain()
-                    fut.set_result("")
+                    if not fut.done():
+                        fut.set_result("")
 
         except Exception as e:
             logger.exception(f"服务端 stdin 控制例程运行时发生错误：{e}")
 
         finally:
-            if self.rcon_host is not None:
+            if self.rcon_host is not None and self.agent is None:
                 await self.rcon_client.close()
                 logger.info(
                     f"连接到 {self.rcon_host}:{self.rcon_port} 的 RCON 客户端已关闭，对应服务端 {self.name}"
                 )
                 del self.rcon_client
                 logger.info("服务端 stdin 控制例程已停止")
+
+
+def _chain_future(src: asyncio.Future[str], dest: asyncio.Future[str]) -> None:
+    def _done(f: asyncio.Future[str]) -> None:
+        if dest.done():
+            return
+        if f.cancelled():
+            dest.cancel()
+        elif (e := f.exception()) is not None:
+            dest.set_exception(e)
+        else:
+            dest.set_result(f.result())
+
+    src.add_done_callback(_done)
@@ -11,6 +11,9 @@ from typing_extensions import TYPE_CHECKING, Any, Literal, TypeVar
 from ..const import PROTOCOL_IDENTIFIER
 from ..utils.cmd import CmdFactory
 from ..utils.pattern import RegexPatternGroup
+from .gclog import GcPause
+from .procstat import ProcSample
+from .ratelimit import ChatFlood
 
 if TYPE_CHECKING:
     from ..adapter.action import CmdAction
@@ -37,6 +40,10 @@ class EchoPacket(RootEchoPak):  # type: ignore[override]
 
 class InputType(Enum):
     LOG = "log"
+    LAG = "lag"
+    PROC_SAMPLE = "proc_sample"
+    GC_PAUSE = "gc_pause"
+    CHAT_FLOOD = "chat_flood"
 
 
 class OutputType(Enum):
@@ -65,6 +72,34 @@ class LogInputData(InputData):
     from_: Literal["stdout", "stderr"]
 
 
+@dataclass(kw_only=True, frozen=True)
+class LagInputData(InputData):
+    type: Literal[InputType.LAG] = InputType.LAG
+    content: str
+    source: Literal["sample", "log"]
+    lagging: bool
+    mspt: float | None = None
+    behind_ms: int | None = None
+
+
+@dataclass(kw_only=True, frozen=True)
+class ProcSampleInputData(InputData):
+    type: Literal[InputType.PROC_SAMPLE] = InputType.PROC_SAMPLE
+    content: ProcSample
+
+
+@dataclass(kw_only=True, frozen=True)
+class GcPauseInputData(InputData):
+    type: Literal[InputType.GC_PAUSE] = InputType.GC_PAUSE
+    content: GcPause
+
+
+@dataclass(kw_only=True, frozen=True)
+class ChatFloodInputData(InputData):
+    type: Literal[InputType.CHAT_FLOOD] = InputType.CHAT_FLOOD
+    content: ChatFlood
+
+
 @dataclass(kw_only=True, frozen=True)
 class OutputData:
     type: OutputType
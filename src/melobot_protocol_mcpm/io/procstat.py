@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass(frozen=True)
+class ProcSample:
+    """一次进程资源采样
+
+    :ivar int pid: 进程 id
+    :ivar float ts: 采样时间（单调时钟）
+    :ivar float cpu_secs: 累计 CPU 时间（用户态 + 内核态，秒）
+    :ivar float | None cpu_percent: 与上一次采样之间的 CPU 占用率（100 表示占满一个核），首次采样为空
+    :ivar int rss: 常驻内存（字节）
+    :ivar int threads: 线程数
+    :ivar int fds: 打开的文件描述符数
+    :ivar int | None read_bytes: 累计从存储设备读取的字节数，无权限读取时为空
+    :ivar int | None write_bytes: 累计向存储设备写入的字节数，无权限读取时为空
+    """
+
+    pid: int
+    ts: float
+    cpu_secs: float
+    cpu_percent: float | None
+    rss: int
+    threads: int
+    fds: int
+    read_bytes: int | None
+    write_bytes: int | None
+
+
+class ProcSampler:
+    """从 ``/proc/<pid>`` 采样进程资源，结果保存在定长的环形缓冲中
+
+    每次采样只读取 ``stat``、``io`` 两个文件并列出 ``fd`` 目录，不依赖外部工具或 RCON 命令
+    """
+
+    def __init__(self, capacity: int = 720, proc: str = "/proc") -> None:
+        """初始化一个进程资源采样器
+
+        :param capacity: 环形缓冲保存的采样数
+        :param proc: procfs 的挂载点
+        """
+        self.proc = proc
+        self.samples: deque[ProcSample] = deque(maxlen=capacity)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(samples={len(self.samples)}, latest={self.latest})"
+
+    @property
+    def latest(self) -> ProcSample | None:
+        return self.samples[-1] if len(self.samples) else None
+
+    def sample(self, pid: int) -> ProcSample:
+        """采样一次并存入缓冲，进程不存在时抛出 :class:`ProcessLookupError`
+
+        :param pid: 进程 id
+        :return: 采样结果
+        """
+        base = f"{self.proc}/{pid}"
+        ts = time.monotonic()
+        try:
+            with open(f"{base}/stat", "rb") as fp:
+                stat = fp.read()
+            fds = len(os.listdir(f"{base}/fd"))
+        except FileNotFoundError:
+            raise ProcessLookupError(f"进程 {pid} 不存在") from None
+
+        # 进程名可能包含空格和括号，从最后一个右括号之后开始按字段切分（第 3 个字段为 state）
+        fields = stat[stat.rfind(b")") + 2 :].split()
+        cpu_secs = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+        threads = int(fields[17])
+        rss = int(fields[21]) * _PAGE_SIZE
+
+        read_bytes = write_bytes = None
+        try:
+            with open(f"{base}/io", "rb") as fp:
+                for line in fp.read().splitlines():
+                    key, _, val = line.partition(b": ")
+                    if key == b"read_bytes":
+                        read_bytes = int(val)
+                    elif key == b"write_bytes":
+                        write_bytes = int(val)
+        except (PermissionError, FileNotFoundError):
+            pass
+
+        cpu_percent = None
+        if (prev := self.latest) is not None and prev.pid == pid and ts > prev.ts:
+            cpu_percent = (cpu_secs - prev.cpu_secs) / (ts - prev.ts) * 100
+
+        ret = ProcSample(
+            pid=pid,
+            ts=ts,
+            cpu_secs=cpu_secs,
+            cpu_percent=cpu_percent,
+            rss=rss,
+            threads=threads,
+            fds=fds,
+            read_bytes=read_bytes,
+            write_bytes=write_bytes,
+        )
+        self.samples.append(ret)
+        return ret
+
+    def metrics(self, window: float | None = None) -> dict[str, float]:
+        """汇总缓冲中的采样
+
+        :param window: 只汇总最近若干秒内的采样，为空时汇总全部
+        :return: 指标名到值的映射，没有采样时为空字典
+        """
+        samples = list(self.samples)
+        if window is not None and len(samples):
+            samples = [s for s in samples if s.ts >= samples[-1].ts - window]
+        if not len(samples):
+            return {}
+
+        latest = samples[-1]
+        ret: dict[str, float] = {
+            "rss_bytes": latest.rss,
+            "rss_max_bytes": max(s.rss for s in samples),
+            "threads": latest.threads,
+            "fds": latest.fds,
+            "cpu_seconds_total": latest.cpu_secs,
+        }
+        cpu = [s.cpu_percent for s in samples if s.cpu_percent is not None]
+        if len(cpu):
+            ret["cpu_percent_avg"] = sum(cpu) / len(cpu)
+            ret["cpu_percent_max"] = max(cpu)
+        first = samples[0]
+        span = latest.ts - first.ts
+        if span > 0 and first.pid == latest.pid:
+            for name in ("read_bytes", "write_bytes"):
+                a, b = getattr(first, name), getattr(latest, name)
+                if a is not None and b is not None:
+                    ret[f"{name}_per_sec"] = (b - a) / span
+        return ret
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from typing_extensions import Callable, Literal, Mapping
+
+from ..utils.check import LevelRole, RoleRegistry
+
+DEFAULT_CHAT_RATES: dict[LevelRole, tuple[float, int] | None] = {
+    LevelRole.OWNER: None,
+    LevelRole.SU: None,
+    LevelRole.WHITE: (5, 10),
+    LevelRole.NORMAL: (2, 5),
+    LevelRole.BLACK: (0.2, 1),
+}
+# 令牌桶数量超过此值时，清理已经补满的令牌桶
+_PRUNE_SIZE = 1024
+
+
+@dataclass(kw_only=True)
+class ChatRateLimit:
+    """玩家聊天消息的限流策略
+
+    每个玩家一个令牌桶，补充速率和容量由玩家的分级权限等级决定。超出限制的聊天行在进入适配器之前就被拦截，
+    不会产生 :class:`.MessageEvent`，也不会触发任何处理流
+
+    :ivar RoleRegistry | None registry: 玩家的权限数据索引，为空时所有玩家都视为普通用户
+    :ivar Mapping[LevelRole, tuple[float, int] | None] rates: 各等级的（每秒补充的消息数，最多积攒的消息数），
+        值为空或未列出的等级不限流
+    :ivar Literal["drop", "summarize"] overflow: 超出限制的消息直接丢弃，或者汇总为 :class:`.ChatFloodEvent`
+    :ivar float summary_interval: 汇总模式下，从玩家第一条被拦截的消息开始，多久（秒）后产生一次汇总事件
+    """
+
+    registry: RoleRegistry | None = None
+    rates: Mapping[LevelRole, tuple[float, int] | None] = field(
+        default_factory=lambda: dict(DEFAULT_CHAT_RATES)
+    )
+    overflow: Literal["drop", "summarize"] = "summarize"
+    summary_interval: float = 10
+
+    def role(self, player: str) -> LevelRole:
+        return self.registry.get_role(player) if self.registry is not None else LevelRole.NORMAL
+
+
+@dataclass(frozen=True)
+class ChatFlood:
+    """一段时间内某个玩家被拦截的聊天消息的汇总
+
+    :ivar str player: 玩家名称
+    :ivar LevelRole role: 玩家的分级权限等级
+    :ivar int dropped: 被拦截的消息数
+    :ivar float window_secs: 从第一条到最后一条被拦截的消息经过的时间（秒）
+    :ivar str last_message: 最后一条被拦截的消息
+    """
+
+    player: str
+    role: LevelRole
+    dropped: int
+    window_secs: float
+    last_message: str
+
+
+class _Bucket:
+    __slots__ = ("tokens", "ts", "refill", "burst")
+
+    def __init__(self, burst: int, ts: float) -> None:
+        self.tokens = float(burst)
+        self.ts = ts
+        self.refill = 0.0
+        self.burst = burst
+
+
+class _Flood:
+    __slots__ = ("role", "dropped", "first_ts", "last_ts", "last_message", "handle")
+
+    def __init__(self, role: LevelRole, ts: float) -> None:
+        self.role = role
+        self.dropped = 0
+        self.first_ts = self.last_ts = ts
+        self.last_message = ""
+        self.handle: asyncio.TimerHandle | None = None
+
+
+class ChatLimiter:
+    """按 :class:`ChatRateLimit` 对玩家的聊天消息限流
+
+    :ivar int dropped: 累计被拦截的消息数
+    """
+
+    def __init__(self, policy: ChatRateLimit, on_summary: Callable[[ChatFlood], None]) -> None:
+        """初始化一个聊天限流器
+
+        :param policy: 限流策略
+        :param on_summary: 汇总模式下产生汇总时的回调
+        """
+        for role, rate in policy.rates.items():
+            if rate is not None and (rate[0] <= 0 or rate[1] < 1):
+                raise ValueError(f"等级 {role.name} 的限流速率必须为正数，且至少能积攒 1 条消息")
+        self.policy = policy
+        self.dropped = 0
+        self._on_summary = on_summary
+        self._buckets: dict[str, _Bucket] = {}
+        self._floods: dict[str, _Flood] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(players={len(self._buckets)}, dropped={self.dropped})"
+
+    def allow(self, player: str, message: str) -> bool:
+        """消耗玩家的一个令牌
+
+        :param player: 玩家名称
+        :param message: 消息内容，被拦截时用于汇总
+        :return: 是否放行此消息
+        """
+        role = self.policy.role(player)
+        if (rate := self.policy.rates.get(role)) is None:
+            return True
+
+        now = time.monotonic()
+        refill, burst = rate
+        bucket = self._buckets.get(player)
+        if bucket is None:
+            if len(self._buckets) >= _PRUNE_SIZE:
+                self._prune(now)
+            bucket = self._buckets[player] = _Bucket(burst, now)
+        else:
+            bucket.tokens = min(bucket.tokens + (now - bucket.ts) * refill, burst)
+            bucket.ts = now
+        bucket.refill, bucket.burst = refill, burst
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True
+
+        self.dropped += 1
+        if self.policy.overflow == "summarize":
+            flood = self._floods.get(player)
+            if flood is None:
+                flood = self._floods[player] = _Flood(role, now)
+                flood.handle = asyncio.get_running_loop().call_later(
+                    self.policy.summary_interval, self._summarize, player
+                )
+            flood.dropped += 1
+            flood.last_ts = now
+            flood.last_message = message
+        return False
+
+    def _summarize(self, player: str) -> None:
+        if (flood := self._floods.pop(player, None)) is None:
+            return
+        self._on_summary(
+            ChatFlood(
+                player=player,
+                role=flood.role,
+                dropped=flood.dropped,
+                window_secs=flood.last_ts - flood.first_ts,
+                last_message=flood.last_message,
+            )
+        )
+
+    def _prune(self, now: float) -> None:
+        full = [
+            name
+            for name, b in self._buckets.items()
+            if b.tokens + (now - b.ts) * b.refill >= b.burst and name not in self._floods
+        ]
+        for name in full:
+            del self._buckets[name]
+
+    def clear(self) -> None:
+        """清空所有令牌桶，丢弃尚未产生的汇总"""
+        for flood in self._floods.values():
+            if flood.handle is not None:
+                flood.handle.cancel()
+        self._floods.clear()
+        self._buckets.clear()
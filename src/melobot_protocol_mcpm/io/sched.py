@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from typing_extensions import TYPE_CHECKING, AsyncIterator, Hashable
+
+if TYPE_CHECKING:
+    from ..adapter.event import Event
+
+
+@dataclass(kw_only=True)
+class DispatchPolicy:
+    """事件处理流的调度策略
+
+    只作用于没有设置会话规则（``rule``）的处理流：带会话规则的处理流由会话自行按域排队，且挂起中的会话
+    会一直占用处理流，不能参与排队和计数
+
+    :ivar bool ordered: 同一玩家的事件（域为 ``(server_id, player_name)``，如 :class:`.MessageEvent`、
+        :class:`.PlayerEvent`）是否按到达顺序逐个处理，不同玩家的事件仍并发处理。同一优先级内的
+        所有通过检查的处理流共享顺序；服务端级别的事件不排队
+    :ivar int | None max_concurrency: 此服务端同时运行的处理流数量上限，为空时不限制
+    """
+
+    ordered: bool = True
+    max_concurrency: int | None = 64
+
+
+class _ScopeEntry:
+    __slots__ = ("lock", "refs")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.refs = 0
+
+
+class HandleScheduler:
+    """按 :class:`DispatchPolicy` 调度一个服务端的事件处理流
+
+    :ivar int running: 正在运行的处理流数量
+    :ivar int pending: 正在排队等待的处理流数量
+    """
+
+    def __init__(self, policy: DispatchPolicy) -> None:
+        if policy.max_concurrency is not None and policy.max_concurrency < 1:
+            raise ValueError("同时运行的处理流数量上限至少为 1")
+        self.policy = policy
+        self.running = 0
+        self.pending = 0
+        self._sem = (
+            asyncio.Semaphore(policy.max_concurrency)
+            if policy.max_concurrency is not None
+            else None
+        )
+        self._scopes: dict[Hashable, _ScopeEntry] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(running={self.running}, pending={self.pending})"
+
+    @asynccontextmanager
+    async def slot(self, event: Event) -> AsyncIterator[None]:
+        """在排到此事件后进入，退出时让出位置
+
+        只在处理流通过检查、匹配和解析后调用，被拒绝的处理流不会占用域锁和并发名额。处理流任务按事件到达的
+        顺序创建，锁和信号量都按先来先得唤醒，因此检查耗时相近时，同一域内的处理顺序与事件顺序一致
+        """
+        entry = None
+        if self.policy.ordered and len(event.scope) > 1:
+            entry = self._scopes.get(event.scope)
+            if entry is None:
+                entry = self._scopes[event.scope] = _ScopeEntry()
+            entry.refs += 1
+
+        self.pending += 1
+        locked = running = False
+        try:
+            if entry is not None:
+                await entry.lock.acquire()
+                locked = True
+            if self._sem is not None:
+                await self._sem.acquire()
+            self.pending -= 1
+            self.running += 1
+            running = True
+            yield
+        finally:
+            if running:
+                self.running -= 1
+                if self._sem is not None:
+                    self._sem.release()
+            else:
+                self.pending -= 1
+            if entry is not None:
+                if locked:
+                    entry.lock.release()
+                entry.refs -= 1
+                if entry.refs == 0:
+                    del self._scopes[event.scope]
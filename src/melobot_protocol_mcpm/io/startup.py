@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+from melobot.log import logger
+from typing_extensions import TYPE_CHECKING, Mapping, Sequence
+
+if TYPE_CHECKING:
+    from .manager import ServerManager
+
+
+@dataclass(kw_only=True)
+class BootRecord:
+    """单个服务端在启动编排中的记录
+
+    :ivar str name: 服务端名称
+    :ivar float queued_secs: 等待依赖和启动名额的耗时（秒）
+    :ivar float | None boot_secs: 从启动进程到服务端启动完成的耗时（秒），未启动完成时为空
+    :ivar bool ready: 是否已启动完成
+    :ivar bool timed_out: 是否在等待启动完成时超时
+    """
+
+    name: str
+    queued_secs: float = 0
+    boot_secs: float | None = None
+    ready: bool = False
+    timed_out: bool = False
+
+
+class StartupOrchestrator:
+    """编排多个服务端的启动顺序，避免所有服务端同时启动争抢磁盘和 CPU
+
+    服务端在所有依赖启动完成、且取得启动名额后才会启动进程，启动日志中出现启动完成（即产生
+    :class:`.ServerDoneEvent` 的日志）后让出名额。启动失败、启动中退出或等待超时同样会让出名额，
+    依赖它的服务端仍会继续启动
+
+    由 :class:`.MCPMProtocol` 注册管理器后生效，服务端之后的重启同样受编排控制
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        depends: Mapping[str, Sequence[str]] | None = None,
+        ready_timeout: float | None = 600,
+        stagger: float = 0,
+    ) -> None:
+        """初始化一个启动编排器
+
+        :param concurrency: 同时处于启动中的服务端数量上限
+        :param depends: 服务端名称到其依赖的服务端名称的映射，如代理服务端依赖各个后端服务端
+        :param ready_timeout: 等待服务端启动完成的最长时间（秒），超时后让出名额，为空时一直等待
+        :param stagger: 相邻两次启动进程之间的最小间隔（秒）
+        """
+        if concurrency < 1:
+            raise ValueError("同时启动的服务端数量至少为 1")
+        self.concurrency = concurrency
+        self.depends: dict[str, tuple[str, ...]] = {
+            name: tuple(deps) for name, deps in (depends or {}).items()
+        }
+        self.ready_timeout = ready_timeout
+        self.stagger = stagger
+        self.records: dict[str, BootRecord] = {}
+        self.total_secs: float | None = None
+
+        self._names: set[str] = set()
+        self._sem = asyncio.Semaphore(concurrency)
+        self._stagger_lock = asyncio.Lock()
+        self._settled: dict[str, asyncio.Event] = {}
+        self._booting: dict[str, tuple[float, asyncio.TimerHandle | None]] = {}
+        self._last_spawn = 0.0
+        self._start_ts: float | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(concurrency={self.concurrency}, servers={len(self._names)})"
+        )
+
+    def register(self, manager: ServerManager) -> None:
+        """注册一个服务端管理器，之后它的启动受此编排器控制"""
+        if manager.startup is not None and manager.startup is not self:
+            raise ValueError(f"服务端 {manager.name} 已注册到其他启动编排器")
+        manager.startup = self
+        self._names.add(manager.name)
+        self._settled.setdefault(manager.name, asyncio.Event())
+
+    def add_dependency(self, name: str, *deps: str) -> None:
+        """声明服务端的依赖，依赖全部启动完成后此服务端才会启动
+
+        :param name: 服务端名称
+        :param deps: 依赖的服务端名称
+        """
+        self.depends[name] = (*self.depends.get(name, ()), *deps)
+
+    def validate(self) -> None:
+        """检查依赖关系中是否有未注册的服务端或循环依赖"""
+        for name, deps in self.depends.items():
+            unknown = [d for d in (name, *deps) if d not in self._names]
+            if len(unknown):
+                raise ValueError(f"启动依赖中的服务端未注册：{', '.join(unknown)}")
+
+        visited: set[str] = set()
+        path: list[str] = []
+
+        def visit(name: str) -> None:
+            if name in path:
+                cycle = path[path.index(name) :] + [name]
+                raise ValueError(f"服务端的启动依赖存在循环：{' -> '.join(cycle)}")
+            if name in visited:
+                return
+            path.append(name)
+            for dep in self.depends.get(name, ()):
+                visit(dep)
+            path.pop()
+            visited.add(name)
+
+        for name in self.depends:
+            visit(name)
+
+    async def wait(self) -> dict[str, BootRecord]:
+        """等待所有已注册的服务端结束启动（启动完成、失败或超时）
+
+        :return: 服务端名称到启动记录的映射
+        """
+        await asyncio.gather(*(self._settled[name].wait() for name in self._names))
+        return self.records
+
+    async def _acquire(self, manager: ServerManager) -> None:
+        name = manager.name
+        queued_ts = time.monotonic()
+        if self._start_ts is None:
+            self._start_ts = queued_ts
+        self._settled[name].clear()
+
+        for dep in self.depends.get(name, ()):
+            if dep not in self._settled:
+                continue
+            await self._settled[dep].wait()
+            if not self.records[dep].ready:
+                logger.warning(f"服务端 {name} 的依赖 {dep} 未能启动完成，仍继续启动")
+
+        await self._sem.acquire()
+        try:
+            if self.stagger > 0:
+                async with self._stagger_lock:
+                    await asyncio.sleep(max(self._last_spawn + self.stagger - time.monotonic(), 0))
+                    self._last_spawn = time.monotonic()
+        except BaseException:
+            self._sem.release()
+            raise
+
+        now = time.monotonic()
+        self.records[name] = BootRecord(name=name, queued_secs=now - queued_ts)
+        timer = None
+        if self.ready_timeout is not None:
+            timer = asyncio.get_running_loop().call_later(
+                self.ready_timeout, self._settle, manager, False, True
+            )
+        self._booting[name] = (now, timer)
+        logger.info(f"服务端 {name} 开始启动（排队 {now - queued_ts:.1f}s）")
+
+    def _settle(self, manager: ServerManager, ready: bool, timed_out: bool = False) -> None:
+        name = manager.name
+        if (booting := self._booting.pop(name, None)) is None:
+            return
+        start_ts, timer = booting
+        if timer is not None:
+            timer.cancel()
+
+        now = time.monotonic()
+        record = self.records[name]
+        record.ready = ready
+        record.timed_out = timed_out
+        if ready:
+            record.boot_secs = now - start_ts
+            logger.info(f"服务端 {name} 启动完成，耗时 {record.boot_secs:.1f}s")
+        elif timed_out:
+            logger.warning(f"服务端 {name} 在 {self.ready_timeout}s 内未能启动完成，让出启动名额")
+        else:
+            logger.warning(f"服务端 {name} 未能启动完成")
+        self._sem.release()
+        self._settled[name].set()
+
+        if self.total_secs is None and all(self._settled[n].is_set() for n in self._names):
+            self.total_secs = now - (self._start_ts if self._start_ts is not None else now)
+            ready_cnt = sum(1 for r in self.records.values() if r.ready)
+            logger.info(
+                f"{ready_cnt}/{len(self._names)} 个服务端已启动完成，总耗时 {self.total_secs:.1f}s"
+            )
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from typing_extensions import IO, AsyncIterator
+
+_HEAD_SIZE = 128
+
+
+@dataclass(frozen=True)
+class LogPosition:
+    """日志文件中的读取位置
+
+    :ivar int inode: 日志文件的 inode
+    :ivar int offset: 已读取的字节数
+    :ivar str head: 文件开头若干字节的十六进制表示，用于在轮转后的压缩日志中找回原文件
+    """
+
+    inode: int
+    offset: int
+    head: str
+
+
+class LogTailer:
+    """可断点续读的日志文件跟踪器
+
+    跟踪日志文件（默认为 ``logs/latest.log``）的追加内容，能处理服务端把日志轮转为 ``.log.gz`` 的情况。
+    已交付的位置定期写入检查点文件，重启后从检查点继续读取
+    """
+
+    def __init__(
+        self,
+        log_dir: Path,
+        checkpoint: Path | None,
+        encoding: str = "utf-8",
+        poll_interval: float = 0.1,
+        max_poll_interval: float = 1,
+        save_interval: float = 1,
+        filename: str = "latest.log",
+    ) -> None:
+        """初始化一个日志文件跟踪器
+
+        :param log_dir: 日志目录
+        :param checkpoint: 检查点文件路径，为空时不记录检查点，总是从文件末尾开始读取
+        :param encoding: 日志文件编码
+        :param poll_interval: 无新内容时的最短轮询间隔（秒），空闲时逐渐增长到最长间隔
+        :param max_poll_interval: 最长轮询间隔（秒）
+        :param save_interval: 写入检查点的最短间隔（秒）
+        :param filename: 跟踪的日志文件名
+        """
+        self.log_dir = log_dir
+        self.log_path = log_dir / filename
+        self.checkpoint = checkpoint
+        self.encoding = encoding
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.save_interval = save_interval
+
+        self.committed: LogPosition | None = None
+        self._pending: deque[LogPosition] = deque()
+        self._saved: LogPosition | None = None
+        self._save_ts = 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(path={str(self.log_path)!r}, pos={self.committed})"
+
+    def load(self) -> LogPosition | None:
+        if self.checkpoint is None or not self.checkpoint.is_file():
+            return None
+        try:
+            return LogPosition(**json.loads(self.checkpoint.read_text(encoding="utf-8")))
+        except (ValueError, TypeError):
+            return None
+
+    def commit(self) -> None:
+        """标记最早一行未确认的日志已交付"""
+        if len(self._pending):
+            self.committed = self._pending.popleft()
+            if time.monotonic() - self._save_ts >= self.save_interval:
+                self.save()
+
+    def reset_pending(self) -> None:
+        self._pending.clear()
+
+    def save(self) -> None:
+        """把已交付的位置原子地写入检查点文件"""
+        self._save_ts = time.monotonic()
+        if self.checkpoint is None or self.committed is None or self.committed == self._saved:
+            return
+        tmp = self.checkpoint.with_name(f"{self.checkpoint.name}.tmp")
+        tmp.write_text(json.dumps(asdict(self.committed)), encoding="utf-8")
+        os.replace(tmp, self.checkpoint)
+        self._saved = self.committed
+
+    @staticmethod
+    def _read_head(fp: IO[bytes]) -> str:
+        pos = fp.tell()
+        fp.seek(0)
+        head = fp.read(_HEAD_SIZE).hex()
+        fp.seek(pos)
+        return head
+
+    def _find_rotated(self, pos: LogPosition) -> list[tuple[str, int]]:
+        # 按修改时间从新到旧查找开头内容一致的压缩日志，返回检查点之后的所有行及其结束位置
+        rotated = sorted(
+            self.log_dir.glob("*.log.gz"), key=lambda p: p.stat().st_mtime, reverse=True
+        )
+        for path in rotated:
+            with gzip.open(path, "rb") as fp:
+                if not fp.read(_HEAD_SIZE).hex().startswith(pos.head):
+                    continue
+                fp.seek(pos.offset)
+                ret: list[tuple[str, int]] = []
+                offset = pos.offset
+                for line in fp.read().splitlines(keepends=True):
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    ret.append(
+                        (line.decode(self.encoding, errors="replace").rstrip("\r\n"), offset)
+                    )
+                return ret
+        return []
+
+    async def lines(self) -> AsyncIterator[str]:
+        """逐行产出日志内容，每一行都需要在交付后调用一次 :meth:`commit`"""
+        fp: IO[bytes] | None = None
+        saved = self.load()
+        self.committed = self._saved = saved
+        try:
+            created = False
+            while not self.log_path.is_file():
+                created = True
+                await asyncio.sleep(self.max_poll_interval)
+            fp = open(self.log_path, "rb")
+            inode = os.fstat(fp.fileno()).st_ino
+
+            if (
+                saved is not None
+                and saved.inode == inode
+                and self._read_head(fp).startswith(saved.head)
+            ):
+                fp.seek(min(saved.offset, os.fstat(fp.fileno()).st_size))
+            elif saved is not None:
+                # 检查点之后日志已经轮转，先读完轮转后的压缩日志
+                for line, offset in await asyncio.to_thread(self._find_rotated, saved):
+                    self._pending.append(LogPosition(saved.inode, offset, saved.head))
+                    yield line
+                fp.seek(0)
+            elif not created:
+                # 没有检查点时跳过已有的内容，但开始跟踪后才创建的文件要从头读取
+                fp.seek(0, os.SEEK_END)
+
+            head = self._read_head(fp)
+            buf = b""
+            rotated = False
+            interval = self.poll_interval
+            while True:
+                chunk = fp.readline()
+                if chunk:
+                    buf += chunk
+                    if not buf.endswith(b"\n"):
+                        continue
+                    interval = self.poll_interval
+                    if len(head) < _HEAD_SIZE * 2:
+                        head = self._read_head(fp)
+                    self._pending.append(LogPosition(inode, fp.tell(), head))
+                    raw, buf = buf, b""
+                    yield raw.decode(self.encoding, errors="replace").rstrip("\r\n")
+                    continue
+
+                if rotated:
+                    # 旧文件已确认读完，切换到新文件
+                    fp.close()
+                    fp = open(self.log_path, "rb")
+                    inode = os.fstat(fp.fileno()).st_ino
+                    head = self._read_head(fp)
+                    buf = b""
+                    rotated = False
+                    continue
+
+                try:
+                    st = os.stat(self.log_path)
+                except FileNotFoundError:
+                    st = None
+                if st is not None and (st.st_ino != inode or st.st_size < fp.tell()):
+                    # 文件已轮转或被截断，再读一次旧文件，避免遗漏轮转前最后写入的内容
+                    rotated = True
+                    continue
+
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, self.max_poll_interval)
+        finally:
+            if fp is not None:
+                fp.close()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+from typing_extensions import Collection
+
+DEFAULT_PRIORITY_CMDS: frozenset[str] = frozenset(
+    (
+        "stop",
+        "save-all",
+        "save-off",
+        "save-on",
+        "kick",
+        "ban",
+        "ban-ip",
+        "pardon",
+        "pardon-ip",
+        "whitelist",
+        "op",
+        "deop",
+        "list",
+        "tick",
+        "reload",
+    )
+)
+
+
+@dataclass(kw_only=True)
+class TickPolicy:
+    """按服务端刻健康度调度命令的策略
+
+    优先命令总是直接发送，其他（批量、装饰性的）命令在服务端卡顿时按降低后的速率发送
+
+    :ivar float sample_interval: 通过 RCON 采样刻耗时的间隔（秒）
+    :ivar str sample_cmd: 采样刻耗时的命令，回应由 :attr:`.RegexPatternGroup.tick_mspt` 解析
+    :ivar float mspt_threshold: 平均刻耗时（毫秒）超过此值时视为卡顿
+    :ivar float recover_mspt: 卡顿后平均刻耗时回落到此值以下才视为恢复
+    :ivar float lag_hold: 出现 “Can't keep up!” 日志后，至少视为卡顿的时间（秒）
+    :ivar float | None normal_rate: 正常时非优先命令的最大发送速率（条/秒），为空时不限制
+    :ivar float lag_rate: 卡顿时非优先命令的发送速率（条/秒），刻耗时越高速率越低
+    :ivar Collection[str] priority_cmds: 优先命令的名称
+    """
+
+    sample_interval: float = 5
+    sample_cmd: str = "tick query"
+    mspt_threshold: float = 45
+    recover_mspt: float = 40
+    lag_hold: float = 10
+    normal_rate: float | None = None
+    lag_rate: float = 5
+    priority_cmds: Collection[str] = DEFAULT_PRIORITY_CMDS
+
+    def is_priority(self, cmd: str) -> bool:
+        cmd = cmd.strip().removeprefix("/")
+        return cmd == self.sample_cmd or cmd.split(" ", 1)[0] in self.priority_cmds
+
+    def rate(self, health: TickHealth) -> float | None:
+        if not health.is_lagging():
+            return self.normal_rate
+        if health.mspt is None or health.mspt <= self.mspt_threshold:
+            return self.lag_rate
+        return self.lag_rate * self.mspt_threshold / health.mspt
+
+
+@dataclass(kw_only=True)
+class TickHealth:
+    """服务端刻健康度
+
+    :ivar float | None mspt: 最近一次采样的平均刻耗时（毫秒）
+    :ivar bool overloaded: 最近的采样是否处于卡顿状态
+    :ivar float lag_until: 由 “Can't keep up!” 日志确定的卡顿截止时间（单调时钟）
+    :ivar int samples: 采样次数
+    :ivar int lag_reports: “Can't keep up!” 日志的次数
+    :ivar int | None last_behind_ms: 最近一次 “Can't keep up!” 日志报告的落后时间（毫秒）
+    :ivar int throttled: 因卡顿而被延后发送的命令数
+    """
+
+    mspt: float | None = None
+    overloaded: bool = False
+    lag_until: float = 0
+    samples: int = 0
+    lag_reports: int = 0
+    last_behind_ms: int | None = None
+    throttled: int = 0
+
+    def is_lagging(self, now: float | None = None) -> bool:
+        if self.overloaded:
+            return True
+        return (now if now is not None else time.monotonic()) < self.lag_until
+
+    def update_sample(self, mspt: float, policy: TickPolicy) -> None:
+        self.samples += 1
+        self.mspt = mspt
+        limit = policy.recover_mspt if self.overloaded else policy.mspt_threshold
+        self.overloaded = mspt > limit
+
+    def report_lag(self, behind_ms: int, policy: TickPolicy) -> None:
+        self.lag_reports += 1
+        self.last_behind_ms = behind_ms
+        self.lag_until = time.monotonic() + policy.lag_hold
@@ -1,5 +1,16 @@
 from .cmd import CmdFactory
 from .common import truncate
-from .pattern import RegexPatternGroup
-from .text import ClickEvent, Color, CommonColors, HoverEvent, JsonText
-from .check import LevelRole, get_level_role, MsgChecker, MsgCheckerFactory
+from .nbt import loads_nbt
+from .pattern import (
+    PATTERN_PROFILES,
+    FabricPatternGroup,
+    ForgePatternGroup,
+    PaperPatternGroup,
+    RegexPatternGroup,
+    VelocityPatternGroup,
+    detect_pattern_group,
+)
+from .presence import PlayerPresence
+from .snbt import SnbtParser, extract_snbt, iter_snbt, loads_snbt, parse_snbt_path
+from .text import ClickEvent, Color, CommonColors, HoverEvent, JsonText, JsonTextTemplate
+from .check import LevelRole, get_level_role, MsgChecker, MsgCheckerFactory, RoleRegistry
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import json
 from enum import Enum
+from pathlib import Path
 
 from melobot.typ import SyncOrAsyncCallable
 from melobot.utils.check import Checker
-from typing_extensions import TYPE_CHECKING, Iterable, Optional, cast
+from typing_extensions import TYPE_CHECKING, Any, Iterable, Optional, cast
 
 if TYPE_CHECKING:
     from ..adapter.event import Event, LogEvent, MessageEvent, StdoutEvent
@@ -20,6 +22,179 @@ class LevelRole(int, Enum):
     BLACK = 1
 
 
+# update() 中表示保持不变，与表示清除的 None 区分
+_KEEP: Any = object()
+
+
+class RoleRegistry:
+    """分级权限数据的索引
+
+    同一个索引可被多个检查器共享，更新后所有共享此索引的检查器立即生效。
+    更新时只重新计算涉及的用户的等级，添加或移除少量用户的开销与已有用户数无关
+    """
+
+    def __init__(
+        self,
+        owner: Optional[str] = None,
+        super_users: Optional[Iterable[str]] = None,
+        white_users: Optional[Iterable[str]] = None,
+        black_users: Optional[Iterable[str]] = None,
+    ) -> None:
+        """初始化一个分级权限数据的索引
+
+        :param owner: 主人的 id
+        :param super_users: 超级用户 id
+        :param white_users: 白名单用户 id
+        :param black_users: 黑名单用户 id
+        """
+        self.version = 0
+        self._owner: str | None = None
+        self._super_users: set[str] = set()
+        self._white_users: set[str] = set()
+        self._black_users: set[str] = set()
+        self._index: dict[str, LevelRole] = {}
+        self.update(owner, super_users, white_users, black_users)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(users={len(self._index)}, version={self.version})"
+
+    @property
+    def owner(self) -> str | None:
+        return self._owner
+
+    @property
+    def super_users(self) -> frozenset[str]:
+        return frozenset(self._super_users)
+
+    @property
+    def white_users(self) -> frozenset[str]:
+        return frozenset(self._white_users)
+
+    @property
+    def black_users(self) -> frozenset[str]:
+        return frozenset(self._black_users)
+
+    def _role_set(self, role: LevelRole, action: str) -> set[str]:
+        match role:
+            case LevelRole.SU:
+                return self._super_users
+            case LevelRole.WHITE:
+                return self._white_users
+            case LevelRole.BLACK:
+                return self._black_users
+            case _:
+                raise ValueError(f"不能通过{action}的方式设置此等级：{role}")
+
+    def _reindex(self, names: Iterable[str]) -> None:
+        # 优先级：黑名单 > 主人 > 超级用户 > 白名单
+        for name in names:
+            if name in self._black_users:
+                self._index[name] = LevelRole.BLACK
+            elif name == self._owner:
+                self._index[name] = LevelRole.OWNER
+            elif name in self._super_users:
+                self._index[name] = LevelRole.SU
+            elif name in self._white_users:
+                self._index[name] = LevelRole.WHITE
+            else:
+                self._index.pop(name, None)
+
+    def get_role(self, name: str) -> LevelRole:
+        """获取用户的分级权限等级
+
+        :param name: 用户 id
+        :return: 分级权限等级
+        """
+        return self._index.get(name, LevelRole.NORMAL)
+
+    def update(
+        self,
+        owner: Optional[str] = _KEEP,
+        super_users: Optional[Iterable[str]] = None,
+        white_users: Optional[Iterable[str]] = None,
+        black_users: Optional[Iterable[str]] = None,
+    ) -> None:
+        """整体替换给定的权限数据，未给定的部分保持不变
+
+        :param owner: 主人的 id，为 :obj:`None` 时清除主人
+        :param super_users: 超级用户 id
+        :param white_users: 白名单用户 id
+        :param black_users: 黑名单用户 id
+        """
+        changed: set[str] = set()
+        if owner is not _KEEP and owner != self._owner:
+            changed.update(n for n in (self._owner, owner) if n is not None)
+            self._owner = owner
+        for attr, names in (
+            ("_super_users", super_users),
+            ("_white_users", white_users),
+            ("_black_users", black_users),
+        ):
+            if names is not None:
+                new = set(names)
+                changed.update(new.symmetric_difference(getattr(self, attr)))
+                setattr(self, attr, new)
+        self._reindex(changed)
+        self.version += 1
+
+    def add(self, role: LevelRole, *names: str) -> None:
+        """为用户添加分级权限等级
+
+        :param role: 分级权限等级，只能是超级用户、白名单用户或黑名单用户
+        :param names: 用户 id
+        """
+        self._role_set(role, "添加").update(names)
+        self._reindex(names)
+        self.version += 1
+
+    def remove(self, role: LevelRole, *names: str) -> None:
+        """移除用户的分级权限等级
+
+        :param role: 分级权限等级，只能是超级用户、白名单用户或黑名单用户
+        :param names: 用户 id
+        """
+        self._role_set(role, "移除").difference_update(names)
+        self._reindex(names)
+        self.version += 1
+
+    def ban(self, *names: str) -> None:
+        self.add(LevelRole.BLACK, *names)
+
+    def unban(self, *names: str) -> None:
+        self.remove(LevelRole.BLACK, *names)
+
+    def load_server_files(
+        self,
+        server_dir: str | Path,
+        ops: bool = True,
+        whitelist: bool = True,
+        banned: bool = False,
+    ) -> None:
+        """从服务端的 ops.json、whitelist.json 和 banned-players.json 载入权限数据
+
+        载入的数据会替换对应等级的已有数据，不存在的文件会被忽略
+
+        :param server_dir: 服务端的工作目录
+        :param ops: 是否将 ops.json 中的玩家作为超级用户
+        :param whitelist: 是否将 whitelist.json 中的玩家作为白名单用户
+        :param banned: 是否将 banned-players.json 中的玩家作为黑名单用户
+        """
+        server_dir = Path(server_dir)
+        self.update(
+            super_users=self._read_names(server_dir / "ops.json") if ops else None,
+            white_users=self._read_names(server_dir / "whitelist.json") if whitelist else None,
+            black_users=self._read_names(server_dir / "banned-players.json") if banned else None,
+        )
+
+    @staticmethod
+    def _read_names(path: Path) -> list[str] | None:
+        if not path.is_file():
+            return None
+        with path.open(encoding="utf-8") as fp:
+            entries = json.load(fp)
+        return [e["name"] for e in entries if isinstance(e, dict) and "name" in e]
+
+
 def get_level_role(checker: MsgChecker, event: "MessageEvent") -> LevelRole:
     """获得消息事件对应的分级权限等级
 
@@ -27,22 +202,13 @@ def get_level_role(checker: MsgChecker, event: "MessageEvent") -> LevelRole:
     :return: 分级权限等级
     """
     _this = get_level_role
-    _flag = (checker.black_users, checker.owner, checker.super_users, checker.white_users)
+    registry = checker.registry
+    _flag = (registry, registry.version)
     ret = event.flag_get(_this, _flag, raise_exc=False, default=None)
     if ret is not None:
         return cast(LevelRole, ret)
 
-    id = event.player_name
-    if id in _flag[0]:
-        res = LevelRole.BLACK
-    elif id == _flag[1]:
-        res = LevelRole.OWNER
-    elif id in _flag[2]:
-        res = LevelRole.SU
-    elif id in _flag[3]:
-        res = LevelRole.WHITE
-    else:
-        res = LevelRole.NORMAL
+    res = registry.get_role(event.player_name)
     event.flag_set(_this, _flag, res)
     return res
 
@@ -61,6 +227,7 @@ class MsgChecker(Checker["Event"]):
         white_users: Optional[Iterable[str]] = None,
         black_users: Optional[Iterable[str]] = None,
         fail_cb: Optional[SyncOrAsyncCallable[[], None]] = None,
+        registry: Optional[RoleRegistry] = None,
     ) -> None:
         """初始化一个消息事件分级权限检查器
 
@@ -70,21 +237,33 @@ class MsgChecker(Checker["Event"]):
         :param white_users: 白名单用户 id
         :param black_users: 黑名单用户 id
         :param fail_cb: 检查不通过的回调
+        :param registry: 共享的权限数据索引，提供时忽略 `owner` 等各等级数据参数
         """
         super().__init__(fail_cb)
         self.check_role = role
+        if registry is None:
+            registry = RoleRegistry(owner, super_users, white_users, black_users)
+        self.registry = registry
 
-        self.owner = owner
-        self.super_users = tuple(super_users) if super_users is not None else ()
-        self.white_users = tuple(white_users) if white_users is not None else ()
-        self.black_users = tuple(black_users) if black_users is not None else ()
-        self._hash_tag: tuple[str | None | tuple | LevelRole, ...] = (
-            self.check_role,
-            self.owner,
-            self.super_users,
-            self.white_users,
-            self.black_users,
-        )
+    @property
+    def owner(self) -> str | None:
+        return self.registry.owner
+
+    @property
+    def super_users(self) -> frozenset[str]:
+        return self.registry.super_users
+
+    @property
+    def white_users(self) -> frozenset[str]:
+        return self.registry.white_users
+
+    @property
+    def black_users(self) -> frozenset[str]:
+        return self.registry.black_users
+
+    @property
+    def _hash_tag(self) -> tuple[LevelRole, RoleRegistry, int]:
+        return (self.check_role, self.registry, self.registry.version)
 
     def _check(self, event: "MessageEvent") -> bool:
         e_level = get_level_role(self, event)
@@ -133,6 +312,7 @@ class MsgCheckerFactory:
         black_users: Optional[Iterable[str]] = None,
         white_groups: Optional[Iterable[str]] = None,
         fail_cb: Optional[SyncOrAsyncCallable[[], None]] = None,
+        registry: Optional[RoleRegistry] = None,
     ) -> None:
         """初始化一个消息事件分级权限检查器的工厂
 
@@ -142,15 +322,31 @@ class MsgCheckerFactory:
         :param black_users: 黑名单用户 id
         :param white_groups: 白名单群号（不在其中的群不通过校验）
         :param fail_cb: 检查不通过的回调（这将自动附加到生成的检查器上）
+        :param registry: 共享的权限数据索引，提供时忽略 `owner` 等各等级数据参数
         """
-        self.owner = owner
-        self.super_users = tuple(super_users) if super_users is not None else ()
-        self.white_users = tuple(white_users) if white_users is not None else ()
-        self.black_users = tuple(black_users) if black_users is not None else ()
+        if registry is None:
+            registry = RoleRegistry(owner, super_users, white_users, black_users)
+        self.registry = registry
         self.white_groups = tuple(white_groups) if white_groups is not None else ()
 
         self.fail_cb = fail_cb
 
+    @property
+    def owner(self) -> str | None:
+        return self.registry.owner
+
+    @property
+    def super_users(self) -> frozenset[str]:
+        return self.registry.super_users
+
+    @property
+    def white_users(self) -> frozenset[str]:
+        return self.registry.white_users
+
+    @property
+    def black_users(self) -> frozenset[str]:
+        return self.registry.black_users
+
     def get(
         self,
         role: LevelRole,
@@ -164,9 +360,6 @@ class MsgCheckerFactory:
         """
         return MsgChecker(
             role,
-            self.owner,
-            self.super_users,
-            self.white_users,
-            self.black_users,
-            self.fail_cb if fail_cb is None else fail_cb,
+            fail_cb=self.fail_cb if fail_cb is None else fail_cb,
+            registry=self.registry,
         )
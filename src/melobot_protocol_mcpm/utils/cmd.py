@@ -1,5 +1,9 @@
+import json
+
 from typing_extensions import TYPE_CHECKING
 
+from .text import JsonText, JsonTextTemplate
+
 if TYPE_CHECKING:
     from ..adapter.action import (
         CmdAction,
@@ -17,10 +21,18 @@ class CmdFactory:
         return action.cmd
 
     async def create_send_msg(self, action: "SendMsgAction") -> str:
-        if isinstance(action.message, str):
-            return f'tellraw {action.target} \"{action.message}\"'
+        msg = action.message
+        if isinstance(msg, str):
+            text = json.dumps(msg, ensure_ascii=False)
+        elif isinstance(msg, JsonText):
+            text = msg.format()
+        elif isinstance(msg, JsonTextTemplate):
+            text = msg.format(action.fields)
+        elif all(isinstance(m, (str, JsonText)) for m in msg):
+            text = JsonText.formats(*msg)
         else:
             raise ValueError("暂不支持的消息格式")
+        return f"tellraw {action.target} {text}"
 
     async def create_send_broadcast_msg(self, action: "SendBroadcastMsgAction") -> str:
         return await self.create_send_msg(action)
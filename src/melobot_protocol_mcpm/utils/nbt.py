@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import gzip
+import struct
+import zlib
+
+from typing_extensions import Any
+
+_TAG_END = 0
+_STRUCTS = {
+    1: struct.Struct(">b"),
+    2: struct.Struct(">h"),
+    3: struct.Struct(">i"),
+    4: struct.Struct(">q"),
+    5: struct.Struct(">f"),
+    6: struct.Struct(">d"),
+}
+_ARRAY_ITEM = {7: "b", 11: "i", 12: "q"}
+_USHORT = struct.Struct(">H")
+_INT = struct.Struct(">i")
+
+
+class _Reader:
+    __slots__ = ("buf", "pos")
+
+    def __init__(self, buf: bytes) -> None:
+        self.buf = buf
+        self.pos = 0
+
+    def string(self) -> str:
+        (n,) = _USHORT.unpack_from(self.buf, self.pos)
+        start = self.pos + 2
+        self.pos = start + n
+        # NBT 使用 Java 的 modified UTF-8，常见内容与 UTF-8 一致
+        return self.buf[start : self.pos].decode("utf-8", errors="replace")
+
+    def payload(self, tag: int) -> Any:
+        buf = self.buf
+        if (st := _STRUCTS.get(tag)) is not None:
+            (val,) = st.unpack_from(buf, self.pos)
+            self.pos += st.size
+            return val
+        if tag == 8:
+            return self.string()
+        if tag == 10:
+            ret: dict[str, Any] = {}
+            while (child := buf[self.pos]) != _TAG_END:
+                self.pos += 1
+                name = self.string()
+                ret[name] = self.payload(child)
+            self.pos += 1
+            return ret
+        if tag == 9:
+            item = buf[self.pos]
+            (n,) = _INT.unpack_from(buf, self.pos + 1)
+            self.pos += 5
+            return [self.payload(item) for _ in range(max(n, 0))]
+        if (fmt := _ARRAY_ITEM.get(tag)) is not None:
+            (n,) = _INT.unpack_from(buf, self.pos)
+            self.pos += 4
+            ret_arr = list(struct.unpack_from(f">{n}{fmt}", buf, self.pos))
+            self.pos += n * struct.calcsize(fmt)
+            return ret_arr
+        raise ValueError(f"无效的 NBT 标签类型 {tag}，位置 {self.pos}")
+
+
+def loads_nbt(data: bytes) -> tuple[str, Any]:
+    """解析二进制 NBT，自动识别 gzip 或 zlib 压缩
+
+    复合标签解析为 :class:`dict`，列表和数组标签解析为 :class:`list`，数值标签解析为 :class:`int`
+    或 :class:`float`
+
+    :param data: NBT 数据
+    :return: 根标签的名称和值
+    """
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    elif data[:1] == b"\x78":
+        data = zlib.decompress(data)
+    reader = _Reader(data)
+    try:
+        tag = data[0]
+        reader.pos = 1
+        name = reader.string()
+        return name, reader.payload(tag)
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"NBT 数据不完整：{e}") from None
@@ -2,8 +2,16 @@ import re
 import sys
 from functools import lru_cache
 
+from typing_extensions import ClassVar
+
 
 class RegexPatternGroup:
+    """原版服务端的正则表达式组，也是其他服务端正则表达式组的基类"""
+
+    profile: ClassVar[str] = "vanilla"
+    # 启动日志中能识别出该服务端的行，原版服务端作为默认值不需要识别
+    detect: ClassVar[re.Pattern | None] = None
+
     line = re.compile(
         r"\[(?P<hour>\d+):(?P<min>\d+):(?P<sec>\d+)]"
         r" \[(?P<thread>[^]]+)/(?P<logging>[^]/]+)]"
@@ -21,6 +29,115 @@ class RegexPatternGroup:
         r'Done \([0-9.]+s\)! For help, type "help"( or "\?")?'
     )
     rcon_started = re.compile(r"RCON running on [\w.]+:\d+")
+    tick_mspt = re.compile(r"Average time per tick: (?P<mspt>[0-9.]+)ms")
+    cant_keep_up = re.compile(
+        r"Can't keep up! Is the server overloaded\?"
+        r" Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind"
+    )
+    player_list = re.compile(
+        r"There are (?P<count>\d+)(?: of a max(?:imum)? of |/)(?P<max>\d+) players online:"
+        r"(?P<names>.*)"
+    )
+    data_get = re.compile(
+        r"(?P<target>.+?) has the following (?:entity data|block data|contents): (?P<snbt>.*)",
+        re.S,
+    )
+    score_get = re.compile(r"(?P<target>.+) has (?P<score>-?\d+) \[(?P<objective>.+)\]")
+    time_query = re.compile(r"The time is (?P<time>-?\d+)")
+
+
+class PaperPatternGroup(RegexPatternGroup):
+    """Paper、Spigot 及其衍生服务端的正则表达式组
+
+    控制台输出的行格式为 ``[12:00:00 INFO]: ...``，日志文件中仍为原版格式
+    """
+
+    profile = "paper"
+    detect = re.compile(
+        r"This server is running (?:Paper|Purpur|Folia|Pufferfish|Spigot|CraftBukkit) version"
+    )
+    line = re.compile(
+        r"\[(?P<hour>\d+):(?P<min>\d+):(?P<sec>\d+)"
+        r"(?:] \[(?P<thread>[^]]+)/| )(?P<logging>[^]/ ]+)]"
+        r": (?P<content>.*)"
+    )
+
+
+class FabricPatternGroup(RegexPatternGroup):
+    """Fabric、Quilt 服务端的正则表达式组，行格式为 ``[12:00:00] [Server thread/INFO] (Minecraft) ...``"""
+
+    profile = "fabric"
+    detect = re.compile(r"Loading Minecraft \S+ with (?:Fabric|Quilt) Loader")
+    line = re.compile(
+        r"\[(?P<hour>\d+):(?P<min>\d+):(?P<sec>\d+)]"
+        r" \[(?P<thread>[^]]+)/(?P<logging>[^]/]+)]"
+        r"(?: \((?P<logger>[^)]+)\) |: )(?P<content>.*)"
+    )
+
+
+class ForgePatternGroup(RegexPatternGroup):
+    """Forge、NeoForge 服务端的正则表达式组，行格式为 ``[12:00:00] [Server thread/INFO] [minecraft/DedicatedServer]: ...``"""
+
+    profile = "forge"
+    detect = re.compile(
+        r"ModLauncher running: |(?:Neo)?Forge mod loading, version"
+        r"|Launching target '(?:forge|neoforge|fml)server"
+    )
+    line = re.compile(
+        r"\[(?P<hour>\d+):(?P<min>\d+):(?P<sec>\d+)]"
+        r" \[(?P<thread>[^]]+)/(?P<logging>[^]/]+)]"
+        r"(?: \[(?P<logger>[^]]+)])?: (?P<content>.*)"
+    )
+
+
+class VelocityPatternGroup(PaperPatternGroup):
+    """Velocity 代理端的正则表达式组
+
+    代理端不输出聊天消息，只匹配玩家连接和断开
+    """
+
+    profile = "velocity"
+    detect = re.compile(r"Booting up Velocity ")
+    msg: list[re.Pattern] = []
+    player_joined = re.compile(
+        r"\[connected player] (?P<name>[^ ]+) \(/[^)]+\) has connected"
+    )
+    player_left = re.compile(
+        r"\[connected player] (?P<name>[^ ]+) \(/[^)]+\) has disconnected"
+    )
+    server_version = re.compile(r"Booting up Velocity (?P<version>\S+)\.\.\.")
+    server_address = re.compile(r"Listening on /(?P<ip>\S+):(?P<port>\d+)")
+    server_startup_done = re.compile(r"Done \([0-9.]+s\)!")
+
+
+PATTERN_PROFILES: tuple[type[RegexPatternGroup], ...] = (
+    ForgePatternGroup,
+    FabricPatternGroup,
+    PaperPatternGroup,
+    VelocityPatternGroup,
+)
+_PROFILE_DETECT = re.compile(
+    "|".join(
+        f"(?P<{cls.profile}>{cls.detect.pattern})"
+        for cls in PATTERN_PROFILES
+        if cls.detect is not None
+    )
+)
+
+
+def detect_pattern_group(line: str) -> type[RegexPatternGroup] | None:
+    """根据服务端启动时输出的一行识别服务端类型
+
+    :param line: 服务端输出的行
+    :return: 对应的正则表达式组，该行不能识别服务端类型时返回空值
+    """
+    matched = _PROFILE_DETECT.search(line)
+    if matched is None:
+        return None
+    for cls in PATTERN_PROFILES:
+        if matched.group(cls.profile) is not None:
+            return cls
+    return None
 
 
 @lru_cache
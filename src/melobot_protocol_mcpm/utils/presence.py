@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import re
+import time
+
+from typing_extensions import Iterable
+
+from .pattern import search
+
+
+class PlayerPresence:
+    """服务端在线玩家的索引
+
+    由玩家进出事件维护，也可以用 ``list`` 命令的回应校准
+    """
+
+    def __init__(self) -> None:
+        self._sessions: dict[str, float] = {}
+        self._playtime: dict[str, float] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(online={len(self._sessions)})"
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def online(self) -> frozenset[str]:
+        """当前在线的玩家"""
+        return frozenset(self._sessions)
+
+    def is_online(self, name: str) -> bool:
+        return name in self._sessions
+
+    def session_start(self, name: str) -> float | None:
+        """玩家本次会话的开始时间戳，不在线时为 None"""
+        return self._sessions.get(name)
+
+    def playtime(self, name: str, now: float | None = None) -> float:
+        """玩家的累计在线时长（秒），包含当前会话
+
+        :param name: 玩家名称
+        :param now: 计算当前会话时长所用的时间戳，为空时使用当前时间
+        :return: 累计在线时长
+        """
+        total = self._playtime.get(name, 0.0)
+        if (start := self._sessions.get(name)) is not None:
+            total += (time.time() if now is None else now) - start
+        return total
+
+    def join(self, name: str, ts: float | None = None) -> None:
+        if name not in self._sessions:
+            self._sessions[name] = time.time() if ts is None else ts
+
+    def leave(self, name: str, ts: float | None = None) -> None:
+        if (start := self._sessions.pop(name, None)) is not None:
+            end = time.time() if ts is None else ts
+            self._playtime[name] = self._playtime.get(name, 0.0) + max(end - start, 0.0)
+
+    def reconcile(self, names: Iterable[str], ts: float | None = None) -> None:
+        """以给定的在线玩家为准，校准在线状态
+
+        :param names: 当前实际在线的玩家
+        :param ts: 校准时的时间戳，为空时使用当前时间
+        """
+        ts = time.time() if ts is None else ts
+        names = set(names)
+        for name in self._sessions.keys() - names:
+            self.leave(name, ts)
+        for name in names:
+            self.join(name, ts)
+
+    def reconcile_list(self, pattern: re.Pattern, resp: str, ts: float | None = None) -> bool:
+        """用 ``list`` 命令的回应校准在线状态
+
+        :param pattern: 匹配 ``list`` 命令回应的正则表达式
+        :param resp: ``list`` 命令的回应
+        :param ts: 校准时的时间戳，为空时使用当前时间
+        :return: 回应是否能被解析
+        """
+        matched = search(pattern, resp)
+        if matched is None:
+            return False
+        names = (n.strip() for n in matched.group("names").split(","))
+        self.reconcile((n for n in names if n), ts)
+        return True
+
+    def clear(self, ts: float | None = None) -> None:
+        """结束所有在线玩家的会话"""
+        self.reconcile((), ts)
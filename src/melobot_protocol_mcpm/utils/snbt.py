@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import re
+
+from typing_extensions import Any, Iterator
+
+_WS = re.compile(r"\s*")
+_UNQUOTED = re.compile(r"[0-9A-Za-z_\-.+]+")
+_NUMBER = re.compile(
+    r"(?P<num>[-+]?(?:\d+(?P<dot>\.\d*)?|(?P<frac>\.\d+))(?P<exp>[eE][-+]?\d+)?)"
+    r"(?:[uUsS]?(?P<int>[bBsSlL])|(?P<float>[fFdD]))?"
+)
+_STRINGS = {
+    '"': re.compile(r'"((?:[^"\\]|\\.)*)"', re.S),
+    "'": re.compile(r"'((?:[^'\\]|\\.)*)'", re.S),
+}
+_ESCAPE = re.compile(r"\\(.)", re.S)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "s": " "}
+# 跳过值时只需关心括号和引号
+_SPECIAL = re.compile(r"[\"'{}\[\]]")
+_PATH_TOKEN = re.compile(r"\.?(?:\"((?:[^\"\\]|\\.)*)\"|([^.\[\]\"]+))|\[(-?\d+)\]")
+_ARRAY_TYPES = frozenset("BIL")
+
+
+def _unescape(s: str) -> str:
+    return _ESCAPE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), s) if "\\" in s else s
+
+
+def _number(token: str) -> int | float | None:
+    matched = _NUMBER.fullmatch(token)
+    if matched is None:
+        return None
+    is_float = matched.group("dot") or matched.group("frac") or matched.group("exp")
+    if matched.group("float") or is_float:
+        return float(matched.group("num"))
+    return int(matched.group("num"))
+
+
+def parse_snbt_path(path: str) -> list[str | int]:
+    """解析 NBT 路径，如 ``Inventory[0].tag."custom name"``
+
+    :param path: NBT 路径，为空字符串时表示根
+    :return: 由复合标签的键和列表的下标组成的路径
+    """
+    ret: list[str | int] = []
+    pos = 0
+    while pos < len(path):
+        matched = _PATH_TOKEN.match(path, pos)
+        if matched is None or (pos == 0 and path[0] == "."):
+            raise ValueError(f"无效的 NBT 路径：{path!r}，位置 {pos}")
+        quoted, key, index = matched.groups()
+        if index is not None:
+            ret.append(int(index))
+        else:
+            ret.append(_unescape(quoted) if quoted is not None else key)
+        pos = matched.end()
+    return ret
+
+
+class SnbtParser:
+    """SNBT 文本的流式解析器
+
+    按需向前扫描：不需要的值只做括号匹配跳过，不构建对象，因此可以从很大的实体数据中快速提取单个字段
+
+    复合标签解析为 :class:`dict`，列表和数组解析为 :class:`list`，带 ``b``、``s``、``l`` 后缀和不带小数点
+    的数值解析为 :class:`int`，其他数值解析为 :class:`float`，其余为 :class:`str`
+    """
+
+    __slots__ = ("text", "pos")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.pos = 0
+
+    def _error(self, msg: str) -> ValueError:
+        return ValueError(f"{msg}，位置 {self.pos}：{self.text[self.pos : self.pos + 20]!r}")
+
+    def _ws(self) -> str:
+        self.pos = _WS.match(self.text, self.pos).end()  # type: ignore[union-attr]
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def _expect(self, ch: str) -> None:
+        if self._ws() != ch:
+            raise self._error(f"应为 {ch!r}")
+        self.pos += 1
+
+    def _string(self) -> str:
+        text, pos = self.text, self.pos
+        if (pattern := _STRINGS.get(text[pos : pos + 1])) is not None:
+            matched = pattern.match(text, pos)
+            if matched is None:
+                raise self._error("字符串未闭合")
+            self.pos = matched.end()
+            return _unescape(matched.group(1))
+        matched = _UNQUOTED.match(text, pos)
+        if matched is None:
+            raise self._error("应为字符串")
+        self.pos = matched.end()
+        return matched.group()
+
+    def _array_type(self) -> str | None:
+        # 形如 [I; 1, 2] 的数组
+        text, pos = self.text, self.pos
+        if text[pos + 1 : pos + 2] in _ARRAY_TYPES and text[pos + 2 : pos + 3] == ";":
+            return text[pos + 1]
+        return None
+
+    def value(self) -> Any:
+        """解析当前位置的一个值"""
+        ch = self._ws()
+        if ch == "{":
+            self.pos += 1
+            ret: dict[str, Any] = {}
+            for key in self._keys():
+                ret[key] = self.value()
+            return ret
+        if ch == "[":
+            if self._array_type() is not None:
+                self.pos += 2
+            self.pos += 1
+            ret_list = []
+            for _ in self._elements():
+                ret_list.append(self.value())
+            return ret_list
+        if ch in _STRINGS:
+            return self._string()
+        token = self._string()
+        if (num := _number(token)) is not None:
+            return num
+        if token in ("true", "false"):
+            return int(token == "true")
+        return token
+
+    def skip(self) -> None:
+        """跳过当前位置的一个值"""
+        ch = self._ws()
+        if ch not in ("{", "["):
+            self._string()
+            return
+        text = self.text
+        depth = 0
+        pos = self.pos
+        while (matched := _SPECIAL.search(text, pos)) is not None:
+            c = matched.group()
+            if c in _STRINGS:
+                quoted = _STRINGS[c].match(text, matched.start())
+                if quoted is None:
+                    self.pos = matched.start()
+                    raise self._error("字符串未闭合")
+                pos = quoted.end()
+                continue
+            depth += 1 if c in "{[" else -1
+            pos = matched.end()
+            if depth == 0:
+                self.pos = pos
+                return
+        raise self._error("括号未闭合")
+
+    def _keys(self) -> Iterator[str]:
+        # 调用方必须在每次迭代中消耗掉键对应的值
+        if self._ws() == "}":
+            self.pos += 1
+            return
+        while True:
+            self._ws()
+            key = self._string()
+            self._expect(":")
+            yield key
+            ch = self._ws()
+            self.pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                self.pos -= 1
+                raise self._error("应为 ',' 或 '}'")
+
+    def _elements(self) -> Iterator[int]:
+        if self._ws() == "]":
+            self.pos += 1
+            return
+        i = 0
+        while True:
+            yield i
+            i += 1
+            ch = self._ws()
+            self.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                self.pos -= 1
+                raise self._error("应为 ',' 或 ']'")
+
+    def seek(self, path: list[str | int]) -> bool:
+        """移动到路径指向的值之前，其余的值全部跳过
+
+        :param path: 由 :func:`parse_snbt_path` 得到的路径
+        :return: 路径是否存在
+        """
+        for part in path:
+            ch = self._ws()
+            if isinstance(part, str):
+                if ch != "{":
+                    return False
+                self.pos += 1
+                for key in self._keys():
+                    if key == part:
+                        break
+                    self.skip()
+                else:
+                    return False
+                continue
+
+            if ch != "[":
+                return False
+            if self._array_type() is not None:
+                self.pos += 2
+            self.pos += 1
+            if part < 0:
+                starts = []
+                for _ in self._elements():
+                    starts.append(self.pos)
+                    self.skip()
+                if -part > len(starts):
+                    return False
+                self.pos = starts[part]
+                continue
+            for i in self._elements():
+                if i == part:
+                    break
+                self.skip()
+            else:
+                return False
+        return True
+
+    def iter_items(self) -> Iterator[tuple[str | int, Any]]:
+        """逐个解析当前位置的复合标签或列表中的元素
+
+        :return: （键或下标，值）的迭代器
+        """
+        ch = self._ws()
+        if ch == "{":
+            self.pos += 1
+            for key in self._keys():
+                yield key, self.value()
+        elif ch == "[":
+            if self._array_type() is not None:
+                self.pos += 2
+            self.pos += 1
+            for i in self._elements():
+                yield i, self.value()
+        else:
+            raise self._error("应为复合标签或列表")
+
+
+def loads_snbt(text: str) -> Any:
+    """完整解析 SNBT 文本
+
+    :param text: SNBT 文本
+    :return: 解析结果
+    """
+    parser = SnbtParser(text)
+    ret = parser.value()
+    if parser._ws() != "":
+        raise parser._error("SNBT 结尾有多余内容")
+    return ret
+
+
+_MISSING: Any = object()
+
+
+def extract_snbt(text: str, path: str, default: Any = _MISSING) -> Any:
+    """从 SNBT 文本中只解析路径指向的值，路径以外的部分只扫描不构建
+
+    :param text: SNBT 文本
+    :param path: NBT 路径，如 ``Inventory[0].id``、``Pos[-1]``
+    :param default: 路径不存在时返回的值，未提供时抛出 :class:`KeyError`
+    :return: 路径指向的值
+    """
+    parser = SnbtParser(text)
+    if parser.seek(parse_snbt_path(path)):
+        return parser.value()
+    if default is _MISSING:
+        raise KeyError(f"SNBT 中不存在路径 {path!r}")
+    return default
+
+
+def iter_snbt(text: str, path: str = "") -> Iterator[tuple[str | int, Any]]:
+    """流式遍历路径指向的复合标签或列表，每次只解析一个元素
+
+    :param text: SNBT 文本
+    :param path: NBT 路径，为空字符串时遍历根
+    :return: （键或下标，值）的迭代器，路径不存在时为空
+    """
+    parser = SnbtParser(text)
+    if parser.seek(parse_snbt_path(path)):
+        yield from parser.iter_items()
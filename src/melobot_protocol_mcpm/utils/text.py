@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import json
 import re
+from string import Formatter
 
-from typing_extensions import Any, Literal, TypeAlias, cast
+from typing_extensions import Any, Literal, Mapping, TypeAlias, cast
 
 CommonColorType: TypeAlias = Literal[
     "black",
@@ -165,10 +166,92 @@ class JsonText:
         if hover_event:
             self._data["hoverEvent"] = hover_event
 
+        self._formatted: str | None = None
+
     def format(self) -> str:
-        return json.dumps(self._data, ensure_ascii=False)
+        if self._formatted is None:
+            self._formatted = json.dumps(self._data, ensure_ascii=False)
+        return self._formatted
 
     @staticmethod
     def formats(*content: str | JsonText) -> str:
         texts = [t if isinstance(t, JsonText) else JsonText(t) for t in content]
-        return json.dumps([t._data for t in texts], ensure_ascii=False)
+        # 与 json.dumps 列表的默认分隔符保持一致，复用每个元素已缓存的序列化结果
+        return f"[{', '.join(t.format() for t in texts)}]"
+
+
+class JsonTextTemplate:
+    """预编译的 json 文本模板
+
+    文本中形如 ``{name}`` 的部分为动态字段（``{{``、``}}`` 表示字面量的花括号）。
+    静态部分只在初始化时序列化一次，渲染时仅对动态字段的值进行转义和拼接
+    """
+
+    _SENTINEL = "\x00"
+    _ESCAPED_SENTINEL = "\\u0000"
+
+    def __init__(self, *content: str | JsonText) -> None:
+        """初始化一个 json 文本模板
+
+        :param content: 模板内容，只有一个元素时生成 json 对象，否则生成 json 数组
+        """
+        if len(content) == 0:
+            raise ValueError("模板内容不能为空")
+
+        texts = [t if isinstance(t, JsonText) else JsonText(t) for t in content]
+        self.fields: set[str] = set()
+        data: Any
+        if len(texts) == 1:
+            data = self._mark(texts[0]._data)
+        else:
+            data = [self._mark(t._data) for t in texts]
+
+        parts = json.dumps(data, ensure_ascii=False).split(self._ESCAPED_SENTINEL)
+        # 偶数位为静态片段，奇数位为字段名
+        self._parts: tuple[str, ...] = tuple(parts)
+        self._static: str | None = parts[0] if len(parts) == 1 else None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(fields={sorted(self.fields)!r})"
+
+    def _mark(self, obj: Any) -> Any:
+        if isinstance(obj, str):
+            return self._mark_str(obj)
+        if isinstance(obj, dict):
+            return {k: self._mark(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [self._mark(v) for v in obj]
+        return obj
+
+    def _mark_str(self, s: str) -> str:
+        if self._SENTINEL in s or self._ESCAPED_SENTINEL in s:
+            raise ValueError("模板文本中不能包含 NUL 字符或其转义序列")
+        segs: list[str] = []
+        for literal, name, spec, conv in Formatter().parse(s):
+            segs.append(literal)
+            if name is None:
+                continue
+            if not name.isidentifier() or spec or conv:
+                raise ValueError(f"无效的模板字段：{{{name}}}，字段只能是合法标识符")
+            self.fields.add(name)
+            segs.append(f"{self._SENTINEL}{name}{self._SENTINEL}")
+        return "".join(segs)
+
+    def format(self, fields: Mapping[str, Any] | None = None, /, **kwargs: Any) -> str:
+        """渲染模板，获得 json 文本
+
+        :param fields: 字段值的映射
+        :param kwargs: 字段值，会覆盖 `fields` 中的同名字段
+        :return: json 文本
+        """
+        if self._static is not None:
+            return self._static
+
+        values = dict(fields, **kwargs) if fields is not None else kwargs
+        parts = list(self._parts)
+        try:
+            for i in range(1, len(parts), 2):
+                parts[i] = json.dumps(str(values[parts[i]]), ensure_ascii=False)[1:-1]
+        except KeyError as e:
+            raise ValueError(f"渲染模板时缺少字段：{e.args[0]}") from None
+        return "".join(parts)
@@ -0,0 +1,3 @@
+from .backup import BackupResult, WorldBackup
+from .player import PlayerDataReader
+from .region import ChunkEntry, PruneResult, RegionFile, RegionStats, WorldRegions, prune_region
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from melobot.log import logger
+from typing_extensions import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    from ..io.manager import ServerManager
+
+_FICLONE = 0x40049409
+_MANIFEST = ".manifest.json"
+_SKIP_FILES = frozenset(("session.lock",))
+
+
+@dataclass(frozen=True)
+class BackupResult:
+    """一次备份的结果
+
+    :ivar str name: 备份名称
+    :ivar Path path: 备份目录
+    :ivar int files: 文件总数
+    :ivar int hashed: 因大小或修改时间变化而重新计算哈希的文件数
+    :ivar int stored: 内容是新的、需要复制的文件数
+    :ivar int bytes_total: 备份的总字节数
+    :ivar int bytes_stored: 实际复制的字节数
+    :ivar float flush_secs: ``save-all flush`` 的耗时（秒）
+    :ivar float snapshot_secs: 生成快照的耗时（秒）
+    :ivar float save_off_secs: 自动保存被关闭的总时长（秒）
+    :ivar float total_secs: 备份的总耗时（秒）
+    """
+
+    name: str
+    path: Path
+    files: int
+    hashed: int
+    stored: int
+    bytes_total: int
+    bytes_stored: int
+    flush_secs: float
+    snapshot_secs: float
+    save_off_secs: float
+    total_secs: float
+
+
+class WorldBackup:
+    """增量的存档备份
+
+    备份期间关闭服务端的自动保存。文件按内容哈希存入对象目录，每个备份只是指向对象的硬链接，
+    因此未变化的文件不占用额外空间。大小和修改时间都未变化的文件直接沿用上次的哈希，不再读取
+    """
+
+    def __init__(
+        self,
+        manager: ServerManager,
+        backup_dir: str | Path,
+        generations: int = 7,
+        workers: int = 4,
+        extra_dirs: Sequence[str] = (),
+        flush_wait: float = 10,
+    ) -> None:
+        """初始化一个存档备份器
+
+        :param manager: 服务端管理器，存档位于其 ``root_dir`` 下
+        :param backup_dir: 备份目录，需要与存档位于同一文件系统才能使用反射链接
+        :param generations: 保留的备份数
+        :param workers: 计算哈希和复制文件的线程数
+        :param extra_dirs: 额外备份的目录（相对于 ``root_dir``），
+            默认只备份存档目录及 Bukkit 风格的 ``_nether``、``_the_end`` 目录
+        :param flush_wait: 未启用 RCON 时无法得知保存何时完成，发送 ``save-all flush`` 后等待的时间（秒）
+        """
+        if generations < 1:
+            raise ValueError("至少需要保留一个备份")
+        self.manager = manager
+        self.backup_dir = Path(backup_dir).resolve()
+        self.generations = generations
+        self.workers = workers
+        self.extra_dirs = tuple(extra_dirs)
+        self.flush_wait = flush_wait
+
+        self.objects_dir = self.backup_dir / "objects"
+        self.snapshots_dir = self.backup_dir / "snapshots"
+        self._lock = asyncio.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(dir={str(self.backup_dir)!r}, gens={self.generations})"
+
+    def snapshots(self) -> list[Path]:
+        """已有的备份，从旧到新排列"""
+        if not self.snapshots_dir.is_dir():
+            return []
+        return sorted(p for p in self.snapshots_dir.iterdir() if (p / _MANIFEST).is_file())
+
+    def _source_dirs(self) -> list[Path]:
+        world = self.manager.world_dir
+        dirs = [
+            world,
+            world.with_name(f"{world.name}_nether"),
+            world.with_name(f"{world.name}_the_end"),
+        ]
+        dirs.extend(self.manager.root_dir / d for d in self.extra_dirs)
+        return [d for d in dirs if d.is_dir()]
+
+    async def snapshot(self) -> BackupResult:
+        """关闭自动保存并落盘，生成一个增量备份，然后恢复自动保存
+
+        服务端未运行时直接生成备份
+
+        :return: 备份结果
+        """
+        async with self._lock:
+            if not self.manager.opened():
+                result = await self._snapshot()
+                await asyncio.to_thread(self._prune)
+                return replace(result, total_secs=result.snapshot_secs)
+
+            start = time.perf_counter()
+            await self.manager.send_cmd("save-off")
+            save_off_ts = time.perf_counter()
+            try:
+                resp = await self.manager.send_cmd("save-all flush")
+                if self.manager.rcon_host is None:
+                    await asyncio.sleep(self.flush_wait)
+                elif "Saved" not in resp:
+                    logger.warning(f"服务端 {self.manager.name} 的保存回应异常：{resp!r}")
+                flush_ts = time.perf_counter()
+                result = await self._snapshot()
+            finally:
+                await self.manager.send_cmd("save-on")
+            end = time.perf_counter()
+
+            result = replace(
+                result,
+                flush_secs=flush_ts - save_off_ts,
+                save_off_secs=end - save_off_ts,
+                total_secs=end - start,
+            )
+            logger.info(
+                f"服务端 {self.manager.name} 备份 {result.name} 完成：{result.files} 个文件，"
+                f"复制 {result.stored} 个（{result.bytes_stored} 字节），"
+                f"自动保存关闭 {result.save_off_secs:.2f}s"
+            )
+            await asyncio.to_thread(self._prune)
+            return result
+
+    async def _snapshot(self) -> BackupResult:
+        start = time.perf_counter()
+        snapshots = self.snapshots()
+        prev: dict[str, list] = {}
+        if len(snapshots):
+            prev = json.loads((snapshots[-1] / _MANIFEST).read_text(encoding="utf-8"))
+
+        name = time.strftime("%Y%m%d-%H%M%S")
+        while (self.snapshots_dir / name).exists():
+            name = f"{name}_"
+        dest = self.snapshots_dir / name
+        tmp = self.snapshots_dir / f".{name}.tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        files = await asyncio.to_thread(self._scan)
+        manifest: dict[str, list] = {}
+        loop = asyncio.get_running_loop()
+        hashed = stored = bytes_total = bytes_stored = 0
+        try:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="mcpm-backup") as pool:
+                futs = []
+                for rel, src, size, mtime in files:
+                    bytes_total += size
+                    old = prev.get(rel)
+                    digest = old[2] if old is not None and old[:2] == [size, mtime] else None
+                    futs.append(loop.run_in_executor(pool, self._store, src, tmp / rel, digest))
+                for (rel, _, size, mtime), (digest, was_hashed, was_stored) in zip(
+                    files, await asyncio.gather(*futs)
+                ):
+                    manifest[rel] = [size, mtime, digest]
+                    hashed += was_hashed
+                    stored += was_stored
+                    bytes_stored += size if was_stored else 0
+
+            (tmp / _MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+            os.replace(tmp, dest)
+        except BaseException:
+            await asyncio.to_thread(shutil.rmtree, tmp, True)
+            raise
+        return BackupResult(
+            name=name,
+            path=dest,
+            files=len(files),
+            hashed=hashed,
+            stored=stored,
+            bytes_total=bytes_total,
+            bytes_stored=bytes_stored,
+            flush_secs=0,
+            snapshot_secs=time.perf_counter() - start,
+            save_off_secs=0,
+            total_secs=0,
+        )
+
+    def _scan(self) -> list[tuple[str, Path, int, int]]:
+        ret = []
+        root = self.manager.root_dir
+        for base in self._source_dirs():
+            for dirpath, _, filenames in os.walk(base):
+                for fname in filenames:
+                    if fname in _SKIP_FILES:
+                        continue
+                    path = Path(dirpath, fname)
+                    st = path.stat()
+                    ret.append(
+                        (path.relative_to(root).as_posix(), path, st.st_size, st.st_mtime_ns)
+                    )
+        return ret
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _store(self, src: Path, dest: Path, digest: str | None) -> tuple[str, bool, bool]:
+        # 对象可能已被清理，此时需要重新读取文件
+        was_hashed = digest is None or not self._object_path(digest).is_file()
+        if digest is None or was_hashed:
+            h = hashlib.blake2b(digest_size=20)
+            with open(src, "rb") as fp:
+                while chunk := fp.read(1 << 20):
+                    h.update(chunk)
+            digest = h.hexdigest()
+
+        obj = self._object_path(digest)
+        was_stored = not obj.is_file()
+        if was_stored:
+            obj.parent.mkdir(exist_ok=True)
+            # 内容相同的文件可能同时在多个线程中存入，每次存入使用各自的临时文件，
+            # 对象已被其他线程存入时视为成功
+            fd, part = tempfile.mkstemp(prefix=f".{digest}.", suffix=".part", dir=obj.parent)
+            os.close(fd)
+            try:
+                self._copy(src, Path(part))
+                os.link(part, obj)
+            except FileExistsError:
+                was_stored = False
+            finally:
+                os.unlink(part)
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.link(obj, dest)
+        return digest, was_hashed, was_stored
+
+    @staticmethod
+    def _copy(src: Path, dest: Path) -> None:
+        # 优先使用反射链接（btrfs、xfs 等），只复制元数据
+        with open(src, "rb") as fsrc, open(dest, "wb") as fdest:
+            try:
+                import fcntl
+
+                fcntl.ioctl(fdest.fileno(), _FICLONE, fsrc.fileno())
+                return
+            except (ImportError, OSError):
+                pass
+            shutil.copyfileobj(fsrc, fdest, 1 << 20)
+
+    def _prune(self) -> None:
+        snapshots = self.snapshots()
+        for old in snapshots[: max(len(snapshots) - self.generations, 0)]:
+            shutil.rmtree(old)
+        for tmp in self.snapshots_dir.glob(".*.tmp"):
+            shutil.rmtree(tmp)
+        # 只剩对象目录自身引用的对象不再属于任何备份
+        for obj in self.objects_dir.glob("*/*"):
+            if obj.stat().st_nlink == 1:
+                obj.unlink()
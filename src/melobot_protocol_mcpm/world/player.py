@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from melobot.log import logger
+from typing_extensions import TYPE_CHECKING, Any, Callable
+
+from ..utils.nbt import loads_nbt
+
+if TYPE_CHECKING:
+    from ..io.manager import ServerManager
+
+_UUID = re.compile(r"[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}")
+
+
+def _parse_json(data: bytes) -> Any:
+    return json.loads(data)
+
+
+def _parse_nbt(data: bytes) -> Any:
+    return loads_nbt(data)[1]
+
+
+class PlayerDataReader:
+    """直接读取存档中的玩家数据和统计信息，不向服务端发送命令
+
+    读取 ``playerdata/<uuid>.dat``（gzip 压缩的 NBT）、``stats/<uuid>.json`` 以及服务端根目录下的
+    ``usercache.json``。解压和解析在线程池中进行，结果按文件的修改时间和大小缓存，文件未变化时不再读取。
+    离线玩家同样可以查询；在线玩家的数据只在服务端保存后更新
+    """
+
+    def __init__(self, manager: ServerManager, workers: int = 4) -> None:
+        """初始化玩家数据读取器
+
+        :param manager: 服务端管理器，存档位于其 ``root_dir`` 下
+        :param workers: 读取和解析文件的线程数
+        """
+        self.manager = manager
+        self.workers = workers
+        self._cache: dict[Path, tuple[tuple[int, int], Any]] = {}
+        self._pool: ThreadPoolExecutor | None = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(server={self.manager.name!r}, cached={len(self._cache)})"
+
+    @property
+    def stats_dir(self) -> Path:
+        return self.manager.world_dir / "stats"
+
+    @property
+    def playerdata_dir(self) -> Path:
+        return self.manager.world_dir / "playerdata"
+
+    def close(self) -> None:
+        """关闭线程池并清空缓存"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._cache.clear()
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="mcpm-player")
+        return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+    def _load(self, path: Path, parse: Callable[[bytes], Any]) -> Any:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            self._cache.pop(path, None)
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        try:
+            val = parse(path.read_bytes())
+        except (OSError, EOFError, ValueError) as e:
+            # 服务端可能正在写入，沿用上一次的结果
+            logger.warning(f"服务端 {self.manager.name} 的玩家数据 {path.name} 读取失败：{e}")
+            return cached[1] if cached is not None else None
+        self._cache[path] = (key, val)
+        return val
+
+    async def usercache(self) -> dict[str, str]:
+        """服务端记录的玩家 uuid 到名称的映射（来自 ``usercache.json``）"""
+        entries = await self._run(self._load, self.manager.root_dir / "usercache.json", _parse_json)
+        if not isinstance(entries, list):
+            return {}
+        return {e["uuid"]: e["name"] for e in entries if "uuid" in e and "name" in e}
+
+    async def uuid_of(self, player: str) -> str | None:
+        """获取玩家的 uuid
+
+        :param player: 玩家名称（不区分大小写）或 uuid
+        :return: uuid，找不到时返回空值
+        """
+        if _UUID.fullmatch(player):
+            return player.lower()
+        lowered = player.lower()
+        for uuid, name in (await self.usercache()).items():
+            if name.lower() == lowered:
+                return uuid
+        return None
+
+    async def stats(self, player: str) -> dict[str, dict[str, int]] | None:
+        """读取玩家的统计信息
+
+        :param player: 玩家名称或 uuid
+        :return: 统计类别（如 ``minecraft:custom``）到各项统计值的映射，没有记录时返回空值
+        """
+        if (uuid := await self.uuid_of(player)) is None:
+            return None
+        data = await self._run(self._load, self.stats_dir / f"{uuid}.json", _parse_json)
+        return data.get("stats", {}) if isinstance(data, dict) else None
+
+    async def player_data(self, player: str) -> dict[str, Any] | None:
+        """读取玩家的 NBT 数据（物品栏、位置、经验等）
+
+        :param player: 玩家名称或 uuid
+        :return: 玩家数据的根复合标签，没有记录时返回空值
+        """
+        if (uuid := await self.uuid_of(player)) is None:
+            return None
+        data = await self._run(self._load, self.playerdata_dir / f"{uuid}.dat", _parse_nbt)
+        return data if isinstance(data, dict) else None
+
+    async def all_stats(self) -> dict[str, dict[str, dict[str, int]]]:
+        """并行读取所有玩家的统计信息
+
+        :return: uuid 到统计信息的映射
+        """
+        stats_dir = self.stats_dir
+        paths = await asyncio.to_thread(
+            lambda: sorted(stats_dir.glob("*.json")) if stats_dir.is_dir() else []
+        )
+        results = await asyncio.gather(*(self._run(self._load, p, _parse_json) for p in paths))
+        return {
+            p.stem: data.get("stats", {})
+            for p, data in zip(paths, results)
+            if isinstance(data, dict)
+        }
+
+    async def leaderboard(
+        self, stat: str, category: str = "minecraft:custom", limit: int | None = 10
+    ) -> list[tuple[str, int]]:
+        """某项统计的排行榜，包含离线玩家
+
+        :param stat: 统计项，如 ``minecraft:play_time``
+        :param category: 统计类别，如 ``minecraft:custom``、``minecraft:mined``
+        :param limit: 返回的条目数，为空时返回全部
+        :return: 按统计值从大到小排列的（玩家名称，统计值）列表，名称未知时使用 uuid
+        """
+        all_stats, names = await asyncio.gather(self.all_stats(), self.usercache())
+        board = [
+            (names.get(uuid, uuid), val)
+            for uuid, stats in all_stats.items()
+            if (val := stats.get(category, {}).get(stat))
+        ]
+        board.sort(key=lambda item: item[1], reverse=True)
+        return board if limit is None else board[:limit]
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import asyncio
+import errno
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from melobot.log import logger
+from typing_extensions import TYPE_CHECKING, Any, Callable, Iterator, TypeVar
+
+if TYPE_CHECKING:
+    from ..io.manager import ServerManager
+
+SECTOR = 4096
+_HEADER = SECTOR * 2
+_REGION_NAME = re.compile(r"r\.(?P<x>-?\d+)\.(?P<z>-?\d+)\.mca")
+# 区块 NBT 中名为 InhabitedTime 的 TAG_Long：类型 4，名称长度 13
+_INHABITED_TAG = b"\x04\x00\x0dInhabitedTime"
+_EXTERNAL_FLAG = 128
+# 同一区块在这些目录中有对应的区域文件，裁剪时一并处理
+_SIBLING_DIRS = ("entities", "poi")
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ChunkEntry:
+    """区域文件头中的一个区块记录
+
+    :ivar int index: 区块在区域内的序号（``x + z * 32``）
+    :ivar int sector: 数据起始扇区
+    :ivar int sectors: 占用的扇区数
+    :ivar int timestamp: 最后保存的时间（Unix 时间戳，秒）
+    """
+
+    index: int
+    sector: int
+    sectors: int
+    timestamp: int
+
+
+@dataclass(frozen=True)
+class RegionStats:
+    """一个区域文件的统计信息
+
+    :ivar Path path: 区域文件路径
+    :ivar int x: 区域的 x 坐标
+    :ivar int z: 区域的 z 坐标
+    :ivar int file_size: 文件大小（字节）
+    :ivar int chunks: 已生成的区块数
+    :ivar int used_bytes: 区块数据占用的字节数（按扇区计）
+    :ivar int | None oldest: 最早的区块保存时间
+    :ivar int | None newest: 最晚的区块保存时间
+    :ivar int | None inhabited_total: 所有区块 InhabitedTime（刻）的总和，未读取时为空
+    :ivar int | None unvisited: InhabitedTime 为 0 的区块数，未读取时为空
+    """
+
+    path: Path
+    x: int
+    z: int
+    file_size: int
+    chunks: int
+    used_bytes: int
+    oldest: int | None
+    newest: int | None
+    inhabited_total: int | None = None
+    unvisited: int | None = None
+
+
+@dataclass(frozen=True)
+class PruneResult:
+    """区块裁剪的结果
+
+    :ivar int regions: 被改写的区域文件数
+    :ivar int chunks: 被删除的区块数
+    :ivar int bytes_before: 改写前区域文件的总大小
+    :ivar int bytes_after: 改写后区域文件的总大小
+    """
+
+    regions: int
+    chunks: int
+    bytes_before: int
+    bytes_after: int
+
+
+class RegionFile:
+    """以内存映射方式只读打开的 Anvil 区域文件"""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        matched = _REGION_NAME.fullmatch(self.path.name)
+        if matched is None:
+            raise ValueError(f"不是区域文件：{self.path}")
+        self.x, self.z = int(matched.group("x")), int(matched.group("z"))
+        self.size = self.path.stat().st_size
+        self._mm: mmap.mmap | None = None
+        if self.size >= _HEADER:
+            with open(self.path, "rb") as fp:
+                self._mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(path={str(self.path)!r})"
+
+    def __enter__(self) -> RegionFile:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def entries(self) -> Iterator[ChunkEntry]:
+        """遍历文件头中已生成的区块，不读取区块数据"""
+        if self._mm is None:
+            return
+        locations = struct.unpack_from(">1024I", self._mm, 0)
+        timestamps = struct.unpack_from(">1024I", self._mm, SECTOR)
+        for i, loc in enumerate(locations):
+            if loc != 0:
+                yield ChunkEntry(i, loc >> 8, loc & 0xFF, timestamps[i])
+
+    def read_chunk(self, entry: ChunkEntry) -> bytes | None:
+        """解压区块数据，数据损坏、存放在外部文件或压缩格式不支持时返回空值"""
+        if self._mm is None:
+            return None
+        start = entry.sector * SECTOR
+        if start + 5 > self.size:
+            return None
+        length, compression = struct.unpack_from(">IB", self._mm, start)
+        if compression & _EXTERNAL_FLAG:
+            return None
+        payload = self._mm[start + 5 : start + 4 + length]
+        try:
+            match compression:
+                case 1:
+                    return zlib.decompress(payload, zlib.MAX_WBITS | 16)
+                case 2:
+                    return zlib.decompress(payload)
+                case 3:
+                    return payload
+                case _:
+                    return None
+        except zlib.error:
+            return None
+
+    def inhabited_time(self, entry: ChunkEntry) -> int | None:
+        """区块的 InhabitedTime（刻），无法读取时返回空值"""
+        data = self.read_chunk(entry)
+        if data is None:
+            return None
+        pos = data.find(_INHABITED_TAG)
+        if pos < 0:
+            return None
+        pos += len(_INHABITED_TAG)
+        return struct.unpack_from(">q", data, pos)[0] if pos + 8 <= len(data) else None
+
+    def stats(self, inhabited: bool = False) -> RegionStats:
+        """统计区域信息
+
+        :param inhabited: 是否读取各区块的 InhabitedTime（需要解压区块数据）
+        :return: 统计信息
+        """
+        entries = list(self.entries())
+        times = [e.timestamp for e in entries if e.timestamp]
+        total = unvisited = 0
+        if inhabited:
+            for e in entries:
+                t = self.inhabited_time(e)
+                if t is not None:
+                    total += t
+                    unvisited += t == 0
+        return RegionStats(
+            path=self.path,
+            x=self.x,
+            z=self.z,
+            file_size=self.size,
+            chunks=len(entries),
+            used_bytes=sum(e.sectors for e in entries) * SECTOR,
+            oldest=min(times) if len(times) else None,
+            newest=max(times) if len(times) else None,
+            inhabited_total=total if inhabited else None,
+            unvisited=unvisited if inhabited else None,
+        )
+
+
+def prune_region(path: str | Path, max_inhabited: int = 0, dry_run: bool = False) -> int:
+    """删除区域文件中 InhabitedTime 不超过阈值的区块，并压缩文件（不能在服务端运行时调用）
+
+    ``entities``、``poi`` 目录中对应的区域文件会删除相同的区块
+
+    :param path: 区域文件路径
+    :param max_inhabited: InhabitedTime（刻）不超过此值的区块被删除
+    :param dry_run: 只统计，不修改文件
+    :return: 删除的区块数
+    """
+    path = Path(path)
+    with RegionFile(path) as region:
+        drop = set()
+        for e in region.entries():
+            t = region.inhabited_time(e)
+            if t is not None and t <= max_inhabited:
+                drop.add(e.index)
+    if dry_run or not len(drop):
+        return len(drop)
+
+    for target in (path, *(path.parent.parent / d / path.name for d in _SIBLING_DIRS)):
+        if target.is_file():
+            _rewrite_region(target, drop)
+    return len(drop)
+
+
+def _rewrite_region(path: Path, drop: set[int]) -> None:
+    with RegionFile(path) as region:
+        if region._mm is None:
+            return
+        mm = region._mm
+        locations = [0] * 1024
+        timestamps = [0] * 1024
+        body = bytearray()
+        for e in region.entries():
+            if e.index in drop:
+                cx, cz = region.x * 32 + e.index % 32, region.z * 32 + e.index // 32
+                (path.parent / f"c.{cx}.{cz}.mcc").unlink(missing_ok=True)
+                continue
+            start = e.sector * SECTOR
+            data = mm[start : start + e.sectors * SECTOR]
+            sector = _HEADER // SECTOR + len(body) // SECTOR
+            locations[e.index] = sector << 8 | e.sectors
+            timestamps[e.index] = e.timestamp
+            body += data
+            if len(data) % SECTOR:
+                body += bytes(SECTOR - len(data) % SECTOR)
+
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "wb") as fp:
+        fp.write(struct.pack(">1024I", *locations))
+        fp.write(struct.pack(">1024I", *timestamps))
+        fp.write(body)
+    os.replace(tmp, path)
+
+
+class WorldRegions:
+    """服务端存档中所有区域文件的扫描和裁剪"""
+
+    def __init__(self, manager: ServerManager, workers: int = 4) -> None:
+        """初始化区域文件工具
+
+        :param manager: 服务端管理器，存档位于其 ``root_dir`` 下
+        :param workers: 并行处理区域文件的线程数
+        """
+        self.manager = manager
+        self.workers = workers
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(server={self.manager.name!r})"
+
+    def region_files(self) -> list[Path]:
+        """存档中所有维度的区块区域文件（不包括 ``entities``、``poi``）"""
+        world = self.manager.world_dir
+        bases = [
+            world,
+            world.with_name(f"{world.name}_nether"),
+            world.with_name(f"{world.name}_the_end"),
+        ]
+        ret: list[Path] = []
+        for base in bases:
+            if base.is_dir():
+                ret.extend(p for p in base.rglob("region/r.*.*.mca") if p.is_file())
+        return sorted(ret)
+
+    async def _map(self, func: Callable[..., T], *args: Any) -> list[T]:
+        loop = asyncio.get_running_loop()
+        files = await asyncio.to_thread(self.region_files)
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="mcpm-region") as pool:
+            return await asyncio.gather(
+                *(loop.run_in_executor(pool, func, p, *args) for p in files)
+            )
+
+    async def scan(self, inhabited: bool = False) -> list[RegionStats]:
+        """统计所有区域文件
+
+        :param inhabited: 是否读取各区块的 InhabitedTime（需要解压区块数据，较慢）
+        :return: 各区域文件的统计信息
+        """
+        return await self._map(_region_stats, inhabited)
+
+    async def prune(
+        self, max_inhabited: int = 0, dry_run: bool = False, stop_server: bool = False
+    ) -> PruneResult:
+        """删除所有维度中 InhabitedTime 不超过阈值的区块
+
+        :param max_inhabited: InhabitedTime（刻）不超过此值的区块被删除，默认只删除从未有玩家停留的区块
+        :param dry_run: 只统计，不修改文件
+        :param stop_server: 管理器正在运行时先停止服务端，裁剪完成后再启动；为否时服务端运行中会抛出异常
+        :return: 裁剪结果
+        """
+        manager = self.manager
+        restart = False
+        if not dry_run:
+            if manager.opened():
+                if not stop_server:
+                    raise RuntimeError(f"服务端 {manager.name} 正在运行，不能裁剪区块")
+                # 附加模式下 close() 只会断开连接，必须停止服务端进程
+                await manager.stop()
+                restart = True
+            world = manager.world_dir
+            if await asyncio.to_thread(_session_locked, world):
+                if restart:
+                    await manager.open()
+                raise RuntimeError(
+                    f"存档 {world} 仍被服务端进程占用（session.lock 已被锁定），不能裁剪区块。"
+                    f"附加模式下关闭管理器不会停止服务端，请使用 stop() 停止服务端 {manager.name}"
+                )
+
+        try:
+            files = self.region_files()
+            before = sum(p.stat().st_size for p in files)
+            counts = await self._map(prune_region, max_inhabited, dry_run)
+            after = sum(p.stat().st_size for p in files)
+        finally:
+            if restart:
+                await self.manager.open()
+
+        result = PruneResult(
+            regions=sum(1 for c in counts if c),
+            chunks=sum(counts),
+            bytes_before=before,
+            bytes_after=after,
+        )
+        logger.info(f"服务端 {self.manager.name} 区块裁剪完成：{result}")
+        return result
+
+
+def _session_locked(world: Path) -> bool:
+    # 服务端运行时锁定存档目录下的 session.lock，尝试加锁即可得知是否有服务端在使用此存档
+    path = world / "session.lock"
+    if not path.is_file():
+        return False
+    try:
+        with open(path, "r+b") as f:
+            if sys.platform == "win32":
+                import msvcrt
+
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.lockf(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.lockf(f, fcntl.LOCK_UN)
+    except PermissionError:
+        return True
+    except OSError as e:
+        return e.errno in (errno.EACCES, errno.EAGAIN)
+    return False
+
+
+def _region_stats(path: Path, inhabited: bool) -> RegionStats:
+    with RegionFile(path) as region:
+        return region.stats(inhabited)
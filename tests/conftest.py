@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+import melobot_protocol_mcpm.io.manager as manager_mod
+from melobot_protocol_mcpm.io.manager import ServerManager
+
+FAKE_SERVER = """\
+import sys
+print("[10:00:00] [Server thread/INFO]: Starting minecraft server version 1.21", flush=True)
+print('[10:00:01] [Server thread/INFO]: Done (1.0s)! For help, type "help"', flush=True)
+for line in sys.stdin:
+    print(f"[10:00:02] [Server thread/INFO]: got {line.strip()}", flush=True)
+    if line.strip() == "stop":
+        sys.exit(0)
+"""
+
+
+class FakeDispatcher:
+    def add(self, *flows: object) -> None:
+        pass
+
+
+class FakeBot:
+    _dispatcher = FakeDispatcher()
+
+
+@pytest.fixture(autouse=True)
+def clear_managers() -> Iterator[None]:
+    yield
+    ServerManager.__instances__.clear()
+
+
+@pytest.fixture
+def fake_bot(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(manager_mod, "get_bot", lambda: FakeBot())
+
+
+@pytest.fixture
+def fake_server(tmp_path: Path) -> list[str]:
+    """回显标准输入的假服务端，输入 ``stop`` 后退出"""
+    script = tmp_path / "server.py"
+    script.write_text(FAKE_SERVER, encoding="utf-8")
+    return [sys.executable, str(script)]
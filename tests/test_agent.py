@@ -0,0 +1,144 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from typing_extensions import AsyncIterator
+
+from melobot_protocol_mcpm.io.agent import (
+    EXIT,
+    LINES,
+    Agent,
+    AgentProcess,
+    encode_frame,
+    parse_address,
+    read_frame,
+)
+
+
+# 代理的服务器和子进程要与测试运行在同一个事件循环中
+@pytest_asyncio.fixture(loop_scope="function")
+async def agent(tmp_path: Path, fake_server: list[str]) -> AsyncIterator[Agent]:
+    ag = Agent(f"unix://{tmp_path / 'a.sock'}", "secret", fake_server, str(tmp_path))
+    task = asyncio.create_task(ag.run())
+    for _ in range(100):
+        if (tmp_path / "a.sock").exists():
+            break
+        await asyncio.sleep(0.01)
+    yield ag
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def attach(ag: Agent, state_path: Path | None = None) -> AgentProcess:
+    return await AgentProcess.attach(ag.listen, "secret", state_path=state_path, timeout=5)
+
+
+async def read_line(proc: AgentProcess) -> tuple[int, str]:
+    line = await asyncio.wait_for(proc.stdout.readline(), 5)
+    seq = proc.take("stdout")
+    proc.commit("stdout")
+    return seq, line.decode().rstrip("\n")
+
+
+def drop_clients(ag: Agent) -> None:
+    for w in tuple(ag.clients):
+        ag.clients.discard(w)
+        w.close()
+
+
+@pytest.mark.parametrize("payload", [b"", b"short", b"x" * 4096])
+async def test_frame_round_trip(payload: bytes) -> None:
+    frame = encode_frame(LINES, payload)
+    if len(payload) >= 4096:
+        # 可压缩的大帧会被压缩
+        assert len(frame) < len(payload)
+    reader = asyncio.StreamReader()
+    reader.feed_data(frame + encode_frame(EXIT))
+    reader.feed_eof()
+    assert await read_frame(reader) == (LINES, payload)
+    assert await read_frame(reader) == (EXIT, b"")
+
+
+def test_parse_address() -> None:
+    assert parse_address("unix:///run/a.sock") == ("unix", "/run/a.sock", 0)
+    assert parse_address("tcp://[::1]:9000") == ("tcp", "::1", 9000)
+    with pytest.raises(ValueError):
+        parse_address("tcp://host")
+
+
+async def test_rejects_invalid_token(agent: Agent) -> None:
+    with pytest.raises(PermissionError):
+        await AgentProcess.attach(agent.listen, "wrong", timeout=5)
+
+
+async def test_reconnect_after_drop(agent: Agent) -> None:
+    connections: list[bool] = []
+    proc = await AgentProcess.attach(
+        agent.listen, "secret", timeout=5, on_connection=connections.append
+    )
+    assert proc.spawned
+    assert [await read_line(proc) for _ in range(2)][1][0] == 2
+
+    # 代理断开消费过慢的客户端后，断开期间的输出在重新连接后回放
+    drop_clients(agent)
+    await asyncio.sleep(0.05)
+    assert agent.proc is not None and agent.proc.stdin is not None
+    agent.proc.stdin.write(b"during\n")
+    await agent.proc.stdin.drain()
+    seq, line = await read_line(proc)
+    assert (seq, line[-10:]) == (3, "got during")
+    assert proc.returncode is None
+    assert proc.reconnects == 1 and connections == [False, True]
+
+    proc.stdin.write(b"after\n")
+    await proc.stdin.drain()
+    assert (await read_line(proc))[1].endswith("got after")
+    proc.terminate()
+    assert await asyncio.wait_for(proc.wait(), 10) != -1
+
+
+async def test_session_lost(agent: Agent) -> None:
+    proc = await attach(agent)
+    await read_line(proc)
+    agent.session = "restarted"
+    drop_clients(agent)
+    assert await asyncio.wait_for(proc.wait(), 5) == -1
+
+
+async def test_terminate_while_disconnected(agent: Agent, tmp_path: Path) -> None:
+    proc = await attach(agent)
+    await read_line(proc)
+    (tmp_path / "a.sock").rename(tmp_path / "moved.sock")
+    drop_clients(agent)
+    await asyncio.sleep(0.1)
+    assert proc.returncode is None
+    # 代理不可达时结束进程会停止重连，服务端视为已退出
+    proc.terminate()
+    assert await asyncio.wait_for(proc.wait(), 5) == -1
+
+
+async def test_detach_and_resume(agent: Agent, tmp_path: Path) -> None:
+    state = tmp_path / "state.json"
+    proc = await attach(agent, state)
+    await read_line(proc)
+    await read_line(proc)
+    proc.stdin.write(b"a\n")
+    await proc.stdin.drain()
+    await asyncio.sleep(0.3)
+    # 已接收但未处理的行不计入保存的位置
+    assert proc.last_seq == 3
+    await proc.detach()
+    assert proc.returncode is None
+    saved = json.loads(state.read_text(encoding="utf-8"))
+    assert saved == {"session": agent.session, "seq": 2}
+
+    proc = await attach(agent, state)
+    assert not proc.spawned and proc.replay_seq == 3
+    seq, line = await read_line(proc)
+    assert seq == 3 and line.endswith("got a")
+    await proc.detach()
@@ -0,0 +1,88 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.world import WorldBackup
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> ServerManager:
+    root = tmp_path / "server"
+    (root / "world" / "region").mkdir(parents=True)
+    (root / "world_nether").mkdir()
+    (root / "world" / "session.lock").write_bytes(b"lock")
+    (root / "world" / "level.dat").write_bytes(b"level")
+    (root / "world_nether" / "level.dat").write_bytes(b"nether")
+    return ServerManager("backup", run_cmd="true", work_path=root)
+
+
+async def test_identical_files_stored_once(
+    manager: ServerManager, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # 空区域文件、预分配的区域文件等内容相同的文件很常见，会被多个线程同时存入
+    copy = WorldBackup._copy
+
+    def slow_copy(src: Path, dest: Path) -> None:
+        copy(src, dest)
+        time.sleep(0.02)
+
+    monkeypatch.setattr(WorldBackup, "_copy", staticmethod(slow_copy))
+    region = manager.world_dir / "region"
+    data = os.urandom(1 << 18)
+    for i in range(64):
+        (region / f"r.{i}.0.mca").write_bytes(data)
+
+    backup = WorldBackup(manager, tmp_path / "backup", workers=8)
+    result = await backup.snapshot()
+    assert result.files == 66
+    assert result.stored == 3
+    assert result.bytes_stored == len(data) + len("level") + len("nether")
+    assert not (result.path / "world" / "session.lock").exists()
+
+    objects = [p for p in backup.objects_dir.glob("*/*")]
+    assert len(objects) == 3
+    assert not any(p.name.endswith(".part") for p in objects)
+    assert list(backup.snapshots_dir.glob(".*.tmp")) == []
+    assert (result.path / "world" / "region" / "r.5.0.mca").read_bytes() == data
+    assert (
+        len({(result.path / "world" / "region" / f"r.{i}.0.mca").stat().st_ino for i in range(64)})
+        == 1
+    )
+
+
+async def test_incremental_snapshots(manager: ServerManager, tmp_path: Path) -> None:
+    backup = WorldBackup(manager, tmp_path / "backup", generations=2)
+    first = await backup.snapshot()
+    assert (first.files, first.hashed, first.stored) == (2, 2, 2)
+
+    # 大小和修改时间未变化的文件沿用上次的哈希
+    second = await backup.snapshot()
+    assert (second.hashed, second.stored) == (0, 0)
+
+    level = manager.world_dir / "level.dat"
+    level.write_bytes(b"changed")
+    third = await backup.snapshot()
+    assert (third.hashed, third.stored) == (1, 1)
+    assert (third.path / "world" / "level.dat").read_bytes() == b"changed"
+
+    # 超出保留数的备份及只被它引用的对象被清理
+    assert backup.snapshots() == [second.path, third.path]
+    assert len(list(backup.objects_dir.glob("*/*"))) == 3
+    assert (second.path / "world" / "level.dat").read_bytes() == b"level"
+
+
+async def test_failed_snapshot_leaves_no_tmp(
+    manager: ServerManager, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def broken_copy(src: Path, dest: Path) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(WorldBackup, "_copy", staticmethod(broken_copy))
+    backup = WorldBackup(manager, tmp_path / "backup")
+    with pytest.raises(OSError):
+        await backup.snapshot()
+    assert list(backup.snapshots_dir.glob("*")) == []
+    assert list(backup.objects_dir.glob("*/*")) == []
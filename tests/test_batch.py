@@ -0,0 +1,115 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.adapter.action import BatchCmdAction
+from melobot_protocol_mcpm.io.batch import FunctionBatcher
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.io.model import CmdOutputData, OutPacket
+
+
+def test_prepare_writes_function_once(tmp_path: Path) -> None:
+    batcher = FunctionBatcher(tmp_path / "pack")
+    func, need_reload = batcher.prepare(["/say a", "  say b  ", ""])
+    assert need_reload
+    assert func.startswith("mcpm:b_")
+    path = batcher.func_dir / f"{func.split(':')[1]}.mcfunction"
+    assert path.read_text(encoding="utf-8") == "say a\nsay b\n"
+    assert (tmp_path / "pack" / "pack.mcmeta").is_file()
+    assert batcher.func_dir.name == "function"
+
+    # 内容相同的命令序列复用同一个函数，已加载后不需要重载
+    assert batcher.prepare(["say a", "say b"]) == (func, True)
+    batcher.mark_loaded(func)
+    assert batcher.prepare(["say a", "say b"]) == (func, False)
+
+
+def test_prepare_rejects_invalid_cmds(tmp_path: Path) -> None:
+    batcher = FunctionBatcher(tmp_path)
+    with pytest.raises(ValueError):
+        batcher.prepare(["", "  "])
+    with pytest.raises(ValueError):
+        batcher.prepare(["say a\nsay b"])
+
+
+def test_old_pack_format_and_existing_functions(tmp_path: Path) -> None:
+    batcher = FunctionBatcher(tmp_path, pack_format=41)
+    assert batcher.func_dir.name == "functions"
+    func, _ = batcher.prepare(["say a"])
+    # 服务端启动时会加载已有的函数文件
+    assert FunctionBatcher(tmp_path, pack_format=41).is_loaded(func)
+
+
+def test_prune_least_recently_used(tmp_path: Path) -> None:
+    batcher = FunctionBatcher(tmp_path, max_functions=3, max_age=None)
+    funcs = [batcher.prepare([f"say {i}"])[0] for i in range(3)]
+    batcher.prepare(["say 0"])
+    batcher.prepare(["say 3"])
+    names = {p.stem for p in batcher.func_dir.glob("*.mcfunction")}
+    assert len(names) == 3
+    assert funcs[1].split(":")[1] not in names
+    assert funcs[0].split(":")[1] in names
+
+
+def test_prune_by_age(tmp_path: Path) -> None:
+    batcher = FunctionBatcher(tmp_path, max_age=60)
+    func, _ = batcher.prepare(["say old"])
+    path = batcher.func_dir / f"{func.split(':')[1]}.mcfunction"
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+
+    batcher = FunctionBatcher(tmp_path, max_age=60)
+    assert batcher.is_loaded(func)
+    batcher.prepare(["say new"])
+    assert not path.exists()
+    assert not batcher.is_loaded(func)
+
+
+def make_manager(tmp_path: Path, replies: list[str]) -> tuple[ServerManager, list[str]]:
+    manager = ServerManager(
+        "batch", run_cmd="true", work_path=tmp_path, rcon_host="localhost", batch_reload_timeout=0.3
+    )
+    manager._opened.set()
+    sent: list[str] = []
+
+    async def send(cmd: str) -> str:
+        sent.append(cmd)
+        if cmd == "reload":
+            return ""
+        return replies.pop(0) if len(replies) > 1 else replies[0]
+
+    manager._send_cmd_str = send  # type: ignore[method-assign]
+    return manager, sent
+
+
+async def test_output_batch_reloads_until_function_known(tmp_path: Path) -> None:
+    manager, sent = make_manager(
+        tmp_path, ["Unknown function mcpm:x", "Unknown function mcpm:x", "Executed 2 commands"]
+    )
+    packet = OutPacket(data=CmdOutputData(content=BatchCmdAction(["say a", "say b"])))
+    echo = await manager.output(packet)
+    assert echo.data.content == "Executed 2 commands"
+    assert sent[0] == "reload"
+    assert sent.count(sent[1]) == 3
+    assert manager.batcher.is_loaded(sent[1].removeprefix("function "))
+
+    sent.clear()
+    await manager.output(packet)
+    assert len(sent) == 1 and sent[0].startswith("function ")
+
+
+async def test_output_batch_timeout_does_not_mark_loaded(tmp_path: Path) -> None:
+    manager, sent = make_manager(tmp_path, ["Unknown function mcpm:x"])
+    packet = OutPacket(data=CmdOutputData(content=BatchCmdAction(["say a"])))
+    with pytest.raises(TimeoutError):
+        await manager.output(packet)
+    func = sent[1].removeprefix("function ")
+    assert not manager.batcher.is_loaded(func)
+
+    # 下次调用仍会重载
+    sent.clear()
+    with pytest.raises(TimeoutError):
+        await manager.output(packet)
+    assert sent[0] == "reload"
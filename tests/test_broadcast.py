@@ -0,0 +1,57 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.adapter import Adapter, CmdEcho, NetworkEcho
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.utils import JsonTextTemplate
+
+
+@pytest.fixture
+def network(tmp_path: Path) -> tuple[Adapter, dict[str, list[str]]]:
+    adapter = Adapter()
+    sent: dict[str, list[str]] = {}
+    for name in ("lobby", "survival", "creative"):
+        manager = ServerManager(name, run_cmd="true", work_path=tmp_path, rcon_host="localhost")
+        manager._opened.set()
+        sent[name] = []
+
+        async def send(cmd: str, name: str = name) -> str:
+            sent[name].append(cmd)
+            # 所有服务端都收到命令后才回应，串行发送时会超时
+            await asyncio.sleep(0.1)
+            if name == "creative":
+                raise ConnectionResetError("reset")
+            return f"{name} ok"
+
+        manager._send_cmd_str = send  # type: ignore[method-assign]
+        adapter.out_srcs.add(manager)
+    return adapter, sent
+
+
+async def test_network_cmd_aggregates_echoes(
+    network: tuple[Adapter, dict[str, list[str]]],
+) -> None:
+    adapter, sent = network
+    ret = await asyncio.wait_for(adapter.send_network_cmd("say hi"), 0.25)
+    assert isinstance(ret, NetworkEcho)
+    assert set(ret.servers) == {"lobby", "survival", "creative"} and not ret.ok()
+    echo = ret.echoes["lobby"]
+    assert isinstance(echo, CmdEcho) and echo.result() == "lobby ok"
+    assert isinstance(ret.errors["creative"], ConnectionResetError)
+    assert all(cmds == ["say hi"] for cmds in sent.values())
+    with pytest.raises(ExceptionGroup):
+        ret.raise_for_errors()
+
+
+async def test_network_broadcast_to_selected_servers(
+    network: tuple[Adapter, dict[str, list[str]]],
+) -> None:
+    adapter, sent = network
+    tpl = JsonTextTemplate("{n} 秒后重启")
+    ret = await adapter.send_network_broadcast_msg(tpl, {"n": 5}, servers=["lobby", "survival"])
+    assert ret.ok() and set(ret.servers) == {"lobby", "survival"}
+    assert sent["lobby"] == ['tellraw @a {"text": "5 秒后重启"}'] and sent["creative"] == []
+    with pytest.raises(ValueError, match="不存在的服务端"):
+        await adapter.send_network_cmd("list", servers=["nether"])
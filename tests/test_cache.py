@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from melobot_protocol_mcpm.io.cache import CmdResponseCache
+
+
+class Sender:
+    def __init__(self, delay: float = 0.05, exc: Exception | None = None) -> None:
+        self.calls: list[str] = []
+        self.delay = delay
+        self.exc = exc
+
+    async def __call__(self, cmd: str) -> str:
+        self.calls.append(cmd)
+        await asyncio.sleep(self.delay)
+        if self.exc is not None:
+            raise self.exc
+        return f"resp {len(self.calls)}"
+
+
+async def test_coalesce_concurrent_fetches() -> None:
+    cache = CmdResponseCache(invalidate_on={})
+    send = Sender()
+    rets = await asyncio.gather(*(cache.fetch("list", send) for _ in range(10)))
+    assert rets == ["resp 1"] * 10
+    assert send.calls == ["list"]
+    assert (cache.hits, cache.misses) == (9, 1)
+
+
+async def test_cached_until_ttl_expires() -> None:
+    cache = CmdResponseCache(ttls={"list": 0.1}, invalidate_on={})
+    send = Sender(delay=0)
+    assert await cache.fetch("list", send) == "resp 1"
+    assert await cache.fetch("  list ", send) == "resp 1"
+    await asyncio.sleep(0.15)
+    assert await cache.fetch("list", send) == "resp 2"
+
+
+async def test_uncached_cmd_is_sent_every_time() -> None:
+    cache = CmdResponseCache(invalidate_on={})
+    send = Sender(delay=0)
+    await cache.fetch("say hi", send)
+    await cache.fetch("say hi", send)
+    assert send.calls == ["say hi", "say hi"]
+
+
+async def test_cancel_first_caller_keeps_other_waiters() -> None:
+    cache = CmdResponseCache(invalidate_on={})
+    send = Sender()
+    first = asyncio.create_task(cache.fetch("list", send))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(cache.fetch("list", send))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "resp 1"
+    assert first.cancelled()
+    # 第一个调用者被取消后，命令仍然执行完成并写入缓存
+    assert await cache.fetch("list", send) == "resp 1"
+    assert send.calls == ["list"]
+
+
+async def test_all_waiters_cancelled_still_fills_cache() -> None:
+    cache = CmdResponseCache(invalidate_on={})
+    send = Sender()
+    task = asyncio.create_task(cache.fetch("list", send))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.sleep(0.1)
+    assert await cache.fetch("list", send) == "resp 1"
+
+
+async def test_error_propagates_to_all_waiters_and_is_not_cached() -> None:
+    cache = CmdResponseCache(invalidate_on={})
+    send = Sender(exc=RuntimeError("boom"))
+    rets = await asyncio.gather(
+        *(cache.fetch("list", send) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in rets)
+    with pytest.raises(RuntimeError):
+        await cache.fetch("list", send)
+    assert len(send.calls) == 2
+
+
+async def test_invalidation_during_flight_skips_cache() -> None:
+    cache = CmdResponseCache(invalidate_on={})
+    send = Sender()
+    task = asyncio.create_task(cache.fetch("whitelist list", send))
+    await asyncio.sleep(0.01)
+    await cache.fetch("whitelist add Steve", Sender(delay=0))
+    assert await task == "resp 1"
+    assert await cache.fetch("whitelist list", send) == "resp 2"
+
+
+async def test_invalidate_by_prefix() -> None:
+    cache = CmdResponseCache(invalidate_on={})
+    send = Sender(delay=0)
+    await cache.fetch("scoreboard players get Steve kills", send)
+    await cache.fetch("time query daytime", send)
+    cache.invalidate("scoreboard players")
+    await cache.fetch("scoreboard players get Steve kills", send)
+    await cache.fetch("time query daytime", send)
+    assert len(send.calls) == 3
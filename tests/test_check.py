@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.adapter.event import Event
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.io.model import LogInputData
+from melobot_protocol_mcpm.utils import LevelRole, MsgCheckerFactory, RoleRegistry
+
+
+def test_role_priority_and_incremental_updates() -> None:
+    registry = RoleRegistry("Owner", super_users=["Su"], white_users=["White", "Su"])
+    assert registry.get_role("Owner") is LevelRole.OWNER
+    assert registry.get_role("Su") is LevelRole.SU
+    assert registry.get_role("White") is LevelRole.WHITE
+    assert registry.get_role("Nobody") is LevelRole.NORMAL
+
+    version = registry.version
+    registry.ban("Su", "Owner")
+    assert registry.get_role("Su") is registry.get_role("Owner") is LevelRole.BLACK
+    registry.unban("Su")
+    assert registry.get_role("Su") is LevelRole.SU
+    registry.remove(LevelRole.SU, "Su")
+    assert registry.get_role("Su") is LevelRole.WHITE
+    assert registry.version == version + 3
+
+    registry.update(white_users=[])
+    assert registry.get_role("Su") is LevelRole.NORMAL and registry.owner == "Owner"
+    registry.unban("Owner")
+    registry.update(None)
+    assert registry.owner is None and registry.get_role("Owner") is LevelRole.NORMAL
+    with pytest.raises(ValueError):
+        registry.add(LevelRole.OWNER, "Someone")
+
+
+def test_load_server_files(tmp_path: Path) -> None:
+    (tmp_path / "ops.json").write_text(json.dumps([{"uuid": "1", "name": "Op"}]))
+    (tmp_path / "banned-players.json").write_text(json.dumps([{"name": "Griefer"}, "bad"]))
+    registry = RoleRegistry(white_users=["Old"])
+    registry.load_server_files(tmp_path, banned=True)
+    assert registry.super_users == {"Op"} and registry.black_users == {"Griefer"}
+    # 不存在的 whitelist.json 不改变已有数据
+    assert registry.white_users == {"Old"}
+
+
+async def test_checkers_share_live_registry(tmp_path: Path) -> None:
+    manager = ServerManager("check", run_cmd="true", work_path=tmp_path)
+
+    def chat(player: str) -> Event:
+        data = LogInputData(
+            content=f"[12:00:00] [Server thread/INFO]: <{player}> hi",
+            pattern_group=manager.pattern_group,
+            cmd_factory=manager.cmd_factory,
+            from_="stdout",
+        )
+        return Event.resolve(manager.name, data)
+
+    fails: list[int] = []
+    factory = MsgCheckerFactory(owner="Owner", fail_cb=lambda: fails.append(1))
+    su_checker = factory.get(LevelRole.SU)
+    normal_checker = factory.get(LevelRole.NORMAL)
+    event = chat("Steve")
+    assert await normal_checker.check(event)
+    assert not await su_checker.check(event)
+    assert fails == [1]
+
+    factory.registry.add(LevelRole.SU, "Steve")
+    # 同一事件上缓存的检查结果随索引版本失效
+    assert await su_checker.check(event)
+    factory.registry.ban("Steve")
+    assert not await normal_checker.check(chat("Steve"))
+    assert await su_checker.check(chat("Owner"))
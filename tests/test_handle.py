@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.adapter.event import Event, MessageEvent, PlayerEvent
+from melobot_protocol_mcpm.handle import on_message, on_player_operation, on_stdout
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.io.model import LogInputData
+
+LINES = {
+    "plain": "Preparing spawn area: 50%",
+    "chat": "<Steve> hello",
+    "joined": "Steve[/127.0.0.1:50000] logged in with entity id 1 at (0.5, 64.0, 0.5)",
+    "left": "Steve left the game",
+}
+
+
+@pytest.fixture
+def events(tmp_path: Path) -> dict[str, Event]:
+    manager = ServerManager("route", run_cmd="true", work_path=tmp_path)
+
+    def resolve(content: str) -> Event:
+        data = LogInputData(
+            content=f"[12:00:00] [Server thread/INFO]: {content}",
+            pattern_group=manager.pattern_group,
+            cmd_factory=manager.cmd_factory,
+            from_="stdout",
+        )
+        return Event.resolve(manager.name, data)
+
+    return {name: resolve(line) for name, line in LINES.items()}
+
+
+def test_route_keys(events: dict[str, Event]) -> None:
+    assert isinstance(events["chat"], MessageEvent)
+    assert MessageEvent not in events["plain"].route_keys
+    assert (PlayerEvent, "joined") in events["joined"].route_keys
+    assert (PlayerEvent, "joined") not in events["left"].route_keys
+    assert (
+        events["left"].route_keys
+        is Event.resolve(events["left"].server_id, events["left"].raw).route_keys
+    )
+
+
+async def test_flows_only_see_their_route(events: dict[str, Event]) -> None:
+    checked: list[Event] = []
+    seen: list[str] = []
+
+    def checker(event: Event) -> bool:
+        checked.append(event)
+        return True
+
+    @on_message(checker=checker)
+    async def chat() -> None:
+        seen.append("chat")
+
+    @on_player_operation("joined")
+    async def joined() -> None:
+        seen.append("joined")
+
+    @on_stdout()
+    async def stdout() -> None:
+        seen.append("stdout")
+
+    for event in events.values():
+        for flow in (chat, joined, stdout):
+            assert "_handle" not in vars(flow)
+            await flow._handle(event)
+
+    assert checked == [events["chat"]]
+    assert seen == ["stdout", "chat", "stdout", "joined", "stdout", "stdout"]
@@ -0,0 +1,115 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.io.holder import HolderProcess
+from melobot_protocol_mcpm.io.manager import ServerManager
+
+
+async def read_line(proc: HolderProcess) -> tuple[int, str]:
+    line = await asyncio.wait_for(proc.stdout.readline(), 5)
+    return proc.take("stdout"), line.decode().rstrip("\n")
+
+
+async def stop(proc: HolderProcess) -> None:
+    proc.terminate()
+    assert await asyncio.wait_for(proc.wait(), 10) is not None
+
+
+async def test_take_commit_and_resume(tmp_path: Path, fake_server: list[str]) -> None:
+    sock = tmp_path / "h.sock"
+    proc = await HolderProcess.attach(sock, fake_server, str(tmp_path))
+    try:
+        assert proc.spawned
+        seq1, line1 = await read_line(proc)
+        seq2, _ = await read_line(proc)
+        assert line1.endswith("Starting minecraft server version 1.21")
+        assert (seq1, seq2) == (1, 2)
+        # 已读取但未处理的行不算处理完
+        proc.commit("stdout")
+        assert proc.delivered_seq == 1
+        proc.commit("stdout")
+        assert proc.delivered_seq == 2
+
+        proc.stdin.write(b"a\n")
+        await proc.stdin.drain()
+        await asyncio.sleep(0.3)
+        # 已收到但未读取的行在重新附加时回放
+        assert proc.last_seq == 3 and proc.delivered_seq == 2
+        await proc.detach()
+        saved = json.loads((tmp_path / "h.sock.seq").read_text(encoding="utf-8"))
+        assert saved == {"session": proc.session, "seq": 2}
+
+        proc = await HolderProcess.attach(sock, fake_server, str(tmp_path))
+        assert not proc.spawned
+        assert proc.session == saved["session"]
+        assert proc.replay_seq == 3
+        seq, line = await read_line(proc)
+        assert seq == 3 and line.endswith("got a")
+    finally:
+        await stop(proc)
+    assert proc.returncode is not None
+
+
+async def test_unknown_session_replays_backlog(tmp_path: Path, fake_server: list[str]) -> None:
+    sock = tmp_path / "h.sock"
+    proc = await HolderProcess.attach(sock, fake_server, str(tmp_path))
+    try:
+        await read_line(proc)
+        proc.commit("stdout")
+        await proc.detach()
+        (tmp_path / "h.sock.seq").write_text(
+            json.dumps({"session": "other", "seq": 1}), encoding="utf-8"
+        )
+        # 会话不一致时不能信任保存的位置，从缓存的第一行开始回放
+        proc = await HolderProcess.attach(sock, fake_server, str(tmp_path))
+        assert proc.last_seq == 0
+        assert (await read_line(proc))[0] == 1
+    finally:
+        await stop(proc)
+
+
+async def test_exit_code(tmp_path: Path, fake_server: list[str]) -> None:
+    proc = await HolderProcess.attach(tmp_path / "h.sock", fake_server, str(tmp_path))
+    proc.stdin.write(b"stop\n")
+    await proc.stdin.drain()
+    assert await asyncio.wait_for(proc.wait(), 10) == 0
+    # 托管进程广播返回码后才删除套接字
+    for _ in range(50):
+        if not (tmp_path / "h.sock").exists():
+            break
+        await asyncio.sleep(0.02)
+    assert not (tmp_path / "h.sock").exists()
+
+
+@pytest.mark.usefixtures("fake_bot")
+async def test_manager_skips_delivered_lines(tmp_path: Path, fake_server: list[str]) -> None:
+    kwargs = dict(
+        run_cmd=" ".join(fake_server),
+        work_path=tmp_path,
+        holder_socket=tmp_path / "m.sock",
+        stop_timeout=5,
+    )
+    manager = ServerManager("holder", **kwargs)  # type: ignore[arg-type]
+    await manager.open()
+    manager._server_done.set()
+    for _ in range(2):
+        await asyncio.wait_for(manager.input(), 5)
+    await manager.send_cmd("a")
+    await manager.send_cmd("b")
+    packet = await asyncio.wait_for(manager.input(), 5)
+    assert packet.data.content.endswith("got a")
+    await asyncio.sleep(0.3)
+    await manager.close()
+
+    ServerManager.__instances__.clear()
+    manager = ServerManager("holder", **kwargs)  # type: ignore[arg-type]
+    await manager.open()
+    manager._server_done.set()
+    try:
+        packet = await asyncio.wait_for(manager.input(), 5)
+        assert packet.data.content.endswith("got b")
+    finally:
+        await manager.stop()
@@ -0,0 +1,70 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import melobot_protocol_mcpm.io.jvm as jvm_mod
+from melobot_protocol_mcpm.io.jvm import HostResources, JvmLaunchProfile
+
+GIB = 1024**3
+MEMINFO = """\
+MemTotal:       16384000 kB
+MemFree:         2048000 kB
+MemAvailable:    8192000 kB
+HugePages_Total:       0
+Hugepagesize:       2048 kB
+"""
+
+
+def _host(total_gib: int = 16, avail_gib: int = 8, cpus: int = 8) -> HostResources:
+    return HostResources(cpu_count=cpus, mem_total=total_gib * GIB, mem_available=avail_gib * GIB)
+
+
+def test_probe_reads_meminfo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(jvm_mod, "sys", SimpleNamespace(platform="linux"))
+    (tmp_path / "meminfo").write_text(MEMINFO, encoding="utf-8")
+    host = HostResources.probe(tmp_path)
+    assert host.mem_total == 16384000 * 1024
+    assert host.mem_available == 8192000 * 1024
+    assert host.hugepage_size == 2048 * 1024
+
+
+def test_probe_without_procfs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(jvm_mod, "sys", SimpleNamespace(platform="darwin"))
+    (tmp_path / "meminfo").write_text(MEMINFO, encoding="utf-8")
+    host = HostResources.probe(tmp_path)
+    assert host.cpu_count >= 1 and host.mem_total == host.mem_available == 0
+
+    with pytest.raises(ValueError, match="heap_mb"):
+        JvmLaunchProfile().heap_size(host)
+    args = JvmLaunchProfile(heap_mb=4096).args(21, host)
+    assert args[:2] == ["-Xms4096M", "-Xmx4096M"]
+
+
+def test_heap_split_across_servers() -> None:
+    assert JvmLaunchProfile().heap_size(_host()) == 4096
+    assert JvmLaunchProfile(servers=3).heap_size(_host()) == 1280
+    assert JvmLaunchProfile(kind="small").heap_size(_host()) == 2048
+    with pytest.raises(ValueError, match="512MiB"):
+        JvmLaunchProfile(servers=9).heap_size(_host())
+    with pytest.raises(ValueError):
+        JvmLaunchProfile(heap_mb=32768).heap_size(_host())
+    with pytest.raises(ValueError):
+        JvmLaunchProfile(servers=0)
+
+
+def test_collector_flags_match_java_version() -> None:
+    host = _host()
+    assert "-XX:+ZGenerational" in JvmLaunchProfile(kind="zgc").args(21, host)
+    assert "-XX:+ZGenerational" not in JvmLaunchProfile(kind="zgc").args(24, host)
+    assert "-XX:+UseG1GC" in JvmLaunchProfile().args(8, host)
+
+    with pytest.raises(ValueError, match="Java 8"):
+        JvmLaunchProfile().args(7, host)
+    with pytest.raises(ValueError, match="ZGenerational"):
+        JvmLaunchProfile(kind="zgc", extra=["-XX:+ZGenerational"]).args(17, host)
+    with pytest.raises(ValueError, match="UseShenandoahGC"):
+        JvmLaunchProfile(extra=["-XX:+UseShenandoahGC"]).args(11, host)
+    with pytest.raises(ValueError, match="多个 GC"):
+        JvmLaunchProfile(extra=["-XX:+UseShenandoahGC"]).args(17, host)
+    assert "-XX:-UseG1GC" in JvmLaunchProfile(extra=["-XX:-UseG1GC"]).args(17, host)
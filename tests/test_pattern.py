@@ -0,0 +1,104 @@
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.utils import (
+    FabricPatternGroup,
+    ForgePatternGroup,
+    PaperPatternGroup,
+    RegexPatternGroup,
+    VelocityPatternGroup,
+    detect_pattern_group,
+)
+
+
+@pytest.mark.parametrize(
+    ("line", "group"),
+    [
+        (
+            "[12:00:00 INFO]: This server is running Paper version 1.21.1-119 (MC: 1.21.1)",
+            PaperPatternGroup,
+        ),
+        (
+            "[12:00:00 INFO]: This server is running Purpur version 1.21-2250 (MC: 1.21)",
+            PaperPatternGroup,
+        ),
+        (
+            "[12:00:00] [main/INFO]: Loading Minecraft 1.21 with Fabric Loader 0.16.5",
+            FabricPatternGroup,
+        ),
+        (
+            "[12:00:00] [main/INFO]: Loading Minecraft 1.20.1 with Quilt Loader 0.26.0",
+            FabricPatternGroup,
+        ),
+        (
+            "[12:00:00] [main/INFO] [cp.mo.mo.Launcher/MODLAUNCHER]: ModLauncher running: args []",
+            ForgePatternGroup,
+        ),
+        ("[12:00:00 INFO]: Booting up Velocity 3.3.0-SNAPSHOT...", VelocityPatternGroup),
+        ("[12:00:00] [Server thread/INFO]: Starting minecraft server version 1.21", None),
+        ("[12:00:00] [Server thread/INFO]: <Steve> This server is running Paper", None),
+    ],
+)
+def test_detect_pattern_group(line: str, group: type[RegexPatternGroup] | None) -> None:
+    assert detect_pattern_group(line) is group
+
+
+@pytest.mark.parametrize(
+    ("group", "line", "content"),
+    [
+        (RegexPatternGroup, "[12:00:00] [Server thread/INFO]: <Steve> hi", "<Steve> hi"),
+        (PaperPatternGroup, "[12:00:00 INFO]: <Steve> hi", "<Steve> hi"),
+        (PaperPatternGroup, "[12:00:00] [Server thread/INFO]: <Steve> hi", "<Steve> hi"),
+        (
+            FabricPatternGroup,
+            "[12:00:00] [Server thread/INFO] (Minecraft) <Steve> hi",
+            "<Steve> hi",
+        ),
+        (
+            ForgePatternGroup,
+            "[12:00:00] [Server thread/INFO] [minecraft/MinecraftServer]: <Steve> hi",
+            "<Steve> hi",
+        ),
+    ],
+)
+def test_line_formats(group: type[RegexPatternGroup], line: str, content: str) -> None:
+    matched = group.line.search(line)
+    assert matched is not None
+    assert matched.group("content") == content
+    assert matched.group("logging") == "INFO"
+
+
+def test_velocity_players() -> None:
+    joined = VelocityPatternGroup.player_joined.search(
+        "[12:00:00 INFO]: [connected player] Steve (/127.0.0.1:51234) has connected"
+    )
+    left = VelocityPatternGroup.player_left.search(
+        "[12:00:00 INFO]: [connected player] Steve (/127.0.0.1:51234) has disconnected"
+    )
+    assert joined is not None and joined.group("name") == "Steve"
+    assert left is not None and left.group("name") == "Steve"
+
+
+def test_manager_switches_group_once(tmp_path: Path) -> None:
+    manager = ServerManager("paper", run_cmd="true", work_path=tmp_path)
+    assert type(manager.pattern_group) is RegexPatternGroup
+    manager._scan_startup_line("[12:00:00 INFO]: Starting minecraft server version 1.21.1")
+    assert manager.detect_pattern
+    manager._scan_startup_line(
+        "[12:00:00 INFO]: This server is running Paper version 1.21.1-119 (MC: 1.21.1)"
+    )
+    assert type(manager.pattern_group) is PaperPatternGroup
+    assert not manager.detect_pattern
+    assert manager.server_version == "1.21.1"
+    # 识别后不再切换
+    manager._scan_startup_line("[12:00:00 INFO]: Booting up Velocity 3.3.0...")
+    assert type(manager.pattern_group) is PaperPatternGroup
+
+
+def test_manager_keeps_explicit_group(tmp_path: Path) -> None:
+    group = FabricPatternGroup()
+    manager = ServerManager("fabric", run_cmd="true", work_path=tmp_path, pattern_group=group)
+    manager._scan_startup_line("[12:00:00 INFO]: This server is running Paper version 1.21")
+    assert manager.pattern_group is group
@@ -0,0 +1,98 @@
+import gzip
+import json
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import pytest
+import pytest_asyncio
+
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.utils.nbt import loads_nbt
+from melobot_protocol_mcpm.world import PlayerDataReader
+
+STEVE = "069a79f4-44e9-4726-a5be-fca90e38aaf5"
+ALEX = "853c80ef-3c37-49fd-aa49-938b674adae6"
+OFFLINE = "00000000-0000-0000-0000-000000000001"
+
+
+def _name(s: str) -> bytes:
+    raw = s.encode()
+    return struct.pack(">H", len(raw)) + raw
+
+
+def player_nbt(level: int, pos: tuple[float, float, float]) -> bytes:
+    body = b"\x03" + _name("XpLevel") + struct.pack(">i", level)
+    body += b"\x09" + _name("Pos") + b"\x06" + struct.pack(">i3d", 3, *pos)
+    body += b"\x08" + _name("Dimension") + _name("minecraft:overworld")
+    body += b"\x0b" + _name("UUID") + struct.pack(">i4i", 4, 1, 2, 3, 4)
+    return b"\x0a" + _name("") + body + b"\x00"
+
+
+def test_loads_nbt_compressions() -> None:
+    raw = player_nbt(30, (0.5, 64.0, -3.5))
+    expected = {
+        "XpLevel": 30,
+        "Pos": [0.5, 64.0, -3.5],
+        "Dimension": "minecraft:overworld",
+        "UUID": [1, 2, 3, 4],
+    }
+    for data in (raw, gzip.compress(raw), zlib.compress(raw)):
+        assert loads_nbt(data) == ("", expected)
+    with pytest.raises(ValueError):
+        loads_nbt(raw[:-6])
+
+
+@pytest_asyncio.fixture(loop_scope="function")
+async def reader(tmp_path: Path) -> AsyncIterator[PlayerDataReader]:
+    world = tmp_path / "world"
+    (world / "stats").mkdir(parents=True)
+    (world / "playerdata").mkdir()
+    usercache = [{"uuid": STEVE, "name": "Steve"}, {"uuid": ALEX, "name": "Alex"}]
+    (tmp_path / "usercache.json").write_text(json.dumps(usercache))
+    for uuid, play_time in ((STEVE, 500), (ALEX, 9000), (OFFLINE, 100)):
+        stats = {"stats": {"minecraft:custom": {"minecraft:play_time": play_time}}}
+        (world / "stats" / f"{uuid}.json").write_text(json.dumps(stats))
+    (world / "playerdata" / f"{STEVE}.dat").write_bytes(
+        gzip.compress(player_nbt(7, (1.0, 2.0, 3.0)))
+    )
+    manager = ServerManager("player", run_cmd="true", work_path=tmp_path)
+    ret = PlayerDataReader(manager, workers=2)
+    yield ret
+    ret.close()
+
+
+async def test_lookup_by_name_or_uuid(reader: PlayerDataReader) -> None:
+    assert await reader.uuid_of("steve") == STEVE
+    assert await reader.uuid_of(ALEX.upper()) == ALEX
+    assert await reader.uuid_of("Herobrine") is None
+
+    data = await reader.player_data("Steve")
+    assert data is not None and data["XpLevel"] == 7 and data["Pos"] == [1.0, 2.0, 3.0]
+    assert await reader.player_data("Alex") is None
+    stats = await reader.stats("Alex")
+    assert stats == {"minecraft:custom": {"minecraft:play_time": 9000}}
+
+
+async def test_cache_follows_file_changes(reader: PlayerDataReader) -> None:
+    first = await reader.stats(STEVE)
+    assert await reader.stats(STEVE) is first
+
+    path = reader.stats_dir / f"{STEVE}.json"
+    path.write_text(json.dumps({"stats": {"minecraft:custom": {"minecraft:play_time": 12345}}}))
+    updated: Any = await reader.stats(STEVE)
+    assert updated["minecraft:custom"]["minecraft:play_time"] == 12345
+
+    # 写入到一半的文件解析失败时沿用上一次的结果
+    path.write_text('{"stats": {')
+    assert await reader.stats(STEVE) is updated
+    path.unlink()
+    assert await reader.stats(STEVE) is None
+
+
+async def test_leaderboard_includes_offline_players(reader: PlayerDataReader) -> None:
+    board = await reader.leaderboard("minecraft:play_time")
+    assert board == [("Alex", 9000), ("Steve", 500), (OFFLINE, 100)]
+    assert await reader.leaderboard("minecraft:play_time", limit=1) == [("Alex", 9000)]
+    assert await reader.leaderboard("minecraft:jump") == []
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from melobot_protocol_mcpm.adapter.base import EventFactory
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.io.model import InPacket, LogInputData
+from melobot_protocol_mcpm.utils import PlayerPresence, RegexPatternGroup
+
+LIST_RESP = "There are 2 of a max of 20 players online: Steve, Alex"
+
+
+def test_sessions_and_playtime() -> None:
+    presence = PlayerPresence()
+    presence.join("Steve", 100)
+    presence.join("Steve", 150)
+    assert presence.session_start("Steve") == 100
+    assert presence.playtime("Steve", now=130) == 30
+    presence.leave("Steve", 160)
+    presence.leave("Steve", 170)
+    assert "Steve" not in presence and presence.playtime("Steve") == 60
+
+    presence.join("Steve", 200)
+    presence.join("Notch", 200)
+    assert presence.reconcile_list(RegexPatternGroup.player_list, LIST_RESP, ts=210)
+    assert presence.online == {"Steve", "Alex"}
+    assert presence.playtime("Notch") == 10
+    assert not presence.reconcile_list(RegexPatternGroup.player_list, "Unknown command")
+    assert presence.reconcile_list(
+        RegexPatternGroup.player_list, "There are 0 of a max of 20 players online:"
+    )
+    assert len(presence) == 0
+
+
+async def test_player_events_update_presence(tmp_path: Path) -> None:
+    manager = ServerManager("presence", run_cmd="true", work_path=tmp_path)
+    factory = EventFactory()
+
+    def packet(content: str) -> InPacket:
+        data = LogInputData(
+            content=f"[12:00:00] [Server thread/INFO]: {content}",
+            pattern_group=manager.pattern_group,
+            cmd_factory=manager.cmd_factory,
+            from_="stdout",
+        )
+        return InPacket(data=data, server_id=manager.name)
+
+    await factory.create(
+        packet("Steve[/127.0.0.1:50000] logged in with entity id 1 at (0.5, 64.0, 0.5)")
+    )
+    assert manager.presence.online == {"Steve"}
+    await factory.create(packet("Steve left the game"))
+    assert len(manager.presence) == 0
+
+
+class FakeRcon:
+    def __init__(self, fails: int) -> None:
+        self.fails = fails
+        self.connects = 0
+        self.sent: list[str] = []
+        self.exc: Exception = asyncio.TimeoutError()
+        self._ready = False
+
+    async def connect(self, timeout: float = 2) -> None:
+        if not self._ready:
+            self.connects += 1
+            self._ready = True
+
+    async def send_cmd(self, cmd: str, timeout: float = 2) -> tuple[str, int]:
+        self.sent.append(cmd)
+        if self.fails > 0:
+            self.fails -= 1
+            raise self.exc
+        return (LIST_RESP if cmd == "list" else f"ok {cmd}"), 0
+
+    async def close(self) -> None:
+        self._ready = False
+
+
+@pytest.mark.usefixtures("fake_bot")
+async def test_presence_init_retries_after_rcon_failure(tmp_path: Path) -> None:
+    manager = ServerManager("presence", run_cmd="true", work_path=tmp_path, rcon_host="localhost")
+    rcon = FakeRcon(fails=1)
+    manager.rcon_client = rcon  # type: ignore[assignment]
+    manager.proc = SimpleNamespace(stdin=None, returncode=None)  # type: ignore[assignment]
+    manager._open_ts = time.monotonic()
+    manager._opened.set()
+    manager._server_done.set()
+    worker = asyncio.create_task(manager._proc_input_worker())
+    try:
+        # 第一次 list 超时，输入例程继续运行，初始化在退避后重试
+        for _ in range(40):
+            if manager.presence.online:
+                break
+            await asyncio.sleep(0.05)
+        assert manager.presence.online == {"Steve", "Alex"}
+        assert rcon.sent == ["list", "list"]
+        # 失败后关闭连接，下一条命令前重新连接，避免迟到的回应错位
+        assert rcon.connects == 2
+        assert not worker.done()
+        assert await asyncio.wait_for(manager.send_cmd("say hi"), 1) == "ok say hi"
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        for task in manager._tasks:
+            task.cancel()
+
+
+@pytest.mark.usefixtures("fake_bot")
+async def test_failed_command_raises_to_caller(tmp_path: Path) -> None:
+    manager = ServerManager("presence", run_cmd="true", work_path=tmp_path, rcon_host="localhost")
+    rcon = FakeRcon(fails=0)
+    manager.rcon_client = rcon  # type: ignore[assignment]
+    manager.proc = SimpleNamespace(stdin=None, returncode=None)  # type: ignore[assignment]
+    manager._open_ts = time.monotonic()
+    manager._opened.set()
+    manager._server_done.set()
+    worker = asyncio.create_task(manager._proc_input_worker())
+    try:
+        await asyncio.sleep(0.05)
+        rcon.fails, rcon.exc = 1, ConnectionResetError("reset")
+        with pytest.raises(ConnectionResetError):
+            await asyncio.wait_for(manager.send_cmd("time query daytime"), 1)
+        assert await asyncio.wait_for(manager.send_cmd("say hi"), 1) == "ok say hi"
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        for task in manager._tasks:
+            task.cancel()
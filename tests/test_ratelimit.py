@@ -0,0 +1,116 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import melobot_protocol_mcpm.io.ratelimit as ratelimit_mod
+from melobot_protocol_mcpm.io import ChatFlood, ChatLimiter, ChatRateLimit, ServerManager
+from melobot_protocol_mcpm.io.model import ChatFloodInputData, LogInputData
+from melobot_protocol_mcpm.io.tail import LogPosition
+from melobot_protocol_mcpm.utils import LevelRole, RoleRegistry
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    # 只替换限流模块使用的时钟，事件循环仍使用真实时钟
+    monkeypatch.setattr(ratelimit_mod, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_rejects_invalid_rates() -> None:
+    with pytest.raises(ValueError):
+        ChatLimiter(ChatRateLimit(rates={LevelRole.NORMAL: (0, 1)}), lambda _: None)
+    with pytest.raises(ValueError):
+        ChatLimiter(ChatRateLimit(rates={LevelRole.NORMAL: (1, 0)}), lambda _: None)
+
+
+async def test_bucket_burst_and_refill(clock: Clock) -> None:
+    limiter = ChatLimiter(
+        ChatRateLimit(rates={LevelRole.NORMAL: (2, 3)}, overflow="drop"), lambda _: None
+    )
+    assert [limiter.allow("Steve", "hi") for _ in range(4)] == [True, True, True, False]
+    # 其他玩家有各自的令牌桶
+    assert limiter.allow("Alex", "hi")
+    clock.now += 0.5
+    assert [limiter.allow("Steve", "hi") for _ in range(2)] == [True, False]
+    clock.now += 100
+    assert [limiter.allow("Steve", "hi") for _ in range(4)] == [True, True, True, False]
+    assert limiter.dropped == 3
+
+
+async def test_roles_from_registry(clock: Clock) -> None:
+    registry = RoleRegistry(owner="Boss", black_users=["Spammer"])
+    limiter = ChatLimiter(ChatRateLimit(registry=registry, overflow="drop"), lambda _: None)
+    assert all(limiter.allow("Boss", "hi") for _ in range(100))
+    assert [limiter.allow("Spammer", "hi") for _ in range(2)] == [True, False]
+    assert [limiter.allow("Steve", "hi") for _ in range(6)] == [True] * 5 + [False]
+    # 权限更新后立即按新的等级限流
+    registry.add(LevelRole.SU, "Steve")
+    assert limiter.allow("Steve", "hi")
+
+
+async def test_summarize_dropped_messages(clock: Clock) -> None:
+    floods: list[ChatFlood] = []
+    limiter = ChatLimiter(
+        ChatRateLimit(rates={LevelRole.NORMAL: (0.01, 1)}, summary_interval=0.05),
+        floods.append,
+    )
+    assert limiter.allow("Steve", "a")
+    assert not limiter.allow("Steve", "b")
+    clock.now += 2
+    assert not limiter.allow("Steve", "c")
+    await asyncio.sleep(0.1)
+    assert floods == [
+        ChatFlood(player="Steve", role=LevelRole.NORMAL, dropped=2, window_secs=2, last_message="c")
+    ]
+
+    assert not limiter.allow("Steve", "d")
+    limiter.clear()
+    await asyncio.sleep(0.1)
+    assert len(floods) == 1
+
+
+def chat(name: str, msg: str) -> str:
+    return f"[12:00:00] [Server thread/INFO]: <{name}> {msg}"
+
+
+async def test_dropped_lines_commit_in_order(tmp_path: Path) -> None:
+    (tmp_path / "logs").mkdir()
+    manager = ServerManager(
+        "chat",
+        run_cmd="true",
+        work_path=tmp_path,
+        log_source="file",
+        chat_limit=ChatRateLimit(rates={LevelRole.NORMAL: (0.001, 1)}, summary_interval=60),
+    )
+    tailer = manager.log_tailer
+    assert tailer is not None and manager.chat_limiter is not None
+    manager._opened.set()
+    positions = [LogPosition(1, i, "") for i in range(1, 4)]
+    for pos, line in zip(positions, (chat("Steve", "a"), chat("Steve", "b"), chat("Steve", "c"))):
+        tailer._pending.append(pos)
+        manager._put_stdout(line)
+
+    # 被拦截的行不能越过之前还在输入队列中的行标记为已处理
+    assert tailer.committed is None
+    packet = await asyncio.wait_for(manager.input(), 1)
+    assert isinstance(packet.data, LogInputData) and packet.data.content.endswith("<Steve> a")
+    assert tailer.committed == positions[0]
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(manager.input(), 0.05)
+    assert tailer.committed == positions[2]
+
+    manager.chat_limiter._summarize("Steve")
+    packet = await asyncio.wait_for(manager.input(), 1)
+    assert isinstance(packet.data, ChatFloodInputData) and packet.data.content.dropped == 2
+    manager.chat_limiter.clear()
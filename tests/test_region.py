@@ -0,0 +1,112 @@
+import struct
+import subprocess
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.world import RegionFile, WorldRegions, prune_region
+from melobot_protocol_mcpm.world.region import SECTOR
+
+
+def _chunk_nbt(inhabited: int) -> bytes:
+    return b"\x0a\x00\x00\x04\x00\x0dInhabitedTime" + struct.pack(">q", inhabited) + b"\x00"
+
+
+def write_region(path: Path, chunks: dict[int, int]) -> None:
+    """写入一个区域文件，``chunks`` 为区块序号到 InhabitedTime 的映射"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    locations = [0] * 1024
+    timestamps = [0] * 1024
+    body = bytearray()
+    for index, inhabited in chunks.items():
+        data = zlib.compress(_chunk_nbt(inhabited))
+        record = struct.pack(">IB", len(data) + 1, 2) + data
+        record += bytes(-len(record) % SECTOR)
+        locations[index] = (2 + len(body) // SECTOR) << 8 | len(record) // SECTOR
+        timestamps[index] = 1_700_000_000 + index
+        body += record
+    path.write_bytes(struct.pack(">1024I", *locations) + struct.pack(">1024I", *timestamps) + body)
+
+
+def test_region_file_stats(tmp_path: Path) -> None:
+    path = tmp_path / "r.-1.2.mca"
+    write_region(path, {0: 0, 33: 1200, 1023: 0})
+    with RegionFile(path) as region:
+        assert (region.x, region.z) == (-1, 2)
+        assert [e.index for e in region.entries()] == [0, 33, 1023]
+        stats = region.stats(inhabited=True)
+    assert stats.chunks == 3 and stats.used_bytes == 3 * SECTOR
+    assert (stats.inhabited_total, stats.unvisited) == (1200, 2)
+    assert (stats.oldest, stats.newest) == (1_700_000_000, 1_700_001_023)
+    assert RegionFile(path).stats().inhabited_total is None
+
+    with pytest.raises(ValueError):
+        RegionFile(tmp_path / "level.dat")
+
+
+def test_prune_region_and_siblings(tmp_path: Path) -> None:
+    world = tmp_path / "world"
+    path = world / "region" / "r.0.0.mca"
+    write_region(path, {0: 0, 1: 500, 2: 20})
+    write_region(world / "entities" / "r.0.0.mca", {0: 0, 1: 0, 2: 0})
+
+    assert prune_region(path, max_inhabited=20, dry_run=True) == 2
+    assert path.stat().st_size == 5 * SECTOR
+    assert prune_region(path, max_inhabited=20) == 2
+    with RegionFile(path) as region:
+        (entry,) = region.entries()
+        assert entry.index == 1 and entry.sector == 2 and region.inhabited_time(entry) == 500
+    assert path.stat().st_size == 3 * SECTOR
+    with RegionFile(world / "entities" / "r.0.0.mca") as region:
+        assert [e.index for e in region.entries()] == [1]
+
+
+async def test_world_regions_scan_and_prune(tmp_path: Path) -> None:
+    (tmp_path / "server.properties").write_text("level-name=survival\n")
+    write_region(tmp_path / "survival" / "region" / "r.0.0.mca", {0: 0, 1: 100})
+    write_region(tmp_path / "survival_nether" / "DIM-1" / "region" / "r.0.0.mca", {5: 0})
+    manager = ServerManager("regions", run_cmd="true", work_path=tmp_path)
+    regions = WorldRegions(manager, workers=2)
+
+    stats = await regions.scan(inhabited=True)
+    assert sorted(s.unvisited for s in stats) == [1, 1]
+
+    manager._opened.set()
+    with pytest.raises(RuntimeError, match="正在运行"):
+        await regions.prune()
+    assert (await regions.prune(dry_run=True)).chunks == 2
+    manager._opened.clear()
+
+    result = await regions.prune()
+    assert (result.regions, result.chunks) == (2, 2)
+    assert result.bytes_after < result.bytes_before
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="使用 fcntl 锁模拟服务端")
+async def test_prune_refuses_locked_world(tmp_path: Path) -> None:
+    write_region(tmp_path / "world" / "region" / "r.0.0.mca", {0: 0})
+    lock = tmp_path / "world" / "session.lock"
+    lock.write_bytes(b"\xe2\x98\x83")
+    holder = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import fcntl, sys; f = open(sys.argv[1], 'r+b'); fcntl.lockf(f, fcntl.LOCK_EX); "
+            "print(flush=True); sys.stdin.read()",
+            str(lock),
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        assert holder.stdout is not None
+        holder.stdout.readline()
+        manager = ServerManager("locked", run_cmd="true", work_path=tmp_path)
+        with pytest.raises(RuntimeError, match="session.lock"):
+            await WorldRegions(manager).prune()
+    finally:
+        holder.kill()
+        holder.wait()
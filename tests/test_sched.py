@@ -0,0 +1,104 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.adapter.event import Event
+from melobot_protocol_mcpm.handle import on_message
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.io.model import LogInputData
+from melobot_protocol_mcpm.io.sched import DispatchPolicy, HandleScheduler
+
+
+def _chat(manager: ServerManager, player: str, text: str) -> Event:
+    data = LogInputData(
+        content=f"[12:00:00] [Server thread/INFO]: <{player}> {text}",
+        pattern_group=manager.pattern_group,
+        cmd_factory=manager.cmd_factory,
+        from_="stdout",
+    )
+    return Event.resolve(manager.name, data)
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> ServerManager:
+    return ServerManager(
+        "sched",
+        run_cmd="true",
+        work_path=tmp_path,
+        dispatch=DispatchPolicy(ordered=True, max_concurrency=2),
+    )
+
+
+async def test_same_scope_runs_in_order(manager: ServerManager) -> None:
+    sched = manager.scheduler
+    assert sched is not None
+    order: list[str] = []
+
+    async def run(event: Event, tag: str, delay: float) -> None:
+        async with sched.slot(event):
+            await asyncio.sleep(delay)
+            order.append(tag)
+
+    await asyncio.gather(
+        run(_chat(manager, "Steve", "a"), "steve-1", 0.05),
+        run(_chat(manager, "Steve", "b"), "steve-2", 0),
+        run(_chat(manager, "Alex", "c"), "alex-1", 0),
+    )
+    assert order == ["alex-1", "steve-1", "steve-2"]
+    assert sched.running == sched.pending == 0
+    assert not sched._scopes
+
+
+async def test_max_concurrency_caps_running(manager: ServerManager) -> None:
+    sched = manager.scheduler
+    assert sched is not None
+    release = asyncio.Event()
+    peak = 0
+
+    async def run(player: str) -> None:
+        nonlocal peak
+        async with sched.slot(_chat(manager, player, "hi")):
+            peak = max(peak, sched.running)
+            await release.wait()
+
+    tasks = [asyncio.create_task(run(p)) for p in ("A", "B", "C", "D")]
+    await asyncio.sleep(0.01)
+    assert (sched.running, sched.pending) == (2, 2)
+    release.set()
+    await asyncio.gather(*tasks)
+    assert peak == 2 and sched.running == sched.pending == 0
+
+
+def test_invalid_policy() -> None:
+    with pytest.raises(ValueError):
+        HandleScheduler(DispatchPolicy(max_concurrency=0))
+
+
+async def test_rejected_flow_does_not_queue(manager: ServerManager) -> None:
+    sched = manager.scheduler
+    assert sched is not None
+    release = asyncio.Event()
+    seen: list[str] = []
+
+    @on_message()
+    async def slow() -> None:
+        await release.wait()
+
+    @on_message(checker=lambda e: e.message == "accept")
+    async def picky() -> None:
+        seen.append("picky")
+
+    busy = asyncio.create_task(slow._handle(_chat(manager, "Steve", "first")))
+    await asyncio.sleep(0.01)
+    assert sched.running == 1
+
+    await asyncio.wait_for(picky._handle(_chat(manager, "Steve", "reject")), 1)
+    assert sched.pending == 0 and seen == []
+
+    accepted = asyncio.create_task(picky._handle(_chat(manager, "Steve", "accept")))
+    await asyncio.sleep(0.01)
+    assert sched.pending == 1 and seen == []
+    release.set()
+    await asyncio.gather(busy, accepted)
+    assert seen == ["picky"]
@@ -0,0 +1,112 @@
+import pytest
+
+from melobot_protocol_mcpm.adapter import CmdEcho, DataEcho, Echo, ListEcho, ScoreEcho, TimeEcho
+from melobot_protocol_mcpm.io.model import CmdEchoData
+from melobot_protocol_mcpm.utils import extract_snbt, iter_snbt, loads_snbt, parse_snbt_path
+
+SNBT = (
+    "{Pos: [1.5d, 64.0d, -3.2d], Health: 20.0f, OnGround: 1b, UUID: [I; 1, -2, 3, 4], "
+    'Inventory: [{Slot: 0b, id: "minecraft:stone", count: 64}, '
+    '{Slot: 1b, id: \'minecraft:dirt\', components: {"minecraft:custom_name": \'"Hi \\\\"x\\\\""\'}}], '
+    'L: [L; 5L, -1L], E: [], C: {}, s: 1.5e3, str: "a,}b]", n: -7s, xp: .5f, name: abc-1}'
+)
+
+
+def test_loads_values() -> None:
+    data = loads_snbt(SNBT)
+    assert data["Pos"] == [1.5, 64.0, -3.2]
+    assert data["Health"] == 20.0
+    assert data["OnGround"] == 1
+    assert data["UUID"] == [1, -2, 3, 4]
+    assert data["L"] == [5, -1]
+    assert data["E"] == [] and data["C"] == {}
+    assert data["s"] == 1500.0
+    assert data["str"] == "a,}b]"
+    assert data["n"] == -7
+    assert data["xp"] == 0.5
+    assert data["name"] == "abc-1"
+    assert data["Inventory"][0] == {"Slot": 0, "id": "minecraft:stone", "count": 64}
+    assert data["Inventory"][1]["components"]["minecraft:custom_name"] == '"Hi \\"x\\""'
+
+
+@pytest.mark.parametrize("text", ["{a:1", "{a 1}", "[1 2]", "{a: 1} x"])
+def test_loads_rejects_malformed(text: str) -> None:
+    with pytest.raises(ValueError):
+        loads_snbt(text)
+
+
+def test_parse_path() -> None:
+    assert parse_snbt_path('a.b[0]."x.y"[-2]') == ["a", "b", 0, "x.y", -2]
+    assert parse_snbt_path("") == []
+    with pytest.raises(ValueError):
+        parse_snbt_path(".a")
+
+
+def test_extract_matches_full_parse() -> None:
+    data = loads_snbt(SNBT)
+    assert extract_snbt(SNBT, "Pos[-1]") == data["Pos"][-1]
+    assert extract_snbt(SNBT, "UUID[1]") == -2
+    assert extract_snbt(SNBT, "Inventory[0]") == data["Inventory"][0]
+    assert extract_snbt(SNBT, 'Inventory[1].components."minecraft:custom_name"') == (
+        data["Inventory"][1]["components"]["minecraft:custom_name"]
+    )
+    assert extract_snbt(SNBT, "str") == "a,}b]"
+    assert extract_snbt(SNBT, "") == data
+
+
+def test_extract_missing_path() -> None:
+    assert extract_snbt(SNBT, "nope", None) is None
+    assert extract_snbt(SNBT, "Pos[3]", 0) == 0
+    with pytest.raises(KeyError):
+        extract_snbt(SNBT, "Inventory[0].tag")
+
+
+def test_iter_items() -> None:
+    data = loads_snbt(SNBT)
+    assert list(iter_snbt(SNBT, "Inventory")) == list(enumerate(data["Inventory"]))
+    assert dict(iter_snbt(SNBT)) == data
+    assert list(iter_snbt(SNBT, "missing")) == []
+
+
+def test_extract_skips_large_siblings() -> None:
+    big = "{" + ", ".join(f'k{i}: {{a: [1, 2, 3], b: "x{i}"}}' for i in range(2000))
+    big += ", target: {v: 42}}"
+    assert extract_snbt(big, "target.v") == 42
+    assert extract_snbt(big, "k1999.b") == "x1999"
+
+
+def resolve(cmd: str, content: str) -> Echo:
+    return Echo.resolve(CmdEchoData(cmd=cmd, content=content))
+
+
+def test_data_echo() -> None:
+    echo = resolve(
+        "/execute as @p run data get entity Steve", f"Steve has the following entity data: {SNBT}"
+    )
+    assert isinstance(echo, DataEcho)
+    assert echo.target == "Steve"
+    assert echo.get("Inventory[0].id") == "minecraft:stone"
+    assert echo.get("missing", 0) == 0
+    assert dict(echo.iter("Pos")) == {0: 1.5, 1: 64.0, 2: -3.2}
+    assert echo.data() == loads_snbt(SNBT)
+
+    failed = resolve("data get entity Nobody", "No entity was found")
+    assert failed.snbt is None  # type: ignore[attr-defined]
+    with pytest.raises(ValueError):
+        failed.data()  # type: ignore[attr-defined]
+
+
+def test_other_cmd_echoes() -> None:
+    echo = resolve("list", "There are 2 of a max of 20 players online: Steve, Alex")
+    assert isinstance(echo, ListEcho)
+    assert (echo.count, echo.max, echo.players) == (2, 20, ("Steve", "Alex"))
+
+    echo = resolve("scoreboard players get Steve kills", "Steve has 12 [kills]")
+    assert isinstance(echo, ScoreEcho)
+    assert (echo.target, echo.objective, echo.score) == ("Steve", "kills", 12)
+
+    echo = resolve("time query daytime", "The time is 6000")
+    assert isinstance(echo, TimeEcho) and echo.value == 6000
+
+    echo = resolve("say hi", "")
+    assert type(echo) is CmdEcho
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import melobot_protocol_mcpm.io.manager as manager_mod
+from melobot_protocol_mcpm.adapter.event import Event, RconStartedEvent
+from melobot_protocol_mcpm.io.manager import ServerManager
+from melobot_protocol_mcpm.io.model import LogInputData
+from melobot_protocol_mcpm.io.startup import StartupOrchestrator
+
+
+def _manager(tmp_path: Path, name: str, startup: StartupOrchestrator) -> ServerManager:
+    manager = ServerManager(name, run_cmd="true", work_path=tmp_path)
+    startup.register(manager)
+    return manager
+
+
+def _fake_open(manager: ServerManager, log: list[str], delay: float = 0.02) -> None:
+    async def _open() -> None:
+        log.append(manager.name)
+        await asyncio.sleep(delay)
+        manager._opened.set()
+
+    manager._open = _open  # type: ignore[method-assign]
+
+
+async def test_concurrent_open_takes_one_permit(tmp_path: Path) -> None:
+    startup = StartupOrchestrator(concurrency=2)
+    manager = _manager(tmp_path, "dup", startup)
+    opened: list[str] = []
+    _fake_open(manager, opened)
+
+    await asyncio.wait_for(asyncio.gather(manager.open(), manager.open()), 1)
+    assert opened == ["dup"]
+    assert startup._sem._value == 2
+    assert startup.records["dup"].ready and not startup._booting
+
+
+async def test_dependencies_boot_first(tmp_path: Path) -> None:
+    startup = StartupOrchestrator(concurrency=2, depends={"proxy": ["lobby", "survival"]})
+    managers = [_manager(tmp_path, n, startup) for n in ("proxy", "lobby", "survival")]
+    opened: list[str] = []
+    for manager in managers:
+        _fake_open(manager, opened)
+    startup.validate()
+
+    await asyncio.wait_for(asyncio.gather(*(m.open() for m in managers)), 1)
+    records = await asyncio.wait_for(startup.wait(), 1)
+    assert opened[-1] == "proxy" and set(opened) == {"proxy", "lobby", "survival"}
+    assert all(r.ready for r in records.values()) and startup.total_secs is not None
+
+
+async def test_failed_open_releases_permit(tmp_path: Path) -> None:
+    startup = StartupOrchestrator(concurrency=1)
+    manager = _manager(tmp_path, "broken", startup)
+
+    async def _open() -> None:
+        raise RuntimeError("端口被占用")
+
+    manager._open = _open  # type: ignore[method-assign]
+    with pytest.raises(RuntimeError):
+        await manager.open()
+    assert startup._sem._value == 1
+    assert not startup.records["broken"].ready
+
+
+def test_validate_rejects_unknown_and_cycles(tmp_path: Path) -> None:
+    startup = StartupOrchestrator(depends={"a": ["b"]})
+    _manager(tmp_path, "a", startup)
+    with pytest.raises(ValueError, match="未注册"):
+        startup.validate()
+    _manager(tmp_path, "b", startup)
+    startup.add_dependency("b", "a")
+    with pytest.raises(ValueError, match="循环"):
+        startup.validate()
+
+
+async def test_rcon_started_only_for_own_server(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    flows: list = []
+    bot = SimpleNamespace(_dispatcher=SimpleNamespace(add=lambda *fs: flows.extend(fs)))
+    monkeypatch.setattr(manager_mod, "get_bot", lambda: bot)
+    manager = ServerManager("own", run_cmd="true", work_path=tmp_path)
+    manager.proc = SimpleNamespace(stdin=None, returncode=None)  # type: ignore[assignment]
+    manager._open_ts = time.monotonic()
+    manager._opened.set()
+
+    def rcon_started(server_id: str) -> Event:
+        data = LogInputData(
+            content="[12:00:00] [Server thread/INFO]: RCON running on 0.0.0.0:25575",
+            pattern_group=manager.pattern_group,
+            cmd_factory=manager.cmd_factory,
+            from_="stdout",
+        )
+        event = Event.resolve(server_id, data)
+        assert isinstance(event, RconStartedEvent)
+        return event
+
+    worker = asyncio.create_task(manager._proc_input_worker())
+    try:
+        await asyncio.sleep(0.01)
+        (flow,) = flows
+        await flow._handle(rcon_started("other"))
+        assert not manager._server_done.is_set()
+        await flow._handle(rcon_started("own"))
+        assert manager._server_done.is_set()
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
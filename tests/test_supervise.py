@@ -0,0 +1,74 @@
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+import pytest
+
+import melobot_protocol_mcpm.io.manager as manager_mod
+from melobot_protocol_mcpm.io.holder import HolderProcess
+from melobot_protocol_mcpm.io.lifecycle import SupervisePolicy
+from melobot_protocol_mcpm.io.manager import ServerManager
+
+STUBBORN_SERVER = """\
+import signal, sys, time
+signal.signal(signal.SIGTERM, signal.SIG_IGN)
+print("ready", flush=True)
+while True:
+    time.sleep(1)
+"""
+
+
+@pytest.fixture
+def stubborn_server(tmp_path: Path) -> list[str]:
+    """忽略停止命令和 SIGTERM 的假服务端"""
+    script = tmp_path / "stubborn.py"
+    script.write_text(STUBBORN_SERVER, encoding="utf-8")
+    return [sys.executable, str(script)]
+
+
+async def test_stop_kills_after_terminate_timeout(
+    tmp_path: Path, stubborn_server: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(manager_mod, "_KILL_TIMEOUT", 0.2)
+    manager = ServerManager("stubborn", run_cmd="true", work_path=tmp_path, stop_timeout=0.1)
+    manager.proc = await asyncio.create_subprocess_exec(
+        *stubborn_server, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+    )
+    await manager.proc.stdout.readline()  # type: ignore[union-attr]
+    await asyncio.wait_for(manager._stop_proc(), 5)
+    assert await asyncio.wait_for(manager.proc.wait(), 5) == -signal.SIGKILL
+
+
+async def test_holder_forwards_kill(tmp_path: Path, stubborn_server: list[str]) -> None:
+    proc = await HolderProcess.attach(tmp_path / "h.sock", stubborn_server, str(tmp_path))
+    await asyncio.wait_for(proc.stdout.readline(), 5)
+    proc.terminate()
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(asyncio.shield(proc.wait()), 0.3)
+    proc.kill()
+    assert await asyncio.wait_for(proc.wait(), 5) == -signal.SIGKILL
+
+
+async def test_failed_scheduled_restart_is_retried(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    policy = SupervisePolicy(backoff_base=0.01, restart_warnings=())
+    manager = ServerManager("sched-restart", run_cmd="true", work_path=tmp_path, supervise=policy)
+    opens = 0
+
+    async def restart() -> None:
+        raise RuntimeError("端口被占用")
+
+    async def open_() -> None:
+        nonlocal opens
+        opens += 1
+        if opens == 1:
+            raise RuntimeError("端口被占用")
+
+    monkeypatch.setattr(manager, "restart", restart)
+    monkeypatch.setattr(manager, "open", open_)
+    await asyncio.wait_for(manager._scheduled_restart(0), 5)
+    assert opens == 2
+    assert manager.lifecycle.consecutive_crashes == 2
+    assert manager.lifecycle.last_backoff_secs == 0.01
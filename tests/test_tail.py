@@ -0,0 +1,174 @@
+import asyncio
+import gzip
+import os
+from pathlib import Path
+
+from typing_extensions import AsyncIterator
+
+from melobot_protocol_mcpm.io.tail import LogTailer
+
+
+def make_tailer(tmp_path: Path) -> LogTailer:
+    return LogTailer(
+        tmp_path / "logs",
+        tmp_path / "tail.json",
+        poll_interval=0.01,
+        max_poll_interval=0.02,
+        save_interval=0,
+    )
+
+
+def append(path: Path, *lines: str) -> None:
+    with open(path, "ab") as fp:
+        fp.write("".join(f"{line}\n" for line in lines).encode())
+
+
+async def take(tailer: LogTailer, it: AsyncIterator[str], n: int) -> list[str]:
+    ret = []
+    for _ in range(n):
+        ret.append(await asyncio.wait_for(it.__anext__(), 2))
+        tailer.commit()
+    return ret
+
+
+async def test_skip_existing_without_checkpoint(tmp_path: Path) -> None:
+    (tmp_path / "logs").mkdir()
+    log = tmp_path / "logs" / "latest.log"
+    append(log, "old")
+    tailer = make_tailer(tmp_path)
+    it = tailer.lines()
+    try:
+        task = asyncio.ensure_future(take(tailer, it, 2))
+        await asyncio.sleep(0.05)
+        append(log, "a", "b")
+        assert await task == ["a", "b"]
+    finally:
+        await it.aclose()
+
+
+async def test_read_file_created_later_from_start(tmp_path: Path) -> None:
+    (tmp_path / "logs").mkdir()
+    tailer = make_tailer(tmp_path)
+    it = tailer.lines()
+    try:
+        task = asyncio.ensure_future(take(tailer, it, 2))
+        await asyncio.sleep(0.05)
+        append(tmp_path / "logs" / "latest.log", "a", "b")
+        assert await task == ["a", "b"]
+    finally:
+        await it.aclose()
+
+
+async def test_partial_line_waits_for_newline(tmp_path: Path) -> None:
+    (tmp_path / "logs").mkdir()
+    log = tmp_path / "logs" / "latest.log"
+    log.touch()
+    tailer = make_tailer(tmp_path)
+    it = tailer.lines()
+    try:
+        task = asyncio.ensure_future(take(tailer, it, 1))
+        await asyncio.sleep(0.05)
+        with open(log, "ab") as fp:
+            fp.write(b"hal")
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        append(log, "f")
+        assert await task == ["half"]
+    finally:
+        await it.aclose()
+
+
+async def test_resume_from_checkpoint(tmp_path: Path) -> None:
+    (tmp_path / "logs").mkdir()
+    log = tmp_path / "logs" / "latest.log"
+    log.touch()
+    tailer = make_tailer(tmp_path)
+    it = tailer.lines()
+    try:
+        task = asyncio.ensure_future(take(tailer, it, 2))
+        await asyncio.sleep(0.05)
+        append(log, "a", "b", "c")
+        assert await task == ["a", "b"]
+        # 产出但未确认的行不写入检查点
+        await asyncio.wait_for(it.__anext__(), 2)
+    finally:
+        await it.aclose()
+    tailer.save()
+
+    append(log, "d")
+    tailer = make_tailer(tmp_path)
+    it = tailer.lines()
+    try:
+        assert await take(tailer, it, 2) == ["c", "d"]
+    finally:
+        await it.aclose()
+
+
+async def test_resume_after_rotation_while_stopped(tmp_path: Path) -> None:
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    log = logs / "latest.log"
+    log.touch()
+    tailer = make_tailer(tmp_path)
+    it = tailer.lines()
+    try:
+        task = asyncio.ensure_future(take(tailer, it, 1))
+        await asyncio.sleep(0.05)
+        append(log, "a")
+        assert await task == ["a"]
+    finally:
+        await it.aclose()
+    tailer.save()
+
+    # 停止期间服务端追加内容后把日志轮转为压缩文件，再创建新的日志文件
+    append(log, "b", "c")
+    with gzip.open(logs / "2026-01-01-1.log.gz", "wb") as fp:
+        fp.write(log.read_bytes())
+    log.unlink()
+    append(log, "new")
+
+    tailer = make_tailer(tmp_path)
+    it = tailer.lines()
+    try:
+        assert await take(tailer, it, 3) == ["b", "c", "new"]
+    finally:
+        await it.aclose()
+
+
+async def test_follow_live_rotation(tmp_path: Path) -> None:
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    log = logs / "latest.log"
+    log.touch()
+    tailer = make_tailer(tmp_path)
+    it = tailer.lines()
+    try:
+        task = asyncio.ensure_future(take(tailer, it, 4))
+        await asyncio.sleep(0.05)
+        append(log, "a", "b")
+        await asyncio.sleep(0.05)
+        # 轮转前最后写入的内容不能遗漏
+        append(log, "c")
+        os.rename(log, logs / "old.log")
+        append(log, "d")
+        assert await task == ["a", "b", "c", "d"]
+    finally:
+        await it.aclose()
+
+
+async def test_follow_truncation(tmp_path: Path) -> None:
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    log = logs / "latest.log"
+    log.touch()
+    tailer = make_tailer(tmp_path)
+    it = tailer.lines()
+    try:
+        task = asyncio.ensure_future(take(tailer, it, 2))
+        await asyncio.sleep(0.05)
+        append(log, "a long first line")
+        await asyncio.sleep(0.05)
+        log.write_bytes(b"x\n")
+        assert await task == ["a long first line", "x"]
+    finally:
+        await it.aclose()
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from melobot_protocol_mcpm.adapter.action import SendBroadcastMsgAction, SendMsgAction
+from melobot_protocol_mcpm.utils import CmdFactory, Color, JsonText, JsonTextTemplate
+
+
+def test_template_matches_json_dumps() -> None:
+    tpl = JsonTextTemplate(JsonText("{player} 加入了游戏", color=Color.yellow), "在线 {count} 人")
+    assert tpl.fields == {"player", "count"}
+    rendered = tpl.format({"player": 'Ste"ve\n', "count": 3})
+    assert json.loads(rendered) == [
+        {"text": 'Ste"ve\n 加入了游戏', "color": "yellow"},
+        {"text": "在线 3 人"},
+    ]
+    assert tpl.format({"player": "a", "count": 1}, count=2).endswith('"在线 2 人"}]')
+
+
+def test_template_static_and_errors() -> None:
+    tpl = JsonTextTemplate("{{literal}}")
+    assert tpl.fields == set()
+    assert tpl.format() == '{"text": "{literal}"}'
+
+    with pytest.raises(ValueError, match="缺少字段"):
+        JsonTextTemplate("{name}").format()
+    for bad in ("{0}", "{a.b}", "{a!r}", "{a:>3}", "\x00"):
+        with pytest.raises(ValueError):
+            JsonTextTemplate(bad)
+    with pytest.raises(ValueError):
+        JsonTextTemplate()
+
+
+def test_json_text_caches_format() -> None:
+    text = JsonText("hi", bold=True)
+    assert text.format() is text.format()
+    assert json.loads(JsonText.formats("a", text)) == [{"text": "a"}, {"text": "hi", "bold": True}]
+
+
+async def test_create_send_msg() -> None:
+    factory = CmdFactory()
+    msg = 'say "hi"\\'
+    assert await factory.create_send_msg(SendMsgAction("Steve", msg)) == (
+        f"tellraw Steve {json.dumps(msg, ensure_ascii=False)}"
+    )
+    assert await factory.create_send_msg(SendMsgAction("Steve", JsonText("你好"))) == (
+        'tellraw Steve {"text": "你好"}'
+    )
+    tpl = JsonTextTemplate("{n} 秒后重启")
+    assert await factory.create_send_broadcast_msg(SendBroadcastMsgAction(tpl, {"n": 10})) == (
+        'tellraw @a {"text": "10 秒后重启"}'
+    )
+    assert await factory.create_send_msg(SendMsgAction("@a", ["a", JsonText("b")])) == (
+        'tellraw @a [{"text": "a"}, {"text": "b"}]'
+    )
+    with pytest.raises(ValueError):
+        await factory.create_send_msg(SendMsgAction("@a", [1]))  # type: ignore[list-item]
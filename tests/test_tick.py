@@ -0,0 +1,104 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from melobot_protocol_mcpm.io import ServerManager, TickHealth, TickPolicy
+from melobot_protocol_mcpm.io.model import LagInputData
+
+
+def test_priority_cmds() -> None:
+    policy = TickPolicy()
+    assert policy.is_priority("/stop")
+    assert policy.is_priority("kick Steve spam")
+    assert policy.is_priority("tick query")
+    assert not policy.is_priority("tellraw @a {}")
+    assert not policy.is_priority("setblock 0 0 0 stone")
+
+
+def test_health_hysteresis_and_rates() -> None:
+    policy = TickPolicy(normal_rate=50, lag_rate=10, lag_hold=5)
+    health = TickHealth()
+    assert policy.rate(health) == 50
+    health.update_sample(60, policy)
+    assert health.overloaded
+    assert policy.rate(health) == pytest.approx(10 * 45 / 60)
+    # 回落到恢复阈值以下才视为恢复
+    health.update_sample(42, policy)
+    assert health.overloaded and policy.rate(health) == 10
+    health.update_sample(39, policy)
+    assert not health.overloaded and health.samples == 3
+
+    health.report_lag(2000, policy)
+    assert health.is_lagging() and health.last_behind_ms == 2000
+    assert not health.is_lagging(time.monotonic() + 6)
+
+
+def make_manager(tmp_path: Path, replies: list[object]) -> tuple[ServerManager, list[str]]:
+    manager = ServerManager(
+        "tick",
+        run_cmd="true",
+        work_path=tmp_path,
+        rcon_host="localhost",
+        tick_policy=TickPolicy(sample_interval=0.01),
+    )
+    sent: list[str] = []
+
+    def send(cmd: str) -> asyncio.Future[str]:
+        sent.append(cmd)
+        fut: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        reply = replies.pop(0) if len(replies) > 1 else replies[0]
+        if isinstance(reply, Exception):
+            fut.set_exception(reply)
+        else:
+            fut.set_result(str(reply))
+        return fut
+
+    manager._send_cmd_str_nowait = send  # type: ignore[method-assign]
+    return manager, sent
+
+
+def mspt(value: float) -> str:
+    return f"Average time per tick: {value}ms"
+
+
+async def lag_events(manager: ServerManager, count: int) -> list[LagInputData]:
+    ret = []
+    for _ in range(count):
+        item = await asyncio.wait_for(manager._in_buf.get(), 1)
+        assert isinstance(item, LagInputData)
+        ret.append(item)
+    return ret
+
+
+async def test_sampler_reports_overload_edges(tmp_path: Path) -> None:
+    replies: list[object] = [mspt(10), mspt(80), mspt(90), mspt(70), mspt(20)]
+    manager, sent = make_manager(tmp_path, replies)
+    sampler = asyncio.create_task(manager._tick_sampler())
+    try:
+        entered, recovered = await lag_events(manager, 2)
+    finally:
+        sampler.cancel()
+    # 卡顿期间的采样不重复报告
+    assert (entered.lagging, entered.mspt, entered.source) == (True, 80, "sample")
+    assert (recovered.lagging, recovered.mspt) == (False, 20)
+    assert manager.tick_health.samples >= 5
+    assert set(sent) == {"tick query"}
+
+
+async def test_sampler_survives_failed_samples(tmp_path: Path) -> None:
+    replies: list[object] = [
+        mspt(80),
+        RuntimeError("服务端进程已退出"),
+        "Average time per tick: 1.2.3ms",
+        mspt(20),
+    ]
+    manager, _ = make_manager(tmp_path, replies)
+    sampler = asyncio.create_task(manager._tick_sampler())
+    try:
+        entered, recovered = await lag_events(manager, 2)
+        assert not sampler.done()
+    finally:
+        sampler.cancel()
+    assert entered.lagging and not recovered.lagging